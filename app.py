@@ -1,13 +1,13 @@
 import streamlit as st
-import zipfile
-import tempfile
-import shutil
 import os
 
-os.system("pip install PyPDF2")
-from datetime import timedelta
-from pathlib import Path
-from PyPDF2 import PdfReader
+from scorm_core.job_view import current_job, show_job, submit_job
+from scorm_core.locales import available_locales
+from scorm_core.packaging import SCORM_BASE_DIR
+from scorm_core.profiles import PROFILES
+from scorm_core.result_cache import cache_key, write_and_hash
+from scorm_core.template_cache import template_fingerprint
+from scorm_core.workspace import default_workspace
 
 st.title("Convertisseur PDF vers SCORM")
 
@@ -31,78 +31,94 @@ scorm_version = st.selectbox("Version SCORM", ["1.2", "2004"])
 # 5. Critère de complétude
 completion_criteria = st.multiselect("Critères de complétude", ["temps", "pages"])
 
-# 6. Bouton de génération
+# 6. Profil du package : "lean" pour les apprenants, "full" pour le dépannage
+package_profile = st.selectbox(
+    "Profil du package",
+    PROFILES,
+    help="lean : sans source maps ni debugger pdf.js ; full : template complet pour le dépannage",
+)
+
+# 7. Langues du viewer : seules ces traductions (et l'anglais de repli) sont livrées
+viewer_locales = st.multiselect(
+    "Langues du viewer PDF",
+    available_locales(SCORM_BASE_DIR),
+    default=["fr"],
+    help="L'anglais (en-US) est toujours inclus comme langue de repli.",
+)
+
+# 8. CMaps : par défaut seules celles des polices CID du PDF sont livrées
+keep_all_cmaps = st.checkbox(
+    "Conserver toutes les CMaps pdf.js",
+    value=False,
+    help="À cocher si des caractères asiatiques s'affichent mal dans le package.",
+)
+
+# 9. Affichage web rapide : PDF linéarisé, chargé par plages par le viewer
+linearize = st.checkbox(
+    "Optimiser pour l'affichage web (linéarisation)",
+    value=False,
+    help="Si le LMS accepte les requêtes de plages (Range), seules les pages consultées sont téléchargées.",
+)
+
+# 10. Recherche : texte des pages indexé à la génération
+search_index = st.checkbox(
+    "Index de recherche",
+    value=True,
+    help="La recherche du viewer n'analyse que les pages contenant le texte cherché (gros documents).",
+)
+
+# 11. Gros documents : un SCO par chapitre (signets de premier niveau)
+chapters = st.checkbox(
+    "Découper en chapitres (un SCO par chapitre)",
+    value=False,
+    help="D'après les signets du PDF : chaque chapitre est lancé séparément dans le LMS, "
+         "la durée minimale est répartie au prorata des pages.",
+)
+
+# 12. Optimisation : images réduites à la résolution cible, flux recompressés
+with st.expander("Optimisation du PDF (documents scannés ou riches en images)"):
+    optimize = st.checkbox("Optimiser le PDF", value=False)
+    optimize_dpi = st.slider("Résolution maximale des images (dpi)", 72, 300, 150, step=6, disabled=not optimize)
+    optimize_quality = st.slider("Qualité JPEG", 40, 95, 75, disabled=not optimize)
+    optimize_target_mb = st.number_input("Taille visée (Mo, 0 : aucune)", min_value=0.0, value=0.0, step=1.0,
+                                         disabled=not optimize,
+                                         help="Qualité puis résolution sont abaissées jusqu'à atteindre la taille.")
+
+# 13. Bouton de génération
 if st.button("Générer SCORM"):
     if pdf_file is None:
         st.error("Veuillez uploader un fichier PDF.")
     elif not completion_criteria:
         st.error("Veuillez sélectionner au moins un critère de complétude (temps et/ou pages).")
     else:
-        with tempfile.TemporaryDirectory() as tmpdir:
+        # Dossier de job de l'espace de travail, supprimé même en cas d'erreur
+        with default_workspace().job() as tmpdir:
+            # L'empreinte du PDF est calculée pendant son écriture sur disque
             pdf_path = os.path.join(tmpdir, "document.pdf")
-            with open(pdf_path, "wb") as f:
-                f.write(pdf_file.read())
-
-            h, m, s = map(int, min_duration_str.split(":"))
-            min_seconds = int(timedelta(hours=h, minutes=m, seconds=s).total_seconds())
-
-            pdf_reader = PdfReader(pdf_path)
-            num_pages = len(pdf_reader.pages)
-
-            scorm_base_path = os.path.join(os.path.dirname(__file__), "scorm_base")
-            scorm_output_dir = os.path.join(tmpdir, "scorm_package")
-            shutil.copytree(scorm_base_path, scorm_output_dir)
-
-            shutil.copy(pdf_path, os.path.join(scorm_output_dir, "web", "document.pdf"))
-
-            viewer_path = os.path.join(scorm_output_dir, "web", "viewer.html")
-            with open(viewer_path, "r", encoding="utf-8") as f:
-                viewer_html = f.read()
-            viewer_html = viewer_html.replace("file=compressed.tracemonkey-pldi-09.pdf", "file=document.pdf")
-            viewer_html = viewer_html.replace("print", "")
-            viewer_html = viewer_html.replace("download", "")
-            with open(viewer_path, "w", encoding="utf-8") as f:
-                f.write(viewer_html)
-
-            scorm_js_path = os.path.join(scorm_output_dir, "scorm.js")
-            with open(scorm_js_path, "w") as f:
-                f.write(f"""
-// Placeholder SCORM logic
-var required_time = {min_seconds};
-var required_pages = {num_pages if 'pages' in completion_criteria else 0};
-function checkCompletion(timeSpent, pagesViewed) {{
-  if ({'true' if 'temps' in completion_criteria else 'false'} && timeSpent < required_time) return false;
-  if ({'true' if 'pages' in completion_criteria else 'false'} && pagesViewed < required_pages) return false;
-  return true;
-}}
-                """)
-
-            manifest_path = os.path.join(scorm_output_dir, "imsmanifest.xml")
-            with open(manifest_path, "w") as f:
-                f.write(f"""
-<manifest identifier="{module_title.replace(' ', '_')}">
-  <organizations>
-    <organization>
-      <title>{module_title}</title>
-    </organization>
-  </organizations>
-  <resources>
-    <resource identifier="res1" type="webcontent" href="web/viewer.html">
-      <file href="web/viewer.html"/>
-      <file href="web/document.pdf"/>
-      <file href="scorm.js"/>
-    </resource>
-  </resources>
-</manifest>
-                """)
-
-            zip_path = os.path.join(tmpdir, f"{module_title.replace(' ', '_')}.zip")
-            shutil.make_archive(base_name=zip_path[:-4], format='zip', root_dir=scorm_output_dir)
-
-            with open(zip_path, "rb") as f:
-                st.download_button(
-                    label="Télécharger le package SCORM",
-                    data=f,
-                    file_name=os.path.basename(zip_path),
-                    mime="application/zip"
-                )
+            pdf_hash = write_and_hash(pdf_file, pdf_path)
+            options = {
+                "version": scorm_version,
+                "min_duration": min_duration_str,
+                "criteria": sorted(completion_criteria),
+                "profile": package_profile,
+                "locales": sorted(viewer_locales),
+                "keep_all_cmaps": keep_all_cmaps,
+                "linearize": linearize,
+                "search_index": search_index,
+                "chapters": chapters,
+                "optimize": optimize,
+                "optimize_dpi": optimize_dpi,
+                "optimize_quality": optimize_quality,
+                "optimize_target_mb": optimize_target_mb,
+            }
+            key = cache_key("pdf_viewer", [pdf_hash, template_fingerprint()], {"title": module_title, **options})
+            # La conversion part dans la file de jobs : la page ne fait que suivre
+            submit_job(
+                st, {"kind": "pdf", "title": module_title, "options": options}, {"input": pdf_path},
+                f"{module_title.replace(' ', '_')}.zip", cache_key=key,
+            )
+
+# 14. Suivi de la conversion en cours (survit aux reruns et aux reconnexions)
+job_id = current_job(st)
+if job_id:
+    show_job(st, job_id, "Télécharger le package SCORM")
@@ -0,0 +1,145 @@
+# Réactivité de l'interface pendant des conversions concurrentes : N sessions
+# simulées soumettent chacune une conversion PDF lourde (analyse PyPDF2 de
+# toutes les pages pour les polices CID) à la file de jobs, pendant qu'un
+# thread "interface" mesure la latence d'une petite tâche toutes les 20 ms.
+# Compare l'exécution dans un thread du serveur (SCORM_JOB_PROCESSES=0) et le
+# pool de processus, puis vérifie le refus "serveur occupé" quand la file est pleine.
+#
+#   python benchmarks/bench_concurrency.py [--sessions 4] [--pages 3000] [--processes 2]
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scorm_core.jobs import DONE, FAILED, JobQueue, QueueFull
+from scorm_core.result_cache import ResultCache
+from scorm_core.workspace import Workspace
+
+TICK_SECONDS = 0.02
+
+
+# PDF texte dont chaque page a sa propre police Type0 : PdfReader doit
+# parcourir tout le document pour lister les CMaps
+def make_cid_pdf(path, pages):
+    offsets = {}
+    with open(path, "wb") as f:
+        def obj(num, body, stream=None):
+            offsets[num] = f.tell()
+            f.write(f"{num} 0 obj\n".encode())
+            f.write(body)
+            if stream is not None:
+                f.write(b"\nstream\n" + stream + b"\nendstream")
+            f.write(b"\nendobj\n")
+
+        f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        kids = " ".join(f"{3 + 3 * i} 0 R" for i in range(pages))
+        obj(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        obj(2, f"<< /Type /Pages /Count {pages} /MediaBox [0 0 595 842] /Kids [{kids}] >>".encode())
+        content = b"BT /F1 12 Tf 72 770 Td <0001> Tj ET"
+        for i in range(pages):
+            page, stream, font = 3 + 3 * i, 4 + 3 * i, 5 + 3 * i
+            obj(page, f"<< /Type /Page /Parent 2 0 R /Contents {stream} 0 R "
+                      f"/Resources << /Font << /F1 {font} 0 R >> >> >>".encode())
+            obj(stream, f"<< /Length {len(content)} >>".encode(), content)
+            obj(font, b"<< /Type /Font /Subtype /Type0 /BaseFont /Bench /Encoding /UniJIS-UCS2-H "
+                      b"/DescendantFonts [] >>")
+        size = 3 + 3 * pages
+        xref = f.tell()
+        f.write(f"xref\n0 {size}\n0000000000 65535 f \n".encode())
+        for num in range(1, size):
+            f.write(f"{offsets[num]:010d} 00000 n \n".encode())
+        f.write(f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+
+
+# Thread "interface" : une petite tâche Python à intervalle régulier ; la
+# latence mesurée inclut l'attente du GIL
+def ui_probe(stop, latencies):
+    while not stop.is_set():
+        started = time.perf_counter()
+        time.sleep(TICK_SECONDS)
+        sum(range(2000))
+        latencies.append(time.perf_counter() - started - TICK_SECONDS)
+
+
+def run_mode(label, processes, sessions, pdf_path, work_root):
+    workspace = Workspace(os.path.join(work_root, label))
+    queue = JobQueue(workspace=workspace, cache=ResultCache(os.path.join(work_root, f"{label}-cache")),
+                     processes=processes, max_queued=sessions)
+    spec = {"kind": "pdf", "title": "Bench", "options": {
+        "version": "2004", "min_duration": "00:05:00", "criteria": ["temps"], "profile": "lean",
+        "locales": ["fr"], "keep_all_cmaps": False}}
+
+    stop_worker, stop_probe = threading.Event(), threading.Event()
+    latencies = []
+    worker = threading.Thread(target=queue.run_worker, args=(stop_worker,))
+    probe = threading.Thread(target=ui_probe, args=(stop_probe, latencies))
+    worker.start()
+    probe.start()
+
+    # Chaque session soumet sa conversion puis suit sa progression
+    durations = []
+
+    def session(index):
+        started = time.perf_counter()
+        job_id = queue.submit(spec, {"input": pdf_path}, f"bench-{index}.zip")
+        while queue.get(job_id)["status"] not in (DONE, FAILED):
+            time.sleep(0.1)
+        durations.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    stop_probe.set()
+    probe.join()
+    stop_worker.set()
+    worker.join()
+
+    failed = queue.counts().get(FAILED, 0)
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+    print(f"{label:<22} {elapsed:7.1f} s {statistics.median(durations):8.1f} s "
+          f"{statistics.median(latencies) * 1000:9.1f} ms {p95 * 1000:8.1f} ms {latencies[-1] * 1000:8.1f} ms"
+          f"{'  ÉCHECS : ' + str(failed) if failed else ''}")
+
+
+# File pleine : les soumissions au-delà de max_queued sont refusées
+def check_admission(pdf_path, work_root, max_queued):
+    queue = JobQueue(workspace=Workspace(os.path.join(work_root, "admission")),
+                     cache=ResultCache(os.path.join(work_root, "admission-cache")), max_queued=max_queued)
+    accepted = refused = 0
+    for index in range(max_queued * 2):
+        try:
+            queue.submit({"kind": "pdf", "title": "Bench", "options": {}}, {"input": pdf_path}, f"{index}.zip")
+            accepted += 1
+        except QueueFull:
+            refused += 1
+    print(f"Admission : {accepted} jobs acceptés, {refused} refusés (serveur occupé) pour max_queued={max_queued}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de réactivité sous conversions concurrentes")
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=3000)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="scorm_concurrency_") as work_root:
+        pdf_path = os.path.join(work_root, "cid.pdf")
+        make_cid_pdf(pdf_path, args.pages)
+        print(f"{args.sessions} sessions, PDF de {args.pages} pages, {os.cpu_count()} CPU")
+        print(f"{'exécution':<22} {'total':>9} {'job méd.':>10} {'latence UI':>12} {'p95':>11} {'max':>11}")
+        run_mode("thread du serveur", 0, args.sessions, pdf_path, work_root)
+        run_mode(f"pool {args.processes} processus", args.processes, args.sessions, pdf_path, work_root)
+        check_admission(pdf_path, work_root, args.sessions)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# Taille totale de N documents livrés en N packages séparés (un viewer pdf.js
+# chacun) ou en un seul module à N SCO sur un viewer partagé
+# (scorm_core/builders/pdf_course.py). La taille du module doit suivre celle
+# des PDF, pas leur nombre.
+#
+#   python benchmarks/bench_course_size.py [--counts 1 5 10 20] [--pages 20]
+import argparse
+import os
+import sys
+import tempfile
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_search_index import make_text_pdf
+from scorm_core.builders.pdf_course import create_documents_package
+from scorm_core.builders.pdf_viewer import create_scorm_package
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Packages séparés ou module multi-documents")
+    parser.add_argument("--counts", type=int, nargs="+", default=[1, 5, 10, 20], help="Nombres de documents")
+    parser.add_argument("--pages", type=int, default=20, help="Pages par document")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="scorm_course_") as work_dir:
+        pdfs = []
+        for number in range(max(args.counts)):
+            pdfs.append(os.path.join(work_dir, f"document_{number:03d}.pdf"))
+            make_text_pdf(pdfs[-1], args.pages, "aiguille", 2)
+
+        # Partagé : tout ce qui n'est pas propre à un SCO (viewer, scorm.js, manifeste)
+        print(f"{'documents':>9} {'PDF':>9} {'séparés':>10} {'module':>10} {'partagé':>10}")
+        for count in args.counts:
+            content = sum(os.path.getsize(path) for path in pdfs[:count])
+            separate = 0
+            for number, path in enumerate(pdfs[:count]):
+                zip_path = os.path.join(work_dir, f"separe_{number:03d}.zip")
+                create_scorm_package(path, zip_path, f"Document {number + 1}", completion_criteria=["temps"])
+                separate += os.path.getsize(zip_path)
+                os.remove(zip_path)
+            zip_path = os.path.join(work_dir, "module.zip")
+            sources = [{"input": path, "title": f"Document {number + 1}", "min_duration": "00:05:00",
+                        "criteria": ["temps"]} for number, path in enumerate(pdfs[:count])]
+            create_documents_package(sources, zip_path, "Module", work_dir)
+            course = os.path.getsize(zip_path)
+            with zipfile.ZipFile(zip_path) as archive:
+                shared = sum(info.compress_size for info in archive.infolist()
+                             if not info.filename.startswith("web/documents"))
+            os.remove(zip_path)
+            print(f"{count:9d} {content / 1024 / 1024:7.1f}Mo {separate / 1024 / 1024:8.1f}Mo "
+                  f"{course / 1024 / 1024:8.1f}Mo {shared / 1024 / 1024:8.1f}Mo")
+
+
+if __name__ == "__main__":
+    main()
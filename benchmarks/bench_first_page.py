@@ -0,0 +1,165 @@
+# Temps d'affichage de la première page (pdf.js sous Node) d'un package PDF
+# servi par un serveur HTTP local bridé (latence par requête, débit par
+# connexion) qui joue le rôle du LMS. Le document et les options de pdf.js
+# sont ceux du viewer.html du package (voir first_page.js) : package
+# d'origine, puis package linéarisé (scorm_core/linearize.py) chargé par
+# plages, pour plusieurs tailles de blocs (rangeChunkSize), et enfin serveur
+# sans requêtes de plages (le PDF n'arrive qu'en flux, du début à la fin).
+#
+#   python benchmarks/bench_first_page.py [--pages 300] [--image-kb 64] [--latency-ms 40] [--mbps 16]
+#                                         [--chunks-kb 64,256,1024] [--file cours.pdf]
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_pdf_probe import make_scanned_pdf
+from scorm_core.builders.pdf_viewer import create_scorm_package
+from scorm_core.linearize import first_page_end, viewer_range_script
+
+FIRST_PAGE_JS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "first_page.js")
+BLOCK = 16 * 1024
+
+
+# Serveur des fichiers du dossier `root`, avec requêtes de plages ; `sent` :
+# octets envoyés depuis le dernier reset, `mark` : octets envoyés à
+# l'affichage de la page 1
+def start_server(latency, bytes_per_second):
+    state = {"root": None, "ranges": True, "sent": 0, "mark": None, "requests": 0, "lock": threading.Lock()}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if self.path.endswith("?mark"):
+                with state["lock"]:
+                    state["mark"] = state["sent"]
+                self.send_response(204)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            time.sleep(latency)
+            path = os.path.join(state["root"], self.path.lstrip("/"))
+            if not os.path.isfile(path):
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            size = os.path.getsize(path)
+            start, end = 0, size - 1
+            match = state["ranges"] and re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+            if match:
+                start = int(match.group(1))
+                end = min(int(match.group(2) or end), end)
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            else:
+                self.send_response(200)
+            self.send_header("Content-Type", "application/pdf")
+            self.send_header("Accept-Ranges", "bytes" if state["ranges"] else "none")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.end_headers()
+            with state["lock"]:
+                state["requests"] += 1
+            with open(path, "rb") as f:
+                f.seek(start)
+                remaining = end - start + 1
+                try:
+                    while remaining > 0:
+                        block = f.read(min(BLOCK, remaining))
+                        self.wfile.write(block)
+                        remaining -= len(block)
+                        with state["lock"]:
+                            state["sent"] += len(block)
+                        time.sleep(len(block) / bytes_per_second)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+# Package extrait dans `root` ; `viewer` : page du viewer sous web/
+def first_page(server, state, root, viewer, repeat, ranges=True):
+    state.update(root=root, ranges=ranges)
+    runs = []
+    for _ in range(repeat):
+        state.update(sent=0, mark=None, requests=0)
+        url = f"http://127.0.0.1:{server.server_port}/web/{viewer}"
+        output = subprocess.run(["node", FIRST_PAGE_JS, os.path.join(root, "web", viewer), url],
+                                capture_output=True, text=True)
+        if output.returncode:
+            sys.exit(f"{viewer} : {output.stderr.strip()}")
+        runs.append((json.loads(output.stdout)["ms"], state["mark"], state["requests"]))
+    return min(runs)
+
+
+def extract_package(source, work_dir, name, linearize):
+    zip_path = os.path.join(work_dir, f"{name}.zip")
+    create_scorm_package(source, zip_path, "Benchmark", completion_criteria=["temps"], linearize=linearize)
+    root = os.path.join(work_dir, name)
+    with zipfile.ZipFile(zip_path) as archive:
+        archive.extractall(root)
+    return root
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du temps d'affichage de la première page")
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--image-kb", type=int, default=64)
+    parser.add_argument("--latency-ms", type=float, default=40, help="Latence par requête du serveur")
+    parser.add_argument("--mbps", type=float, default=16, help="Débit par connexion (Mbit/s)")
+    parser.add_argument("--chunks-kb", default="64,256,1024", help="Tailles de blocs pdf.js testées (Ko)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--file", help="PDF à utiliser au lieu du PDF synthétique")
+    args = parser.parse_args()
+    if shutil.which("node") is None:
+        sys.exit("node requis pour exécuter pdf.js")
+
+    server, state = start_server(args.latency_ms / 1000, args.mbps * 1024 * 1024 / 8)
+    with tempfile.TemporaryDirectory(prefix="scorm_first_page_") as work_dir:
+        source = args.file
+        if source is None:
+            source = os.path.join(work_dir, "source.pdf")
+            make_scanned_pdf(source, args.pages, args.image_kb)
+        original = extract_package(source, work_dir, "origine", False)
+        started = time.perf_counter()
+        linearized = extract_package(source, work_dir, "lineaire", True)
+        size = os.path.getsize(source)
+        print(f"{size / 1024 / 1024:.1f} Mo, package linéarisé en {time.perf_counter() - started:.2f} s, "
+              f"page 1 dans les {first_page_end(os.path.join(linearized, 'web', 'document.pdf')) / 1024:.0f} "
+              f"premiers Ko ; serveur : {args.latency_ms:.0f} ms/requête, {args.mbps:g} Mbit/s")
+        print(f"{'package':<11} {'réglages':<30} {'page 1':>9} {'octets reçus':>13} {'requêtes':>9}")
+        # Tailles de blocs : viewer.html du package, script de plages régénéré
+        with open(os.path.join(linearized, "web", "viewer.html"), encoding="utf-8") as f:
+            viewer_html = f.read()
+        cases = [("origine", "viewer du package", original, "viewer.html")]
+        for chunk_kb in (int(value) for value in args.chunks_kb.split(",")):
+            viewer = f"viewer_{chunk_kb}.html"
+            with open(os.path.join(linearized, "web", viewer), "w", encoding="utf-8") as f:
+                f.write(viewer_html.replace(viewer_range_script(), viewer_range_script(chunk_kb * 1024)))
+            cases.append(("linéarisé", f"plages, blocs {chunk_kb} Ko", linearized, viewer))
+        cases += [("origine", "serveur sans plages", original, "viewer.html", False),
+                  ("linéarisé", "serveur sans plages", linearized, "viewer.html", False)]
+        for label, settings, root, viewer, *ranges in cases:
+            ms, received, requests = first_page(server, state, root, viewer, args.repeat, *ranges)
+            print(f"{label:<11} {settings:<30} {ms:>7.0f} ms {received / 1024:>10.0f} Ko {requests:>9}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# Coût de l'index des langues des sélecteurs de sous-titres (mp3/mp4) :
+# démarrage d'un processus neuf, puis coût par rerun Streamlit et par piste
+# <track>, entre l'ancien parcours de pycountry et l'index précalculé.
+#
+#   python benchmarks/bench_language_index.py [--repeat 200] [--tracks 4]
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+
+# Ce que chaque rerun de mp3_scorm.py / mp4_scorm.py faisait
+def baseline_picker():
+    import pycountry
+    languages = [(lang.alpha_2, lang.name) for lang in pycountry.languages if hasattr(lang, 'alpha_2')]
+    languages = sorted(languages, key=lambda x: x[1])
+    language_options = [f"{name} ({code})" for code, name in languages]
+    code_map = {f"{name} ({code})": code for code, name in languages}
+    return language_options, code_map
+
+
+def baseline_label(lang_code):
+    import pycountry
+    return pycountry.languages.get(alpha_2=lang_code).name if pycountry.languages.get(alpha_2=lang_code) else lang_code
+
+
+STARTUP_BASELINE = "import sys; sys.path.insert(0, 'benchmarks'); from bench_language_index import baseline_picker; baseline_picker()"
+STARTUP_INDEX = "from scorm_core.languages import language_picker; language_picker()"
+
+
+def startup(code, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, check=True)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def per_call(function, repeat):
+    function()  # premier appel (imports, chargement) exclu
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'index des langues")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--startup-repeat", type=int, default=5)
+    parser.add_argument("--tracks", type=int, default=4, help="Pistes de sous-titres par package")
+    args = parser.parse_args()
+
+    from scorm_core.languages import language_name, language_picker
+
+    codes = ["fr", "en", "de", "es", "it", "pt", "nl", "ja"][:args.tracks]
+    rows = [
+        ("démarrage (processus neuf)",
+         startup(STARTUP_BASELINE, args.startup_repeat), startup(STARTUP_INDEX, args.startup_repeat)),
+        ("rerun : sélecteur de langues",
+         per_call(baseline_picker, args.repeat), per_call(language_picker, args.repeat)),
+        (f"génération de {len(codes)} <track>",
+         per_call(lambda: [baseline_label(code) for code in codes], args.repeat),
+         per_call(lambda: [language_name(code) for code in codes], args.repeat)),
+    ]
+
+    print(f"{'étape':<30} {'pycountry':>12} {'index':>12} {'gain':>8}")
+    for label, before, after in rows:
+        print(f"{label:<30} {before * 1000:10.3f} ms {after * 1000:10.3f} ms {before / max(after, 1e-9):7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# Compare la construction d'un ZIP de scorm_base/ : chemin séquentiel historique
+# (shutil.make_archive) et PackageWriter avec 1..N threads de compression.
+#
+#   python benchmarks/bench_parallel_zip.py [--workers 1,2,4,8] [--repeat 3]
+#
+# Code de sortie 1 si les archives diffèrent selon le nombre de threads.
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scorm_core.packaging import PackageWriter, SCORM_BASE_DIR
+
+
+def best_of(repeat, build):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        path = build()
+        timings.append(time.perf_counter() - started)
+    return min(timings), os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la compression parallèle de scorm_base")
+    parser.add_argument("--workers", default=f"1,2,4,{os.cpu_count() or 1}")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--source", default=SCORM_BASE_DIR)
+    args = parser.parse_args()
+    worker_counts = sorted({int(w) for w in args.workers.split(",")})
+    failures = []
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        def make_archive():
+            return shutil.make_archive(os.path.join(tmpdir, "make_archive"), "zip", args.source)
+
+        def package_writer(workers, policy):
+            def build():
+                path = os.path.join(tmpdir, f"writer_{workers}.zip")
+                kwargs = {} if policy else {"policy": None}
+                with PackageWriter(path, workers=workers, **kwargs) as package:
+                    package.add_tree(args.source)
+                return path
+            return build
+
+        baseline, size = best_of(args.repeat, make_archive)
+        print(f"{'make_archive (séquentiel)':<40} {baseline:7.3f} s  {size / 1024 / 1024:6.2f} Mo")
+        for policy in (False, True):
+            label = "politique" if policy else "deflate fixe"
+            for workers in worker_counts:
+                elapsed, size = best_of(args.repeat, package_writer(workers, policy))
+                print(f"{f'PackageWriter {label}, {workers} thread(s)':<40} {elapsed:7.3f} s  "
+                      f"{size / 1024 / 1024:6.2f} Mo  x{baseline / elapsed:.2f}")
+
+            # Même archive, octet pour octet, quel que soit le nombre de threads
+            archives = {}
+            for workers in worker_counts:
+                with open(os.path.join(tmpdir, f"writer_{workers}.zip"), "rb") as f:
+                    archives[workers] = f.read()
+            different = [w for w in worker_counts if archives[w] != archives[worker_counts[0]]]
+            if different:
+                print(f"ÉCHEC {label} : archives différentes de {worker_counts[0]} thread(s) avec "
+                      + ", ".join(f"{w} ({len(archives[w])} octets)" for w in different)
+                      + f" ({len(archives[worker_counts[0]])} octets)")
+                failures.append(label)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+# Sonde PDF (scorm_core.pdf_probe) contre PyPDF2.PdfReader pour obtenir le
+# nombre de pages. Sans --files, génère des "manuels scannés" synthétiques :
+# une image par page, table xref classique.
+#
+#   python benchmarks/bench_pdf_probe.py [--pages 500,2000] [--image-kb 64] [--files a.pdf b.pdf]
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scorm_core.pdf_probe import probe_pdf
+
+
+def make_scanned_pdf(path, pages, image_kb):
+    image = os.urandom(image_kb * 1024)
+    offsets = {}
+    with open(path, "wb") as f:
+        def obj(num, body, stream=None):
+            offsets[num] = f.tell()
+            f.write(f"{num} 0 obj\n".encode())
+            f.write(body)
+            if stream is not None:
+                f.write(b"\nstream\n" + stream + b"\nendstream")
+            f.write(b"\nendobj\n")
+
+        f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        kids = " ".join(f"{3 + 3 * i} 0 R" for i in range(pages))
+        obj(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        obj(2, f"<< /Type /Pages /Count {pages} /MediaBox [0 0 595 842] /Kids [{kids}] >>".encode())
+        content = b"q 595 0 0 842 0 0 cm /Im0 Do Q"
+        for i in range(pages):
+            page, stream, img = 3 + 3 * i, 4 + 3 * i, 5 + 3 * i
+            obj(page, f"<< /Type /Page /Parent 2 0 R /Contents {stream} 0 R "
+                      f"/Resources << /XObject << /Im0 {img} 0 R >> >> >>".encode())
+            obj(stream, f"<< /Length {len(content)} >>".encode(), content)
+            obj(img, f"<< /Type /XObject /Subtype /Image /Width 256 /Height {len(image) // 256} "
+                     f"/ColorSpace /DeviceGray /BitsPerComponent 8 /Length {len(image)} >>".encode(), image)
+        size = 3 + 3 * pages
+        xref = f.tell()
+        f.write(f"xref\n0 {size}\n0000000000 65535 f \n".encode())
+        for num in range(1, size):
+            f.write(f"{offsets[num]:010d} 00000 n \n".encode())
+        f.write(f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+
+
+def pypdf2_count(path):
+    from PyPDF2 import PdfReader
+    return len(PdfReader(path).pages)
+
+
+def probe_count(path):
+    return probe_pdf(path, with_sizes=False).page_count
+
+
+# Meilleur temps sur `repeat` passes, puis pic mémoire Python sur une passe
+# séparée (tracemalloc ralentit fortement le code Python)
+def measure(function, path, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        count = function(path)
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    function(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count, min(timings), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la sonde PDF")
+    parser.add_argument("--pages", default="500,2000")
+    parser.add_argument("--image-kb", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--files", nargs="*", default=[])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="scorm_probe_") as work_dir:
+        files = list(args.files)
+        if not files:
+            for pages in (int(p) for p in args.pages.split(",")):
+                path = os.path.join(work_dir, f"scan-{pages}p.pdf")
+                make_scanned_pdf(path, pages, args.image_kb)
+                files.append(path)
+
+        print(f"{'fichier':<24} {'Mo':>7} {'pages':>6} {'PdfReader':>12} {'sonde':>10} {'gain':>6} "
+              f"{'mém. PdfReader':>15} {'mém. sonde':>11}")
+        for path in files:
+            count, slow, slow_peak = measure(pypdf2_count, path, args.repeat)
+            probed, fast, fast_peak = measure(probe_count, path, args.repeat)
+            if probed != count:
+                print(f"ÉCART : {path} PdfReader={count} sonde={probed}", file=sys.stderr)
+            print(f"{os.path.basename(path)[:24]:<24} {os.path.getsize(path) / 1024 / 1024:7.1f} {count:6d} "
+                  f"{slow * 1000:9.1f} ms {fast * 1000:7.1f} ms {slow / fast:5.0f}x "
+                  f"{slow_peak / 1024 / 1024:12.1f} Mo {fast_peak / 1024 / 1024:8.1f} Mo")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# Index de recherche (scorm_core/search_index.py) : coût de construction
+# (extraction du texte sur 1 processus puis sur le pool) et recherche dans
+# le viewer, par le PDFFindController de pdf.js sous Node, avec et sans index.
+# Sans --file, génère un document texte synthétique où le mot cherché
+# n'apparaît que sur quelques pages.
+#
+#   python benchmarks/bench_search_index.py [--pages 2000] [--workers 4] [--query "zéphyr bleu"] [--file cours.pdf]
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scorm_core.search_index import build_search_index, viewer_search_script
+
+FIND_TEXT_JS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "find_text.js")
+WORDS = ("formation sécurité procédure contrôle équipement opérateur réglage qualité maintenance "
+         "risque vérification consigne atelier produit étape intervention document").split()
+
+
+# PDF texte (Helvetica, WinAnsi) : 40 lignes par page, `needle` sur `hits` pages
+def make_text_pdf(path, pages, needle, hits):
+    rng = random.Random(0)
+    needle_pages = set(rng.sample(range(pages), hits))
+    offsets = {}
+    with open(path, "wb") as f:
+        def obj(num, body, stream=None):
+            offsets[num] = f.tell()
+            f.write(f"{num} 0 obj\n".encode() + body)
+            if stream is not None:
+                f.write(b"\nstream\n" + stream + b"\nendstream")
+            f.write(b"\nendobj\n")
+
+        f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(pages))
+        obj(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        obj(2, f"<< /Type /Pages /Count {pages} /MediaBox [0 0 595 842] /Kids [{kids}] >>".encode())
+        obj(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+        for i in range(pages):
+            lines = [" ".join(rng.choice(WORDS) for _ in range(9)) for _ in range(40)]
+            if i in needle_pages:
+                lines[rng.randrange(40)] += f" {needle}"
+            text = "".join(f"({line}) Tj 0 -18 Td " for line in lines)
+            content = f"BT /F1 10 Tf 40 800 Td {text}ET".encode("cp1252")
+            obj(4 + 2 * i, f"<< /Type /Page /Parent 2 0 R /Contents {5 + 2 * i} 0 R "
+                           f"/Resources << /Font << /F1 3 0 R >> >> >>".encode())
+            obj(5 + 2 * i, f"<< /Length {len(content)} >>".encode(), content)
+        size = 4 + 2 * pages
+        xref = f.tell()
+        f.write(f"xref\n0 {size}\n0000000000 65535 f \n".encode())
+        for num in range(1, size):
+            f.write(f"{offsets[num]:010d} 00000 n \n".encode())
+        f.write(f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return sorted(page + 1 for page in needle_pages)
+
+
+def find(pdf_path, query, index_path=None, script_path=None):
+    command = ["node", FIND_TEXT_JS, pdf_path, query] + ([index_path, script_path] if index_path else [])
+    return json.loads(subprocess.run(command, check=True, capture_output=True, text=True).stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'index de recherche")
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--hits", type=int, default=5, help="Pages contenant la requête")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--query", default="Zéphyr bleu")
+    parser.add_argument("--file", help="PDF à utiliser au lieu du PDF synthétique")
+    args = parser.parse_args()
+    if shutil.which("node") is None:
+        sys.exit("node requis pour exécuter pdf.js")
+
+    with tempfile.TemporaryDirectory(prefix="scorm_search_") as work_dir:
+        pdf_path = args.file
+        expected = None
+        if pdf_path is None:
+            pdf_path = os.path.join(work_dir, "document.pdf")
+            expected = make_text_pdf(pdf_path, args.pages, args.query.lower(), args.hits)
+        from PyPDF2 import PdfReader
+        page_count = len(PdfReader(pdf_path).pages)
+
+        print(f"{page_count} pages, {os.path.getsize(pdf_path) / 1024 / 1024:.1f} Mo")
+        for workers in sorted({1, args.workers}):
+            started = time.perf_counter()
+            index, indexed = build_search_index(pdf_path, page_count, workers)
+            print(f"index : {workers} processus  {time.perf_counter() - started:6.1f} s  "
+                  f"{indexed} pages avec texte, {len(index) / 1024:.0f} Ko compressé")
+        index_path = os.path.join(work_dir, "search-index.json.gz")
+        with open(index_path, "wb") as f:
+            f.write(index)
+        script_path = os.path.join(work_dir, "search.js")
+        with open(script_path, "w", encoding="utf-8") as f:
+            f.write(re.sub(r"^\s*<script>|</script>\s*$", "", viewer_search_script()))
+
+        print(f"recherche de {args.query!r} :")
+        results = {}
+        for label, extra in (("pdf.js seul", ()), ("avec index", (index_path, script_path))):
+            results[label] = result = find(pdf_path, args.query, *extra)
+            print(f"  {label:<12} 1er résultat {result['first_ms']:8.0f} ms  "
+                  f"décompte complet {result['total_ms']:8.0f} ms  "
+                  f"{result['matches']} résultats  {result['pages_read']} pages lues")
+        same = results["pdf.js seul"]["pages"] == results["avec index"]["pages"]
+        print(f"pages trouvées identiques : {'oui' if same else 'NON'} {results['avec index']['pages']}"
+              + (f" (attendu {expected})" if expected else ""))
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+# Budget de démarrage à froid de chaque page Streamlit, mesuré dans un
+# processus neuf :
+#   - import : temps des imports de tête du script (hors interface)
+#   - premier rendu : import de Streamlit + première exécution complète du
+#     script via streamlit.testing (AppTest), sans interaction
+# Vérifie aussi qu'aucune dépendance lourde n'est chargée au premier rendu.
+#
+#   python benchmarks/bench_startup.py [--import-budget 1.5] [--render-budget 4] [app.py ...]
+#
+# Code de sortie 1 si un budget est dépassé.
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = [
+    "app.py",
+    "equivalent_python.py",
+    "mp3_scorm.py",
+    "mp4_scorm.py",
+    "video_distant/app.py",
+    "word2scorm/app.py",
+    "word2scorm/conv_xliff/app.py",
+    "conv_srt_vtt/app.py",
+    "quizz_scorm/app.py",
+]
+
+# Chargées uniquement dans le chemin de code qui s'en sert
+LAZY_MODULES = ["PyPDF2", "pycountry", "reportlab", "docx2pdf", "chardet"]
+
+IMPORT_CHILD = """
+import ast, json, sys, time
+page, repo = sys.argv[1], sys.argv[2]
+sys.path[:0] = [repo, __import__("os").path.dirname(page)]
+tree = ast.parse(open(page, encoding="utf-8").read())
+head = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+started = time.perf_counter()
+exec(compile(ast.Module(head, []), page, "exec"), {"__file__": page, "__name__": "__main__"})
+print(json.dumps({"seconds": time.perf_counter() - started}))
+"""
+
+RENDER_CHILD = """
+import json, sys, time
+page, repo, lazy = sys.argv[1], sys.argv[2], sys.argv[3].split(",")
+sys.path.insert(0, repo)
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file(page, default_timeout=120)
+app.run()
+seconds = time.perf_counter() - started
+print(json.dumps({
+    "seconds": seconds,
+    "errors": [str(e.value) for e in app.exception],
+    "loaded": [name for name in lazy if name in sys.modules],
+}))
+"""
+
+
+def run_child(code, page, *args):
+    result = subprocess.run(
+        [sys.executable, "-c", code, page, REPO_DIR, *args],
+        cwd=REPO_DIR, capture_output=True, text=True,
+    )
+    if result.returncode:
+        return {"error": (result.stderr.strip().splitlines() or ["?"])[-1]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Budget de démarrage des pages Streamlit")
+    parser.add_argument("pages", nargs="*", default=ENTRY_POINTS)
+    parser.add_argument("--import-budget", type=float, default=1.5, help="Secondes")
+    parser.add_argument("--render-budget", type=float, default=4.0, help="Secondes")
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'page':<30} {'import':>9} {'1er rendu':>10}  modules lourds chargés")
+    for page in args.pages:
+        path = os.path.join(REPO_DIR, page)
+        imported = run_child(IMPORT_CHILD, path)
+        rendered = run_child(RENDER_CHILD, path, ",".join(LAZY_MODULES))
+        import_time = imported.get("seconds")
+        render_time = rendered.get("seconds")
+        loaded = rendered.get("loaded", [])
+        print(f"{page:<30} "
+              f"{f'{import_time:.2f} s' if import_time is not None else 'erreur':>9} "
+              f"{f'{render_time:.2f} s' if render_time is not None else 'erreur':>10}  "
+              f"{', '.join(loaded) or '-'}")
+
+        for label, result in (("import", imported), ("rendu", rendered)):
+            if "error" in result:
+                failures.append(f"{page} : {label} impossible ({result['error']})")
+        for error in rendered.get("errors", []):
+            failures.append(f"{page} : exception au rendu ({error})")
+        if import_time is not None and import_time > args.import_budget:
+            failures.append(f"{page} : import {import_time:.2f} s > {args.import_budget} s")
+        if render_time is not None and render_time > args.render_budget:
+            failures.append(f"{page} : premier rendu {render_time:.2f} s > {args.render_budget} s")
+        if loaded:
+            failures.append(f"{page} : dépendances chargées au démarrage ({', '.join(loaded)})")
+
+    for failure in failures:
+        print(f"ÉCHEC {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+# Contrôle de l'API HTTP (scorm_core/api.py) avec un client HTTP asynchrone :
+# upload multipart en flux d'un gros fichier, package relu par blocs, suivi
+# d'un job, mesures /metrics, erreurs, et refus "serveur occupé" quand trop
+# de transferts arrivent en même temps. Le pic de RSS du processus (serveur
+# + client) ne doit pas grossir avec la taille du fichier.
+#
+#   python benchmarks/check_api.py [--size 256] [--tolerance 64]
+#
+# Code de sortie 1 si une vérification échoue.
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import zipfile
+
+import aiohttp
+from aiohttp.test_utils import TestServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from check_memory import make_input
+from scorm_core.api import make_app
+from scorm_core.jobs import JobQueue
+from scorm_core.result_cache import ResultCache
+from scorm_core.workspace import Workspace
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def upload(session, url, path, **fields):
+    form = aiohttp.FormData()
+    for name, value in fields.items():
+        form.add_field(name, value)
+    with open(path, "rb") as f:
+        # Objet fichier : aiohttp l'envoie par blocs
+        form.add_field("input", f, filename=os.path.basename(path), content_type="application/pdf")
+        async with session.post(url, data=form) as response:
+            return response.status, response.headers.get("Retry-After"), await response.read()
+
+
+async def download_convert(session, url, path, output_path):
+    with open(path, "rb") as f:
+        form = aiohttp.FormData()
+        form.add_field("title", "Contrôle API")
+        form.add_field("version", "2004")
+        form.add_field("input", f, filename=os.path.basename(path), content_type="application/pdf")
+        async with session.post(url, data=form) as response:
+            if response.status != 200:
+                return response.status, await response.text()
+            with open(output_path, "wb") as out:
+                async for chunk in response.content.iter_chunked(1024 * 1024):
+                    out.write(chunk)
+            return response.status, response.headers.get("Content-Disposition")
+
+
+async def run_checks(args, work_root, queue):
+    failures = []
+
+    def check(condition, label):
+        print(f"{'ok    ' if condition else 'ÉCHEC '} {label}")
+        if not condition:
+            failures.append(label)
+
+    big = os.path.join(work_root, "gros.pdf")
+    small = os.path.join(work_root, "petit.pdf")
+    make_input(big, args.size * 1024 * 1024)
+    make_input(small, 1024 * 1024)
+
+    async with TestServer(make_app(queue, max_uploads=1)) as server, aiohttp.ClientSession() as session:
+        # Échauffement sur un petit fichier, puis pic de RSS sur le gros
+        await download_convert(session, server.make_url("/convert/pdf_embed"), small,
+                               os.path.join(work_root, "petit.zip"))
+        before = peak_rss_mb()
+        output = os.path.join(work_root, "gros.zip")
+        status, disposition = await download_convert(session, server.make_url("/convert/pdf_embed"), big, output)
+        growth = peak_rss_mb() - before
+        check(status == 200, f"POST /convert/pdf_embed ({args.size} Mo) : {status} {disposition}")
+        with zipfile.ZipFile(output) as archive:
+            check("gros.pdf" in archive.namelist() and archive.testzip() is None, "package complet et valide")
+        check(growth < args.tolerance,
+              f"pic de RSS +{growth:.1f} Mo pour {args.size} Mo envoyés et reçus (tolérance {args.tolerance} Mo)")
+
+        # Job asynchrone : 202, suivi, puis téléchargement
+        status, _, body = await upload(session, server.make_url("/jobs/pdf_embed"), small, title="Job")
+        job = json.loads(body)
+        check(status == 202, f"POST /jobs/pdf_embed : {status} {job.get('status')}")
+        while job["status"] not in ("done", "failed"):
+            await asyncio.sleep(0.2)
+            async with session.get(server.make_url(f"/jobs/{job['id']}")) as response:
+                job = await response.json()
+        async with session.get(server.make_url(f"/jobs/{job['id']}/package")) as response:
+            check(response.status == 200 and response.content_type == "application/zip",
+                  f"GET /jobs/<id>/package : {response.status} ({job['status']}, {job['message']})")
+
+        # Mesures Prometheus des conversions précédentes
+        async with session.get(server.make_url("/metrics")) as response:
+            text = await response.text()
+            check(response.status == 200 and 'scorm_conversion_seconds_count{kind="pdf_embed",status="done"}' in text
+                  and 'scorm_stage_bytes_total{kind="hors_conversion",stage="upload"}' in text,
+                  f"GET /metrics : {response.status}, {len(text.splitlines())} lignes")
+
+        # Erreurs
+        async with session.post(server.make_url("/convert/inconnu"), data={"title": "x"}) as response:
+            check(response.status == 404, f"type inconnu : {response.status}")
+        form = aiohttp.FormData({"title": "x"}, default_to_multipart=True)
+        async with session.post(server.make_url("/convert/remote_video"), data=form) as response:
+            check(response.status == 400, f"remote_video sans url : {response.status} {await response.text()}")
+
+        # Un seul transfert accepté à la fois (max_uploads=1) : les autres sont refusés
+        results = await asyncio.gather(*(
+            upload(session, server.make_url("/jobs/pdf_embed"), big, title=f"Concurrent {i}") for i in range(3)
+        ))
+        statuses = sorted(status for status, _, _ in results)
+        check(statuses.count(202) >= 1 and statuses.count(503) >= 1
+              and all(retry for status, retry, _ in results if status == 503),
+              f"transferts simultanés : {statuses} (503 avec Retry-After)")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Contrôle de l'API HTTP de conversion")
+    parser.add_argument("--size", type=int, default=256, help="Taille du gros fichier (Mo)")
+    parser.add_argument("--tolerance", type=int, default=64, help="Croissance de RSS tolérée (Mo)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="scorm_api_") as work_root:
+        workspace = Workspace(os.path.join(work_root, "workspace"))
+        queue = JobQueue(workspace=workspace, cache=ResultCache(os.path.join(work_root, "cache")))
+        stop = threading.Event()
+        worker = threading.Thread(target=queue.run_worker, args=(stop,))
+        worker.start()
+        try:
+            failures = asyncio.run(run_checks(args, work_root, queue))
+        finally:
+            stop.set()
+            worker.join()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
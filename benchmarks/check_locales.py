@@ -0,0 +1,74 @@
+# Contrôle des traductions du viewer dans les packages PDF : depuis chaque
+# page du viewer (web/viewer.html, pages de lancement des SCO), le lien
+# <link rel="resource" type="application/l10n"> doit mener à l'index livré,
+# et chaque langue choisie à son viewer.properties, comme pdf.js les résout
+# (chemins relatifs à la page, puis à l'index).
+#
+#   python benchmarks/check_locales.py [--locales de,fr]
+#
+# Code de sortie 1 si une vérification échoue.
+import argparse
+import os
+import posixpath
+import re
+import sys
+import tempfile
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_search_index import make_text_pdf
+from scorm_core.builders.pdf_course import create_documents_package
+from scorm_core.builders.pdf_viewer import create_scorm_package
+from scorm_core.locales import resolve_locales
+
+LINK = re.compile(r'<link rel="resource" type="application/l10n" href="([^"]+)"')
+IMPORT = re.compile(r"^\[([^\]]+)\]\s*\n@import url\(([^)]+)\)", re.M)
+
+
+# Langues résolues depuis `page` dans l'archive : {code: chemin livré ou None}
+def resolved_locales(archive, page):
+    names = set(archive.namelist())
+    match = LINK.search(archive.read(page).decode("utf-8"))
+    if not match:
+        return None, {}
+    index = posixpath.normpath(posixpath.join(posixpath.dirname(page), match.group(1)))
+    if index not in names:
+        return index, {}
+    found = {}
+    for code, url in IMPORT.findall(archive.read(index).decode("utf-8")):
+        path = posixpath.normpath(posixpath.join(posixpath.dirname(index), url))
+        found[code] = path if path in names else None
+    return index, found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Contrôle des traductions du viewer PDF")
+    parser.add_argument("--locales", default="de,fr", help="Langues choisies")
+    args = parser.parse_args()
+    locales = [code for code in args.locales.split(",") if code]
+
+    failures = []
+    with tempfile.TemporaryDirectory(prefix="scorm_locales_") as work_dir:
+        pdf = os.path.join(work_dir, "document.pdf")
+        make_text_pdf(pdf, 2, "aiguille", 1)
+        single = os.path.join(work_dir, "viewer.zip")
+        create_scorm_package(pdf, single, "Contrôle", viewer_locales=locales)
+        course = os.path.join(work_dir, "module.zip")
+        create_documents_package([{"input": pdf, "title": "Document", "min_duration": "00:01:00",
+                                   "criteria": ["temps"]}], course, "Contrôle", work_dir, viewer_locales=locales)
+
+        for zip_path, page in [(single, "web/viewer.html"), (course, "web/documents_01.html")]:
+            with zipfile.ZipFile(zip_path) as archive:
+                index, found = resolved_locales(archive, page)
+            expected = set(resolve_locales(locales))
+            ok = set(found) == expected and all(found.values())
+            print(f"{'ok    ' if ok else 'ÉCHEC '} {os.path.basename(zip_path)} {page} -> {index} : "
+                  + ", ".join(f"{code}={path or 'absent'}" for code, path in sorted(found.items()))
+                  + ("" if found else "index introuvable"))
+            if not ok:
+                failures.append(page)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+# Contrôle de non-régression mémoire : le pic de RSS d'une conversion
+# (upload écrit sur disque, construction du package, publication puis
+# téléchargement complet par le serveur de téléchargement) doit rester à peu
+# près constant quelle que soit la taille de l'entrée. Chaque taille est
+# mesurée dans un processus neuf ; le téléchargement doit livrer le package
+# entier, y compris au-delà de 200 Mo.
+#
+#   python benchmarks/check_memory.py [--sizes 16,512] [--tolerance 32]
+#
+# Code de sortie 1 si le pic grossit de plus de --tolerance Mo entre la plus
+# petite et la plus grande entrée.
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import urllib.request
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+
+def make_input(path, size):
+    # Moitié aléatoire (stockée telle quelle), moitié compressible
+    block = os.urandom(512 * 1024) + b"BT /F1 12 Tf (texte) Tj ET\n" * 19000
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        written = 0
+        while written < size:
+            f.write(block)
+            written += len(block)
+
+
+# Exécuté dans le processus fils : une conversion complète et son
+# téléchargement, puis le pic de RSS en Ko
+def convert(input_path, work_dir):
+    from scorm_core.builders.pdf_embed import create_scorm_package
+    from scorm_core.downloads import publish
+    from scorm_core.packaging import CHUNK_SIZE
+    from scorm_core.result_cache import write_and_hash
+
+    staged = os.path.join(work_dir, "upload.pdf")
+    with open(input_path, "rb") as upload:
+        write_and_hash(upload, staged)
+    zip_path = os.path.join(work_dir, "package.zip")
+    create_scorm_package(staged, "document.pdf", zip_path, "Contrôle mémoire", "2004")
+    url, _ = publish(zip_path, "package.zip", "http://127.0.0.1:8501/")
+    received = 0
+    with urllib.request.urlopen(url) as response:
+        for chunk in iter(lambda: response.read(CHUNK_SIZE), b""):
+            received += len(chunk)
+    if received != os.path.getsize(zip_path):
+        sys.exit(f"téléchargement incomplet : {received} octets sur {os.path.getsize(zip_path)}")
+    print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def measure(size_mb, work_dir):
+    input_path = os.path.join(work_dir, f"input-{size_mb}.pdf")
+    make_input(input_path, size_mb * 1024 * 1024)
+    run_dir = tempfile.mkdtemp(dir=work_dir)
+    code = ("import sys; sys.path.insert(0, sys.argv[1]); sys.path.insert(0, sys.argv[2]); "
+            "from check_memory import convert; convert(sys.argv[3], sys.argv[4])")
+    output = subprocess.run(
+        [sys.executable, "-c", code, REPO_DIR, os.path.join(REPO_DIR, "benchmarks"), input_path, run_dir],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    os.remove(input_path)
+    return int(output.split()[-1]) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Contrôle du pic mémoire d'une conversion")
+    parser.add_argument("--sizes", default="16,512", help="Tailles d'entrée en Mo")
+    parser.add_argument("--tolerance", type=float, default=32, help="Croissance maximale du pic (Mo)")
+    args = parser.parse_args()
+
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    with tempfile.TemporaryDirectory(prefix="scorm_memory_") as work_dir:
+        peaks = {size: measure(size, work_dir) for size in sizes}
+
+    for size, peak in peaks.items():
+        print(f"entrée {size:6d} Mo : pic RSS {peak:7.1f} Mo")
+    growth = peaks[sizes[-1]] - peaks[sizes[0]]
+    print(f"croissance du pic : {growth:.1f} Mo (tolérance {args.tolerance:.0f} Mo)")
+    if growth > args.tolerance:
+        print("ÉCHEC : la mémoire dépend de la taille de l'entrée", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+# Contrôle de l'optimisation à taille visée (scorm_core/pdf_optimize.py) : une
+# taille impossible à atteindre doit arrêter la boucle aux planchers
+# (MIN_QUALITY, MIN_DPI), y compris quand la qualité ou la résolution de
+# départ sont déjà en dessous, sans jamais relever un réglage.
+#
+#   python benchmarks/check_optimize.py [--max-passes 20]
+#
+# Code de sortie 1 si une vérification échoue.
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_pdf_probe import make_scanned_pdf
+from scorm_core import pdf_optimize
+
+
+class TooManyPasses(Exception):
+    pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Contrôle de l'optimisation à taille visée")
+    parser.add_argument("--max-passes", type=int, default=20, help="Passes tolérées avant d'abandonner")
+    args = parser.parse_args()
+
+    passes = []
+    optimize_once = pdf_optimize._optimize_once
+
+    def counted(src_path, dst_path, dpi, quality):
+        passes.append((dpi, quality))
+        if len(passes) > args.max_passes:
+            raise TooManyPasses(f"{len(passes)} passes, dernière à {dpi} dpi, qualité {quality}")
+        return optimize_once(src_path, dst_path, dpi, quality)
+
+    pdf_optimize._optimize_once = counted
+    failures = []
+    with tempfile.TemporaryDirectory(prefix="scorm_optimize_") as work_dir:
+        source = os.path.join(work_dir, "source.pdf")
+        make_scanned_pdf(source, 4, 64)
+        # (dpi, qualité) de départ, taille visée inaccessible (1 Ko)
+        for dpi, quality in [(150, 75), (150, 30), (50, 75), (50, 30)]:
+            passes.clear()
+            try:
+                stats = pdf_optimize.optimize_pdf(source, os.path.join(work_dir, "out.pdf"), dpi, quality, 0.001)
+                ok = (stats["dpi"] <= max(dpi, pdf_optimize.MIN_DPI) and stats["quality"] <= quality
+                      and all(d <= dpi and q <= quality for d, q in passes))
+                label = f"arrêt après {len(passes)} passes à {stats['dpi']} dpi, qualité {stats['quality']}"
+            except TooManyPasses as e:
+                ok, label = False, str(e)
+            print(f"{'ok    ' if ok else 'ÉCHEC '} départ {dpi} dpi, qualité {quality} : {label}")
+            if not ok:
+                failures.append((dpi, quality))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+// Recherche pdf.js (PDFFindController de viewer.js, sans navigateur) dans un
+// PDF local, avec ou sans l'index de scorm_core/search_index.py ; appelé par
+// bench_search_index.py :
+//
+//   node benchmarks/find_text.js <pdf> <requête> [<index .json.gz> <script de recherche .js>]
+//
+// Affiche en JSON le temps jusqu'au premier résultat, le temps jusqu'au
+// décompte complet, le nombre de résultats et de pages dont le texte a été lu.
+const fs = require("fs");
+const path = require("path");
+const vm = require("vm");
+
+const root = path.join(__dirname, "..", "scorm_base");
+const pdfjs = require(path.join(root, "build", "pdf.js"));
+globalThis.window = { "pdfjs-dist/build/pdf": pdfjs, requestAnimationFrame: (callback) => setTimeout(callback, 0) };
+
+// Modules de viewer.js chargés sans démarrer l'application
+const viewerSource = fs.readFileSync(path.join(root, "web", "viewer.js"), "utf8")
+  .replace("/******/ \t__webpack_require__(0);", "/******/ \tglobalThis.__viewerRequire = __webpack_require__;");
+vm.runInThisContext(viewerSource);
+const { PDFFindController, FindState } = globalThis.__viewerRequire(17);
+
+class EventBus {
+  constructor() {
+    this.listeners = {};
+  }
+  on(name, listener) {
+    (this.listeners[name] = this.listeners[name] || []).push(listener);
+  }
+  _on(name, listener) {
+    this.on(name, listener);
+  }
+  dispatch(name, data) {
+    (this.listeners[name] || []).forEach((listener) => listener(data));
+  }
+}
+
+(async () => {
+  const [pdfPath, query, indexPath, scriptPath] = process.argv.slice(2);
+  const pdf = await pdfjs.getDocument({ data: new Uint8Array(fs.readFileSync(pdfPath)) }).promise;
+  let pagesRead = 0;
+  const getPage = pdf.getPage.bind(pdf);
+  pdf.getPage = (number) => getPage(number).then((page) => {
+    const getTextContent = page.getTextContent.bind(page);
+    page.getTextContent = (options) => {
+      pagesRead++;
+      return getTextContent(options);
+    };
+    return page;
+  });
+
+  const eventBus = new EventBus();
+  const linkService = { pagesCount: pdf.numPages, page: 1 };
+  const finder = new PDFFindController({ linkService, eventBus });
+  if (indexPath) {
+    globalThis.fetch = async () => new Response(fs.readFileSync(indexPath));
+    window.PDFViewerApplication = { initializedPromise: Promise.resolve(), findController: finder };
+    vm.runInThisContext(fs.readFileSync(scriptPath, "utf8"));
+    await new Promise((resolve) => setTimeout(resolve, 0));
+  }
+  finder.setDocument(pdf);
+
+  const started = process.hrtime.bigint();
+  const elapsed = () => Number(process.hrtime.bigint() - started) / 1e6;
+  let firstMatch = null;
+  eventBus.on("updatefindcontrolstate", (event) => {
+    if (firstMatch === null && event.state !== FindState.PENDING) {
+      firstMatch = elapsed();
+    }
+  });
+  finder.executeCommand("find", {
+    query, phraseSearch: true, caseSensitive: false, entireWord: false, highlightAll: true, findPrevious: false,
+  });
+  // Décompte complet : toutes les pages ont leurs résultats
+  while (finder.pageMatches.filter((matches) => matches !== undefined).length < pdf.numPages) {
+    await new Promise((resolve) => setTimeout(resolve, 5));
+  }
+  const matches = finder.pageMatches.reduce((total, pageMatches) => total + pageMatches.length, 0);
+  const pages = finder.pageMatches.map((m, i) => (m.length ? i + 1 : 0)).filter(Boolean);
+  const result = { first_ms: firstMatch, total_ms: elapsed(), matches, pages, pages_read: pagesRead };
+  process.stdout.write(JSON.stringify(result) + "\n");
+  process.exit(0);
+})().catch((error) => {
+  process.stderr.write(String(error && error.stack || error) + "\n");
+  process.exit(1);
+});
@@ -0,0 +1,65 @@
+// Temps d'affichage de la première page avec pdf.js (Node), appelé par
+// bench_first_page.py :
+//
+//   node benchmarks/first_page.js <viewer.html du package> <url de ce viewer.html>
+//
+// Les scripts insérés dans viewer.html (document par défaut, chargement par
+// plages) sont exécutés contre des AppOptions et un PDFViewerApplication.open
+// simulés : le document et les options transmis à getDocument sont ceux que
+// le viewer du package utiliserait. Après le rendu des opérations de la
+// page 1, appelle <url du PDF>?mark pour que le serveur relève les octets
+// envoyés à cet instant.
+const fs = require("fs");
+const http = require("http");
+const path = require("path");
+const vm = require("vm");
+const pdfjs = require(path.join(__dirname, "..", "scorm_base", "build", "pdf.js"));
+
+const [viewerPath, viewerUrl] = process.argv.slice(2);
+const started = process.hrtime.bigint();
+
+// Options de viewer.js transmises à getDocument, avec leurs valeurs par défaut
+const API_OPTIONS = { disableAutoFetch: false, disableRange: false, disableStream: false };
+
+function viewerRequest() {
+  const html = fs.readFileSync(viewerPath, "utf8");
+  const appOptions = {};
+  let opened = null;
+  const context = vm.createContext({
+    Object,
+    PDFViewerApplicationOptions: { set: (name, value) => { appOptions[name] = value; } },
+    PDFViewerApplication: { open: (file, args) => { opened = { file, args: args || {} }; } },
+  });
+  context.window = context;
+  for (const [, code] of html.matchAll(/<script>([\s\S]*?)<\/script>/g)) {
+    vm.runInContext(code, context);
+  }
+  if (!appOptions.defaultUrl) {
+    throw new Error("viewer.html ne désigne aucun document (defaultUrl)");
+  }
+  // Comme viewer.js au lancement : open(defaultUrl) avec les options de l'API
+  context.PDFViewerApplication.open(new URL(appOptions.defaultUrl, viewerUrl).href);
+  const params = { url: opened.file };
+  for (const name of Object.keys(API_OPTIONS)) {
+    params[name] = name in appOptions ? appOptions[name] : API_OPTIONS[name];
+  }
+  return Object.assign(params, opened.args);
+}
+
+(async () => {
+  const params = viewerRequest();
+  const pdf = await pdfjs.getDocument(params).promise;
+  const page = await pdf.getPage(1);
+  await page.getOperatorList();
+  const ms = Number(process.hrtime.bigint() - started) / 1e6;
+  http.get(params.url + "?mark", (response) => {
+    response.resume();
+    response.on("end", () => {
+      process.stdout.write(JSON.stringify({ ms, pages: pdf.numPages, url: params.url }) + "\n");
+      process.exit(0);
+    });
+  });
+})().catch((error) => {
+  process.stderr.write(String(error) + "\n");
+  process.exit(1);
+});
@@ -1,323 +1,10 @@
 import streamlit as st
 import os
-import zipfile
-import shutil
-import uuid
-import pycountry
-
-# Fonction pour convertir un fichier .srt en .vtt
-def srt_to_vtt(srt_path, vtt_path):
-    with open(srt_path, 'r', encoding='utf-8') as srt_file:
-        lines = srt_file.readlines()
-
-    with open(vtt_path, 'w', encoding='utf-8') as vtt_file:
-        vtt_file.write("WEBVTT\n\n")  # entête obligatoire VTT
-
-        for line in lines:
-            if '-->' in line:
-                line = line.replace(',', '.')
-            vtt_file.write(line)
-
-# Fonction pour générer le fichier manifest selon la version SCORM
-def create_scorm_manifest(version, title, mp3_filename, subtitle_filenames):
-    subtitle_entries = "".join([f'\n      <file href="{fn}"/>' for fn in subtitle_filenames]) if subtitle_filenames else ""
-
-    if version == "1.2":
-        return f'''<?xml version="1.0" encoding="UTF-8"?>
-<manifest identifier="com.example.scorm" version="1.2"
-  xmlns="http://www.imsproject.org/xsd/imscp_rootv1p1p2"
-  xmlns:adlcp="http://www.adlnet.org/xsd/adlcp_rootv1p2"
-  xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
-  xsi:schemaLocation="http://www.imsproject.org/xsd/imscp_rootv1p1p2
-                      imscp_rootv1p1p2.xsd
-                      http://www.adlnet.org/xsd/adlcp_rootv1p2
-                      adlcp_rootv1p2.xsd">
-  <metadata>
-    <schema>ADL SCORM</schema>
-    <schemaversion>1.2</schemaversion>
-  </metadata>
-  <organizations default="ORG1">
-    <organization identifier="ORG1">
-      <title>{title}</title>
-      <item identifier="ITEM1" identifierref="RES1">
-        <title>{title}</title>
-      </item>
-    </organization>
-  </organizations>
-  <resources>
-    <resource identifier="RES1" type="webcontent" adlcp:scormtype="sco" href="index.html">
-      <file href="index.html"/>
-      <file href="{mp3_filename}"/>{subtitle_entries}
-      <file href="scorm_functions.js"/>
-    </resource>
-  </resources>
-</manifest>'''
-    else:
-        return f'''<?xml version="1.0" encoding="UTF-8"?>
-<manifest identifier="com.example.scorm2004" version="1.0"
-  xmlns="http://www.imsglobal.org/xsd/imscp_v1p1"
-  xmlns:adlcp="http://www.adlnet.org/xsd/adlcp_v1p3"
-  xmlns:imsss="http://www.imsglobal.org/xsd/imsss"
-  xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
-  xsi:schemaLocation="http://www.imsglobal.org/xsd/imscp_v1p1
-                      imscp_v1p1.xsd
-                      http://www.adlnet.org/xsd/adlcp_v1p3
-                      adlcp_v1p3.xsd
-                      http://www.imsglobal.org/xsd/imsss
-                      imsss_v1p0.xsd">
-  <metadata>
-    <schema>ADL SCORM</schema>
-    <schemaversion>2004 3rd Edition</schemaversion>
-  </metadata>
-  <organizations default="ORG1">
-    <organization identifier="ORG1">
-      <title>{title}</title>
-      <item identifier="ITEM1" identifierref="RES1" isvisible="true">
-        <title>{title}</title>
-      </item>
-    </organization>
-  </organizations>
-  <resources>
-    <resource identifier="RES1" type="webcontent" adlcp:scormType="sco" href="index.html">
-      <file href="index.html"/>
-      <file href="{mp3_filename}"/>{subtitle_entries}
-    </resource>
-  </resources>
-</manifest>'''
-
-# Fonction principale de création du package SCORM
-def create_scorm_package(mp3_path, subtitle_paths, output_dir, version, scorm_title="Mon Cours Audio SCORM", completion_rate=80):
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-
-    mp3_filename = os.path.basename(mp3_path)
-    shutil.copy(mp3_path, os.path.join(output_dir, mp3_filename))
-    shutil.copy("scorm_functions.js", os.path.join(output_dir, "scorm_functions.js"))
-
-
-
-    subtitle_filenames = []
-    if subtitle_paths:
-        for path in subtitle_paths:
-            filename = os.path.basename(path)
-            subtitle_filenames.append(filename)
-            shutil.copy(path, os.path.join(output_dir, filename))
-
-    track_elements = "\n    ".join([
-        f'<track src="{fn}" kind="subtitles" srclang="{os.path.splitext(fn)[0].split("_")[-1]}" label="{os.path.splitext(fn)[0].split("_")[-1].capitalize()}" />' 
-        for fn in subtitle_filenames
-    ])
-
-    html_content = f'''<!DOCTYPE html>
-<html lang="fr">
-<head>
-  <meta charset="UTF-8" />
-  <title>{scorm_title}</title>
-  <link rel="stylesheet" href="https://cdn.plyr.io/3.7.8/plyr.css" />
-  <script src="scorm_functions.js"></script>
-  <style>
-  body {{
-    font-family: Arial, sans-serif;
-    background-color: #222;
-    color: #eee;
-    padding: 20px;
-    text-align: center;
-  }}
-  #completion-info {{
-  display: none;
-  }}
-
-  
-  .player-container {{
-  position: relative;
-  width: 80%;
-  max-width: 600px;
-  margin: 0 auto;
-  z-index: 0; /* Base pour enfant */
-  }}
-
-  video, .plyr {{
-    width: 100%;
-  }}
-
-  canvas {{
-  position: absolute;
-  top: 0; left: 0;
-  width: 100% !important;
-  height: 100% !important;
-  pointer-events: none;
-  z-index: 0;
-  mix-blend-mode: screen;
-}}
-
-/* Conteneur des sous-titres (fond noir) */
-.plyr__captions {{
-  position: absolute;
-  bottom: 10%;
-  width: 100%;
-  z-index: 10; /* au-dessus du canvas */
-  background-color: rgba(0, 0, 0, 0.7); /* fond noir semi-transparent */
-  padding: 5px 10px;
-  border-radius: 5px;
-  text-align: center;
-}}
-
-/* Chaque sous-titre (texte) */
-.plyr__caption {{
-  color: white;
-  background: transparent; /* Pas de fond ici */
-  font-size: 1.2em;
-  line-height: 1.4;
-  white-space: pre-wrap;
-  display: inline-block;
-}}
-
-
-  #completion-message {{
-    margin-top: 20px;
-    font-weight: bold;
-    color: #4caf50;
-    display: none;
-  }}
-  </style>
-</head>
-<body>
-  <h1>{scorm_title}</h1>
-  <p id="completion-info">Taux de complétion requis pour valider : <strong>{completion_rate}%</strong></p>
-  <p id="completion-message">Vous avez atteint le seuil de complétion requis 🎉</p>
-
-  <div class="player-container">
-    <audio id="player" controls crossorigin>
-      <source src="{mp3_filename}" type="mp3" />
-      {track_elements}
-      Your browser does not support the audio element.
-    </audio>
-    <canvas id="canvas"></canvas>
-  </div>
-
-
-  <script src="https://cdn.plyr.io/3.7.8/plyr.polyfilled.js"></script>
-  <script>
-    const completionRate = {completion_rate};
-    const audio = document.getElementById('player');
-    const completionMessage = document.getElementById('completion-message');
-    let completed = false;
-    let maxPlayed = 0;
-
-    function findAPI(win) {{
-      let attempts = 0;
-      while (win && !win.API && !win.API_1484_11 && win.parent && win !== win.parent && attempts++ < 10) {{
-        win = win.parent;
-      }}
-      return win.API_1484_11 || win.API || null;
-    }}
-
-    function setScormCompleted() {{
-      const api = findAPI(window);
-      if (!api) {{
-        console.warn("SCORM API non trouvée.");
-        return;
-      }}
-
-      try {{
-        if (api.SetValue) {{
-          api.SetValue("cmi.completion_status", "completed");
-          api.Commit("");
-        }} else if (api.LMSSetValue) {{
-          api.LMSSetValue("cmi.core.lesson_status", "completed");
-          api.LMSCommit("");
-        }}
-      }} catch (e) {{
-        console.error("Erreur SCORM:", e);
-      }}
-    }}
-
-    audio.addEventListener('timeupdate', () => {{
-      if (!audio.duration) return;
-
-      if (audio.currentTime > maxPlayed + 0.75) {{
-        audio.currentTime = maxPlayed;
-      }} else {{
-        maxPlayed = Math.max(maxPlayed, audio.currentTime);
-      }}
-
-      const playedPercent = (audio.currentTime / audio.duration) * 100;
-      if (!completed && playedPercent >= completionRate) {{
-        completed = true;
-        document.getElementById('completion-info').style.display = 'block';
-        completionMessage.style.display = 'block';
-        setScormCompleted();
-      }}
-    }});
-
-    const plyrPlayer = new Plyr('#player', {{
-      captions: {{ active: true, update: true, language: 'auto' }},
-    }});
-
-    const canvas = document.getElementById('canvas');
-    const ctx = canvas.getContext('2d');
-    canvas.width = canvas.clientWidth * window.devicePixelRatio;
-    canvas.height = canvas.clientHeight * window.devicePixelRatio;
-    ctx.scale(window.devicePixelRatio, window.devicePixelRatio);
-
-    let audioContext;
-    let analyser;
-    let source;
-
-    function setupAudio() {{
-      audioContext = new (window.AudioContext || window.webkitAudioContext)();
-      source = audioContext.createMediaElementSource(audio);
-      analyser = audioContext.createAnalyser();
-      analyser.fftSize = 256;
-      source.connect(analyser);
-      analyser.connect(audioContext.destination);
-    }}
-
-    function draw() {{
-  requestAnimationFrame(draw);
-  const bufferLength = analyser.frequencyBinCount;
-  const dataArray = new Uint8Array(bufferLength);
-  analyser.getByteFrequencyData(dataArray);
-
-  // Fond noir opaque
-  ctx.fillStyle = 'rgba(0, 0, 0, 0.8)';
-  ctx.fillRect(0, 0, canvas.width, canvas.height);
-
-  const barWidth = canvas.width / bufferLength;
-  let x = 0;
-
-  for (let i = 0; i < bufferLength; i++) {{
-    const barHeight = dataArray[i] / 255 * canvas.height;
-    // Couleurs plus sombres, moins saturées, pour pas gêner les sous-titres
-    const red = 50;
-    const green = 100 * (i / bufferLength);
-    const blue = barHeight / 2;
-    ctx.fillStyle = `rgba(${{red}},${{green}},${{blue}}, 0.6)`;  // avec transparence
-    ctx.fillRect(x, canvas.height - barHeight, barWidth, barHeight);
-    x += barWidth + 1;
-  }}
-}}
-
-
-    audio.addEventListener('play', () => {{
-      if (!audioContext) {{
-        setupAudio();
-        draw();
-      }}
-      if (audioContext.state === 'suspended') {{
-        audioContext.resume();
-      }}
-    }});
-  </script>
-</body>
-</html>'''
-
-    with open(os.path.join(output_dir, 'index.html'), 'w', encoding='utf-8') as f:
-        f.write(html_content)
-
-    manifest_xml = create_scorm_manifest(version, scorm_title, mp3_filename, [os.path.basename(p) for p in subtitle_paths])
-    with open(os.path.join(output_dir, 'imsmanifest.xml'), 'w', encoding='utf-8') as f:
-        f.write(manifest_xml)
+from scorm_core.job_view import current_job, show_job, submit_job
+from scorm_core.languages import language_picker
+from scorm_core.result_cache import cache_key
+from scorm_core.staging import session_staging
+from scorm_core.subtitles import srt_to_vtt
 
 # Interface utilisateur Streamlit
 st.title("Convertisseur MP3 → SCORM avec Spectre Audio et Sous-titres")
@@ -325,10 +12,8 @@ st.title("Convertisseur MP3 → SCORM avec Spectre Audio et Sous-titres")
 uploaded_file = st.file_uploader("Choisissez un fichier MP3", type=["mp3"])
 add_subtitles = st.checkbox("Ajouter des sous-titres")
 
-languages = [(lang.alpha_2, lang.name) for lang in pycountry.languages if hasattr(lang, 'alpha_2')]
-languages = sorted(languages, key=lambda x: x[1])
-language_options = [f"{name} ({code})" for code, name in languages]
-code_map = {f"{name} ({code})": code for code, name in languages}
+# Index des langues construit une seule fois par processus
+language_options, code_map = language_picker()
 
 selected_languages = []
 subtitle_files_dict = {}
@@ -357,38 +42,28 @@ scorm_2004 = st.checkbox("SCORM 2004")
 
 scorm_title = st.text_input("Titre du package SCORM :", value=uploaded_file.name.rsplit(".", 1)[0] if uploaded_file else "Mon Cours Audio SCORM")
 
-if uploaded_file:
-    temp_dir = f"temp_scorm_{uuid.uuid4()}"
-    os.makedirs(temp_dir, exist_ok=True)
-    output_dir = f"scorm_output_{uuid.uuid4()}"
-
-
+# Les uploads sont écrits une seule fois par session, pas à chaque rerun
+staging = session_staging(st.session_state)
 
-    mp3_path = os.path.join(temp_dir, uploaded_file.name)
-    with open(mp3_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
+if uploaded_file:
+    mp3_path, mp3_hash = staging.stage("audio", uploaded_file)
 
     subtitle_paths = []
+    subtitle_hashes = []
     for lang_code, file in subtitle_files_dict.items():
         ext = os.path.splitext(file.name)[1].lower()
+        path, subtitle_hash = staging.stage(f"sub_{lang_code}", file, f"sub_{lang_code}{ext}")
+        subtitle_hashes.append([lang_code, ext, subtitle_hash])
         if ext == '.srt':
-            # Sauvegarder le srt
-            srt_filename = f"sub_{lang_code}.srt"
-            srt_path = os.path.join(temp_dir, srt_filename)
-            with open(srt_path, "wb") as f:
-                f.write(file.getbuffer())
-            # Convertir en vtt
-            vtt_filename = f"sub_{lang_code}.vtt"
-            vtt_path = os.path.join(temp_dir, vtt_filename)
-            srt_to_vtt(srt_path, vtt_path)
+            # Convertir en vtt (une seule fois par upload)
+            vtt_path = os.path.join(os.path.dirname(path), f"sub_{lang_code}.vtt")
+            if not os.path.exists(vtt_path):
+                srt_to_vtt(path, vtt_path)
             subtitle_paths.append(vtt_path)  # On utilise le .vtt converti
         else:
-            # Pas besoin de conversion, on copie directement
-            filename = f"sub_{lang_code}{ext}"
-            path = os.path.join(temp_dir, filename)
-            with open(path, "wb") as f:
-                f.write(file.getbuffer())
+            # Pas besoin de conversion, on utilise directement le fichier
             subtitle_paths.append(path)
+    staging.keep_only({"audio"} | {f"sub_{lang_code}" for lang_code in subtitle_files_dict})
     completion_rate = st.slider(
         "Taux de complétion requis (%) pour valider l'audio :",
         min_value=10,
@@ -403,11 +78,23 @@ if uploaded_file:
             st.error("Veuillez sélectionner au moins une version SCORM (1.2 ou 2004).")
         else:
             selected_version = "1.2" if scorm_12 else "2004"
-            create_scorm_package(mp3_path, subtitle_paths, output_dir, selected_version, scorm_title, completion_rate)
-            shutil.make_archive(output_dir, 'zip', output_dir)
-            with open(f"{output_dir}.zip", "rb") as f:
-                st.download_button("Télécharger le package SCORM", f, file_name=f"{scorm_title}.zip")
-
-            # Nettoyage
-            shutil.rmtree(temp_dir)
-            shutil.rmtree(output_dir)
+            key = cache_key("mp3", [mp3_hash], {
+                "filename": uploaded_file.name,
+                "subtitles": subtitle_hashes,
+                "version": selected_version,
+                "title": scorm_title,
+                "completion_rate": completion_rate,
+            })
+            # Conversion confiée à la file de jobs, suivie ci-dessous
+            submit_job(
+                st,
+                {"kind": "mp3", "title": scorm_title,
+                 "options": {"version": selected_version, "completion_rate": completion_rate}},
+                {"input": mp3_path, "subtitles": subtitle_paths}, f"{scorm_title}.zip", cache_key=key,
+            )
+else:
+    staging.keep_only(set())
+
+job_id = current_job(st)
+if job_id:
+    show_job(st, job_id, "Télécharger le package SCORM")
@@ -0,0 +1 @@
+# Briques communes aux convertisseurs SCORM (packaging, manifestes, caches...)
@@ -0,0 +1,271 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from urllib.parse import quote
+
+from aiohttp import web
+
+from scorm_core.builders.dispatch import DEFAULT_OPTIONS, KINDS
+from scorm_core.cli import OPTION_TYPES
+from scorm_core import metrics
+from scorm_core.jobs import DONE, FAILED, POLL_SECONDS, QueueFull, default_queue, ensure_worker, job_gauges
+from scorm_core.result_cache import cache_key
+from scorm_core.template_cache import template_fingerprint
+
+# API HTTP de conversion, pour appeler les convertisseurs sans navigateur :
+#
+#   python -m scorm_core.api --port 8080
+#
+#   curl -F input=@cours.pdf -F title=Cours -F version=2004 localhost:8080/convert/pdf -o cours.zip
+#   curl -F input=@video.mp4 -F subtitle_fr=@video.srt localhost:8080/convert/mp4 -o video.zip
+#   curl -F url=https://youtu.be/... localhost:8080/convert/remote_video -o video.zip
+#
+# POST /convert/<type>      attend la fin de la conversion et renvoie le package
+# POST /jobs/<type>         202 {"id": ...} sans attendre
+# GET  /jobs/<id>           état du job (JSON)
+# GET  /jobs/<id>/package   package du job terminé
+# GET  /metrics             mesures au format Prometheus (scorm_core/metrics.py)
+#
+# Les fichiers du formulaire multipart sont écrits sur disque par blocs et le
+# package est renvoyé par blocs (sendfile) : aucun fichier n'est gardé en
+# mémoire. Les conversions passent par la file de jobs (scorm_core/jobs.py).
+
+CHUNK_SIZE = 1024 * 1024
+# Taille maximale de l'ensemble des fichiers d'une requête
+MAX_UPLOAD_BYTES = int(os.environ.get("SCORM_API_MAX_UPLOAD_MB", "2048")) * 1024 * 1024
+# Réceptions simultanées ; au-delà, réponse 503 "serveur occupé"
+MAX_UPLOADS = int(os.environ.get("SCORM_API_MAX_UPLOADS", "8"))
+MAX_FIELD_BYTES = 64 * 1024
+RETRY_AFTER_SECONDS = 30
+
+# Fichiers attendus : `input` et, pour mp3/mp4, `subtitle_<langue>` ;
+# remote_video prend un champ texte `url`
+SUBTITLE_FIELD = re.compile(r"^subtitle_([A-Za-z]{2,3}(?:-[A-Za-z0-9]{2,8})?)$")
+
+
+def _error(exception_class, message, **kwargs):
+    return exception_class(text=json.dumps({"error": message}, ensure_ascii=False),
+                           content_type="application/json", **kwargs)
+
+
+def _busy(message):
+    return _error(web.HTTPServiceUnavailable, message, headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+
+
+async def _read_field(part):
+    value = bytearray()
+    while chunk := await part.read_chunk(8192):
+        value.extend(chunk)
+        if len(value) > MAX_FIELD_BYTES:
+            raise _error(web.HTTPRequestEntityTooLarge, f"Champ trop long : {part.name}",
+                         max_size=MAX_FIELD_BYTES, actual_size=len(value))
+    return value.decode(part.get_charset(default="utf-8"))
+
+
+# Écrit un fichier du formulaire sur disque par blocs, en calculant son empreinte
+async def _save_part(part, path, received):
+    digest = hashlib.sha256()
+    with metrics.stage("upload") as timer, open(path, "wb") as f:
+        while chunk := await part.read_chunk(CHUNK_SIZE):
+            received += len(chunk)
+            if received > MAX_UPLOAD_BYTES:
+                raise _error(web.HTTPRequestEntityTooLarge, "Fichiers trop volumineux",
+                             max_size=MAX_UPLOAD_BYTES, actual_size=received)
+            digest.update(chunk)
+            timer.add_bytes(len(chunk))
+            await asyncio.to_thread(f.write, chunk)
+    return digest.hexdigest(), received
+
+
+# Lit le formulaire multipart : champs texte en mémoire (bornés), fichiers
+# sur disque dans `upload_dir`
+async def _receive_form(request, upload_dir):
+    if not request.content_type.startswith("multipart/"):
+        raise _error(web.HTTPUnsupportedMediaType, "Formulaire multipart/form-data attendu")
+    reader = await request.multipart()
+    fields, files = {}, {}
+    received = 0
+    while (part := await reader.next()) is not None:
+        if not part.filename:
+            fields[part.name] = await _read_field(part)
+            continue
+        filename = os.path.basename(part.filename.replace("\\", "/"))
+        subtitle = SUBTITLE_FIELD.match(part.name or "")
+        if part.name != "input" and not subtitle:
+            raise _error(web.HTTPBadRequest, f"Champ fichier inconnu : {part.name}")
+        if not filename:
+            raise _error(web.HTTPBadRequest, f"Nom de fichier manquant : {part.name}")
+        # Sous-titres nommés "<nom>_<langue>.<ext>", comme dans mp3_scorm.py et mp4_scorm.py
+        if subtitle:
+            stem, ext = os.path.splitext(filename)
+            lang_code = subtitle.group(1)
+            if not stem.endswith(f"_{lang_code}"):
+                filename = f"{stem}_{lang_code}{ext}"
+        field_dir = os.path.join(upload_dir, part.name)
+        os.makedirs(field_dir, exist_ok=True)
+        path = os.path.join(field_dir, filename)
+        file_hash, received = await _save_part(part, path, received)
+        files[part.name] = (path, filename, file_hash)
+    return fields, files
+
+
+def _options(fields):
+    options = dict(DEFAULT_OPTIONS)
+    for name, convert in OPTION_TYPES.items():
+        if fields.get(name):
+            try:
+                options[name] = convert(fields[name])
+            except ValueError:
+                raise _error(web.HTTPBadRequest, f"Valeur invalide pour {name} : {fields[name]}")
+    if options["version"] not in ("1.2", "2004"):
+        raise _error(web.HTTPBadRequest, "version : 1.2 ou 2004")
+    return options
+
+
+# Description du job, fichiers à conserver et clé de cache à partir du formulaire
+def _job_request(kind, fields, files):
+    options = _options(fields)
+    if kind == "remote_video":
+        url = fields.get("url", "").strip()
+        if not re.match(r"^https?://", url):
+            raise _error(web.HTTPBadRequest, "Champ url manquant ou invalide")
+        title = fields.get("title") or "Vidéo distante"
+        spec = {"kind": kind, "input": url, "title": title, "options": options}
+        return spec, {}, None, re.sub(r"[^\w\-]", "_", title) + ".zip"
+
+    if "input" not in files:
+        raise _error(web.HTTPBadRequest, "Champ fichier input manquant")
+    path, filename, file_hash = files["input"]
+    if kind == "document":
+        from scorm_core.builders.document import allowed_extensions
+        if Path(filename).suffix.lower().lstrip(".") not in allowed_extensions:
+            raise _error(web.HTTPBadRequest, f"Type de document non supporté : {filename}")
+    title = fields.get("title") or Path(filename).stem
+    inputs = {"input": path}
+    hashes = [file_hash]
+    names = {"input": filename}
+    if kind in ("mp3", "mp4"):
+        subtitles = sorted((name, value) for name, value in files.items() if name != "input")
+        inputs["subtitles"] = [value[0] for _, value in subtitles]
+        hashes += [value[2] for _, value in subtitles]
+        names.update((name, value[1]) for name, value in subtitles)
+    if kind == "pdf":
+        hashes.append(template_fingerprint())
+    key = cache_key(f"api_{kind}", hashes, {"title": title, "names": names, **options})
+    spec = {"kind": kind, "title": title, "options": options}
+    return spec, inputs, key, f"{Path(filename).stem}_SCORM_{options['version'].replace('.', '_')}.zip"
+
+
+def _job_json(job):
+    return {
+        "id": job["id"], "kind": job["kind"], "status": job["status"], "stage": job["stage"],
+        "progress": job["progress"], "message": job["message"], "error": job["error"],
+    }
+
+
+async def _submit(request):
+    kind = request.match_info["kind"]
+    if kind not in KINDS:
+        raise _error(web.HTTPNotFound, f"Type de conversion inconnu : {kind}")
+    uploads = request.app["uploads"]
+    if uploads.locked():
+        raise _busy("Serveur occupé : trop de transferts en cours")
+    queue = request.app["queue"]
+    async with uploads:
+        # Dossier de réception supprimé après soumission : la file de jobs a
+        # lié les fichiers dans son propre dossier
+        with queue.workspace.job("api_") as upload_dir:
+            fields, files = await _receive_form(request, upload_dir)
+            spec, inputs, key, output_name = _job_request(kind, fields, files)
+            try:
+                return await asyncio.to_thread(queue.submit, spec, inputs, output_name, key)
+            except QueueFull as e:
+                raise _busy(f"Serveur occupé : {e}")
+
+
+async def _wait_job(queue, job_id):
+    while True:
+        job = await asyncio.to_thread(queue.get, job_id)
+        if job is None or job["status"] in (DONE, FAILED):
+            return job
+        await asyncio.sleep(POLL_SECONDS)
+
+
+def _package_response(job):
+    if job["status"] == FAILED:
+        raise _error(web.HTTPUnprocessableEntity, job["error"])
+    if job["status"] != DONE:
+        raise _error(web.HTTPConflict, "Conversion en cours")
+    if not job["output"] or not os.path.exists(job["output"]):
+        raise _error(web.HTTPGone, "Package expiré, relancez la conversion")
+    return web.FileResponse(job["output"], chunk_size=CHUNK_SIZE, headers={
+        "Content-Type": "application/zip",
+        "Content-Disposition": f"attachment; filename*=UTF-8''{quote(job['output_name'])}",
+        "X-Job-Id": job["id"],
+    })
+
+
+async def convert(request):
+    job_id = await _submit(request)
+    job = await _wait_job(request.app["queue"], job_id)
+    if job is None:
+        raise _error(web.HTTPGone, "Job purgé")
+    return _package_response(job)
+
+
+async def submit(request):
+    job_id = await _submit(request)
+    job = await asyncio.to_thread(request.app["queue"].get, job_id)
+    return web.json_response(_job_json(job), status=202, headers={"Location": f"/jobs/{job_id}"})
+
+
+async def _get_job(request):
+    job = await asyncio.to_thread(request.app["queue"].get, request.match_info["job_id"])
+    if job is None:
+        raise _error(web.HTTPNotFound, "Job inconnu")
+    return job
+
+
+async def job_status(request):
+    return web.json_response(_job_json(await _get_job(request)))
+
+
+async def job_package(request):
+    return _package_response(await _get_job(request))
+
+
+async def metrics_endpoint(request):
+    gauges = await asyncio.to_thread(job_gauges, request.app["queue"])
+    return web.Response(body=metrics.REGISTRY.render(gauges).encode(),
+                        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+
+# `queue` permet de brancher une autre file (tests, benchmarks)
+def make_app(queue=None, max_uploads=None):
+    app = web.Application()
+    app["queue"] = queue or default_queue()
+    app["uploads"] = asyncio.Semaphore(MAX_UPLOADS if max_uploads is None else max_uploads)
+    app.router.add_post("/convert/{kind}", convert)
+    app.router.add_post("/jobs/{kind}", submit)
+    app.router.add_get("/jobs/{job_id}", job_status)
+    app.router.add_get("/jobs/{job_id}/package", job_package)
+    app.router.add_get("/metrics", metrics_endpoint)
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m scorm_core.api", description="API HTTP de conversion SCORM")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args(argv)
+    metrics.configure_logging()
+    ensure_worker()
+    web.run_app(make_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2 @@
+# Logique de construction des packages, indépendante de l'interface Streamlit :
+# utilisée par les pages, la CLI de conversion par lot et les autres points d'entrée
@@ -0,0 +1,127 @@
+import os
+from pathlib import Path
+
+from scorm_core.profiles import DEFAULT_PROFILE
+
+# Construction d'un package à partir d'une description de tâche, commune à la
+# conversion par lot (scorm_core/cli.py) et à la file de jobs (scorm_core/jobs.py) :
+#
+#   {"kind": "pdf", "input": "cours.pdf", "title": "Cours", "output": "cours.zip",
+#    "options": {"version": "2004", ...}, "subtitles": [...]}
+#
+# Le type "course" réunit plusieurs documents dans un package (un SCO chacun) :
+# "input" est alors une liste de chemins et "documents" la liste parallèle des
+# réglages propres à chaque document ({"title", "min_duration", "criteria"},
+# valeurs manquantes prises dans "options"). Il n'est pas proposé par l'API
+# HTTP, dont les formulaires n'ont qu'un champ input.
+#
+# Les convertisseurs ne sont importés que pour le type demandé.
+KINDS = ["pdf", "pdf_embed", "mp3", "mp4", "document", "remote_video"]
+
+# Options par défaut, communes à la ligne de commande et à l'API HTTP
+DEFAULT_OPTIONS = {
+    "version": "1.2",
+    "completion_rate": 80,
+    "min_duration": "00:05:00",
+    "criteria": ["temps", "pages"],
+    "profile": DEFAULT_PROFILE,
+    "locales": ["fr"],
+    "keep_all_cmaps": False,
+    "linearize": False,
+    "search_index": True,
+    "chapters": False,
+    "optimize": False,
+    "optimize_dpi": 150,
+    "optimize_quality": 75,
+    "optimize_target_mb": 0,
+    "validation": "Lecture de toutes les pages",
+    "printable": True,
+    "downloadable": True,
+}
+
+
+# PDF optimisé (scorm_core/pdf_optimize.py) écrit dans le dossier de travail
+# sous le même nom, qui est aussi celui du PDF dans le package "embed" (sous
+# un sous-dossier `name` pour les documents d'un module) ; ses statistiques
+# (tailles, images réencodées, réglages retenus) sont passées à `on_optimized`
+def _optimized_pdf(source, options, work_dir, log, name="", on_optimized=None):
+    from scorm_core.pdf_optimize import format_report, optimize_available, optimize_pdf
+    if not optimize_available():
+        log("Optimisation indisponible (pikepdf ou Pillow absent) : PDF livré tel quel")
+        return source
+    optimized = os.path.join(work_dir, "optimized", name, os.path.basename(source))
+    os.makedirs(os.path.dirname(optimized), exist_ok=True)
+    stats = optimize_pdf(source, optimized, options["optimize_dpi"], options["optimize_quality"],
+                         options["optimize_target_mb"])
+    if stats is None:
+        log("PDF chiffré : non optimisé")
+        return source
+    log(format_report(stats))
+    if on_optimized is not None:
+        on_optimized(stats)
+    return optimized
+
+
+def build(job, work_dir, log=None, on_optimized=None):
+    options = job["options"]
+    kind, source, output, title = job["kind"], job["input"], job["output"], job["title"]
+    if kind in ("pdf", "pdf_embed") and options.get("optimize"):
+        options = {**DEFAULT_OPTIONS, **options}
+        source = _optimized_pdf(source, options, work_dir, log or (lambda message: None), on_optimized=on_optimized)
+    if kind == "pdf" and options.get("chapters"):
+        from scorm_core.builders.pdf_course import create_chapter_package
+        return create_chapter_package(source, output, title, work_dir, options["version"], options["min_duration"],
+                                      options["criteria"], options["profile"], options["locales"],
+                                      options["keep_all_cmaps"], options.get("linearize", False),
+                                      options.get("search_index", False), log=log)
+    if kind == "course":
+        from scorm_core.builders.pdf_course import create_documents_package
+        options = {**DEFAULT_OPTIONS, **options}
+        settings = job.get("documents") or [{}] * len(source)
+        sources = [
+            {"input": path, "title": document.get("title"), "min_duration": document.get("min_duration")
+             or options["min_duration"], "criteria": document.get("criteria") or options["criteria"]}
+            for path, document in zip(source, settings)
+        ]
+        prepare = None
+        if options["optimize"]:
+            def prepare(path, number):
+                return _optimized_pdf(path, options, work_dir, log or (lambda message: None), f"{number:03d}",
+                                      on_optimized)
+        return create_documents_package(sources, output, title, work_dir, options["version"], options["profile"],
+                                        options["locales"], options["keep_all_cmaps"], options["linearize"],
+                                        options["search_index"], prepare=prepare, log=log)
+    if kind == "pdf":
+        from scorm_core.builders.pdf_viewer import create_scorm_package
+        return create_scorm_package(source, output, title, options["version"], options["min_duration"],
+                                    options["criteria"], options["profile"], options["locales"],
+                                    options["keep_all_cmaps"], options.get("linearize", False),
+                                    options.get("search_index", False), log=log)
+    if kind == "pdf_embed":
+        from scorm_core.builders.pdf_embed import create_scorm_package
+        return create_scorm_package(source, os.path.basename(source), output, title, options["version"],
+                                    options["validation"], options["min_duration"],
+                                    options["printable"], options["downloadable"])
+    if kind in ("mp3", "mp4"):
+        from scorm_core.subtitles import srt_to_vtt
+        subtitle_paths = []
+        for path in job.get("subtitles", []):
+            if path.lower().endswith(".srt"):
+                vtt_path = os.path.join(work_dir, f"{Path(path).stem}.vtt")
+                srt_to_vtt(path, vtt_path)
+                path = vtt_path
+            subtitle_paths.append(path)
+        if kind == "mp3":
+            from scorm_core.builders.mp3 import create_scorm_package
+        else:
+            from scorm_core.builders.mp4 import create_scorm_package
+        return create_scorm_package(source, subtitle_paths, output, options["version"], title, options["completion_rate"])
+    if kind == "document":
+        from scorm_core.builders.document import generate_scorm_package
+        from scorm_core.builders.pdf_viewer import parse_duration
+        return generate_scorm_package(source, os.path.basename(source), output, options["version"], title,
+                                      parse_duration(options["min_duration"]), work_dir=work_dir)
+    if kind == "remote_video":
+        from scorm_core.builders.remote_video import create_scorm_package
+        return create_scorm_package(source, output, options["version"], title, options["completion_rate"])
+    raise ValueError(f"Type de conversion inconnu : {kind}")
@@ -0,0 +1,144 @@
+import os
+import shutil
+import tempfile
+import xml.sax.saxutils
+from pathlib import Path
+
+from scorm_core.metrics import stage
+from scorm_core.packaging import CHUNK_SIZE, PackageWriter
+
+# Liste des formats autorisés
+SUPPORTED_EXTENSIONS = {
+    "Textes": ["pdf", "docx", "doc", "rtf", "txt", "odt", "pages"],
+    "Présentations": ["pptx", "odp"],
+    "Tableurs": ["xls","xlsx","xlsm","xltx","xltm","xlsb","ods","numbers","csv"]
+}
+# Aplatit les extensions dans un seul tableau
+allowed_extensions = [ext for group in SUPPORTED_EXTENSIONS.values() for ext in group] 
+
+# Détection du type de fichier
+def detect_file_category(extension):
+    for category, ext_list in SUPPORTED_EXTENSIONS.items():
+        if extension.lower() in ext_list:
+            return category
+    return "Autre"
+
+# Fonctions SCORM
+def create_index_html_by_type(file_name, category):
+    # Affichage universel en iframe PDF
+    return f"""<!DOCTYPE html>
+<html>
+  <head><meta charset="UTF-8"><title>Visionneur PDF</title></head>
+  <body style="margin:0;padding:0;height:100vh;">
+    <iframe src="{file_name}" style="width:100%;height:100%;" type="application/pdf"></iframe>
+  </body>
+</html>
+"""
+
+# chardet et reportlab ne sont chargés que pour les conversions de texte :
+# un PDF ou un tableur n'en a pas besoin
+def convert_text_to_pdf(input_path, output_path):
+    from chardet.universaldetector import UniversalDetector
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import cm
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+    # Détecter l'encodage
+    # Détection incrémentale : le fichier n'est pas chargé en entier
+    detector = UniversalDetector()
+    with open(input_path, 'rb') as f:
+        for line in f:
+            detector.feed(line)
+            if detector.done:
+                break
+    detector.close()
+    result = detector.result
+    encoding = result['encoding'] if result['encoding'] else 'utf-8'
+
+    styles = getSampleStyleSheet()
+    normal_style = styles['Normal']
+    doc = SimpleDocTemplate(output_path, pagesize=A4,
+                            rightMargin=2*cm, leftMargin=2*cm,
+                            topMargin=2*cm, bottomMargin=2*cm)
+
+    story = []
+    with open(input_path, "r", encoding=encoding, errors="replace") as file:
+        for line in file:
+            line = line.strip()
+            if line:
+                escaped_line = xml.sax.saxutils.escape(line)  # <-- Échappe les caractères HTML
+                story.append(Paragraph(escaped_line, normal_style))
+                story.append(Spacer(1, 6))
+
+    doc.build(story)
+    return output_path
+
+
+def convert_docx_to_pdf(input_path, output_dir):
+    from docx2pdf import convert
+
+    output_path = os.path.join(output_dir, f"{Path(input_path).stem}.pdf")
+    convert(input_path, output_path)
+    return output_path
+
+
+# Document texte (catégorie "Textes", hors PDF) converti en PDF dans `output_dir`
+def convert_to_pdf(file_path, extension, output_dir, stem):
+    if extension == "docx":
+        with stage("docx2pdf", os.path.getsize(file_path)):
+            return convert_docx_to_pdf(str(file_path), str(output_dir))
+    # Conversion des autres formats texte en PDF simple
+    text_pdf_path = Path(output_dir) / f"{stem}.pdf"
+    try:
+        with stage("text2pdf", os.path.getsize(file_path)):
+            convert_text_to_pdf(str(file_path), str(text_pdf_path))
+        return text_pdf_path
+    except Exception as e:
+        raise RuntimeError(f"Échec de conversion en PDF : {e}")
+
+
+# `source` : chemin du document ou objet fichier (upload) nommé `original_filename`
+def generate_scorm_package(source, original_filename, zip_path, scorm_version, scorm_title, duration_seconds, work_dir=None):
+    extension = original_filename.split(".")[-1].lower()
+    category = detect_file_category(extension)
+
+    viewer_file = original_filename
+    pdf_path = None
+    temp_dir = None
+
+    if category == "Textes":
+        # Les conversions travaillent sur des fichiers : seul ce cas passe par le disque
+        temp_dir = Path(tempfile.mkdtemp(prefix="scorm_", dir=work_dir))
+        if isinstance(source, (str, os.PathLike)):
+            file_path = Path(source)
+        else:
+            file_path = temp_dir / original_filename
+            source.seek(0)
+            with stage("copy") as timer, open(file_path, "wb") as f:
+                shutil.copyfileobj(source, f, CHUNK_SIZE)
+                timer.add_bytes(f.tell())
+
+        pdf_path = convert_to_pdf(file_path, extension, temp_dir, Path(original_filename).stem)
+
+        if pdf_path:
+            viewer_file = Path(pdf_path).name
+
+    # Créer index.html selon la catégorie
+    index_html = create_index_html_by_type(viewer_file, category)
+
+    # Créer le ZIP directement depuis la source, le PDF converti et les fichiers générés
+    try:
+        with PackageWriter(zip_path) as package:
+            # Le PDF converti remplace l'original lorsqu'ils portent le même nom
+            if not pdf_path or viewer_file != original_filename:
+                package.add_source(original_filename, source)
+            if pdf_path:
+                package.add_file(viewer_file, pdf_path)
+            package.add_text("index.html", index_html)
+            # Créer imsmanifest.xml
+            package.add_manifest(scorm_version, scorm_title, "index.html")
+    finally:
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    return package.stats
@@ -0,0 +1,227 @@
+import os
+
+from scorm_core.packaging import PackageWriter, REPO_DIR
+
+
+# Fonction principale de création du package SCORM (écrit directement dans le ZIP)
+def create_scorm_package(mp3_path, subtitle_paths, zip_path, version, scorm_title="Mon Cours Audio SCORM", completion_rate=80):
+    mp3_filename = os.path.basename(mp3_path)
+    subtitle_filenames = [os.path.basename(path) for path in subtitle_paths or []]
+
+    track_elements = "\n    ".join([
+        f'<track src="{fn}" kind="subtitles" srclang="{os.path.splitext(fn)[0].split("_")[-1]}" label="{os.path.splitext(fn)[0].split("_")[-1].capitalize()}" />' 
+        for fn in subtitle_filenames
+    ])
+
+    html_content = f'''<!DOCTYPE html>
+<html lang="fr">
+<head>
+  <meta charset="UTF-8" />
+  <title>{scorm_title}</title>
+  <link rel="stylesheet" href="https://cdn.plyr.io/3.7.8/plyr.css" />
+  <script src="scorm_functions.js"></script>
+  <style>
+  body {{
+    font-family: Arial, sans-serif;
+    background-color: #222;
+    color: #eee;
+    padding: 20px;
+    text-align: center;
+  }}
+  #completion-info {{
+  display: none;
+  }}
+
+  
+  .player-container {{
+  position: relative;
+  width: 80%;
+  max-width: 600px;
+  margin: 0 auto;
+  z-index: 0; /* Base pour enfant */
+  }}
+
+  video, .plyr {{
+    width: 100%;
+  }}
+
+  canvas {{
+  position: absolute;
+  top: 0; left: 0;
+  width: 100% !important;
+  height: 100% !important;
+  pointer-events: none;
+  z-index: 0;
+  mix-blend-mode: screen;
+}}
+
+/* Conteneur des sous-titres (fond noir) */
+.plyr__captions {{
+  position: absolute;
+  bottom: 10%;
+  width: 100%;
+  z-index: 10; /* au-dessus du canvas */
+  background-color: rgba(0, 0, 0, 0.7); /* fond noir semi-transparent */
+  padding: 5px 10px;
+  border-radius: 5px;
+  text-align: center;
+}}
+
+/* Chaque sous-titre (texte) */
+.plyr__caption {{
+  color: white;
+  background: transparent; /* Pas de fond ici */
+  font-size: 1.2em;
+  line-height: 1.4;
+  white-space: pre-wrap;
+  display: inline-block;
+}}
+
+
+  #completion-message {{
+    margin-top: 20px;
+    font-weight: bold;
+    color: #4caf50;
+    display: none;
+  }}
+  </style>
+</head>
+<body>
+  <h1>{scorm_title}</h1>
+  <p id="completion-info">Taux de complétion requis pour valider : <strong>{completion_rate}%</strong></p>
+  <p id="completion-message">Vous avez atteint le seuil de complétion requis 🎉</p>
+
+  <div class="player-container">
+    <audio id="player" controls crossorigin>
+      <source src="{mp3_filename}" type="mp3" />
+      {track_elements}
+      Your browser does not support the audio element.
+    </audio>
+    <canvas id="canvas"></canvas>
+  </div>
+
+
+  <script src="https://cdn.plyr.io/3.7.8/plyr.polyfilled.js"></script>
+  <script>
+    const completionRate = {completion_rate};
+    const audio = document.getElementById('player');
+    const completionMessage = document.getElementById('completion-message');
+    let completed = false;
+    let maxPlayed = 0;
+
+    function findAPI(win) {{
+      let attempts = 0;
+      while (win && !win.API && !win.API_1484_11 && win.parent && win !== win.parent && attempts++ < 10) {{
+        win = win.parent;
+      }}
+      return win.API_1484_11 || win.API || null;
+    }}
+
+    function setScormCompleted() {{
+      const api = findAPI(window);
+      if (!api) {{
+        console.warn("SCORM API non trouvée.");
+        return;
+      }}
+
+      try {{
+        if (api.SetValue) {{
+          api.SetValue("cmi.completion_status", "completed");
+          api.Commit("");
+        }} else if (api.LMSSetValue) {{
+          api.LMSSetValue("cmi.core.lesson_status", "completed");
+          api.LMSCommit("");
+        }}
+      }} catch (e) {{
+        console.error("Erreur SCORM:", e);
+      }}
+    }}
+
+    audio.addEventListener('timeupdate', () => {{
+      if (!audio.duration) return;
+
+      if (audio.currentTime > maxPlayed + 0.75) {{
+        audio.currentTime = maxPlayed;
+      }} else {{
+        maxPlayed = Math.max(maxPlayed, audio.currentTime);
+      }}
+
+      const playedPercent = (audio.currentTime / audio.duration) * 100;
+      if (!completed && playedPercent >= completionRate) {{
+        completed = true;
+        document.getElementById('completion-info').style.display = 'block';
+        completionMessage.style.display = 'block';
+        setScormCompleted();
+      }}
+    }});
+
+    const plyrPlayer = new Plyr('#player', {{
+      captions: {{ active: true, update: true, language: 'auto' }},
+    }});
+
+    const canvas = document.getElementById('canvas');
+    const ctx = canvas.getContext('2d');
+    canvas.width = canvas.clientWidth * window.devicePixelRatio;
+    canvas.height = canvas.clientHeight * window.devicePixelRatio;
+    ctx.scale(window.devicePixelRatio, window.devicePixelRatio);
+
+    let audioContext;
+    let analyser;
+    let source;
+
+    function setupAudio() {{
+      audioContext = new (window.AudioContext || window.webkitAudioContext)();
+      source = audioContext.createMediaElementSource(audio);
+      analyser = audioContext.createAnalyser();
+      analyser.fftSize = 256;
+      source.connect(analyser);
+      analyser.connect(audioContext.destination);
+    }}
+
+    function draw() {{
+  requestAnimationFrame(draw);
+  const bufferLength = analyser.frequencyBinCount;
+  const dataArray = new Uint8Array(bufferLength);
+  analyser.getByteFrequencyData(dataArray);
+
+  // Fond noir opaque
+  ctx.fillStyle = 'rgba(0, 0, 0, 0.8)';
+  ctx.fillRect(0, 0, canvas.width, canvas.height);
+
+  const barWidth = canvas.width / bufferLength;
+  let x = 0;
+
+  for (let i = 0; i < bufferLength; i++) {{
+    const barHeight = dataArray[i] / 255 * canvas.height;
+    // Couleurs plus sombres, moins saturées, pour pas gêner les sous-titres
+    const red = 50;
+    const green = 100 * (i / bufferLength);
+    const blue = barHeight / 2;
+    ctx.fillStyle = `rgba(${{red}},${{green}},${{blue}}, 0.6)`;  // avec transparence
+    ctx.fillRect(x, canvas.height - barHeight, barWidth, barHeight);
+    x += barWidth + 1;
+  }}
+}}
+
+
+    audio.addEventListener('play', () => {{
+      if (!audioContext) {{
+        setupAudio();
+        draw();
+      }}
+      if (audioContext.state === 'suspended') {{
+        audioContext.resume();
+      }}
+    }});
+  </script>
+</body>
+</html>'''
+
+    with PackageWriter(zip_path) as package:
+        package.add_file(mp3_filename, mp3_path)
+        package.add_file("scorm_functions.js", os.path.join(REPO_DIR, "scorm_functions.js"))
+        for path, filename in zip(subtitle_paths or [], subtitle_filenames):
+            package.add_file(filename, path)
+        package.add_text('index.html', html_content)
+        package.add_manifest(version, scorm_title, 'index.html')
+    return package.stats
@@ -0,0 +1,211 @@
+import os
+
+from scorm_core.languages import language_name
+from scorm_core.packaging import PackageWriter, REPO_DIR
+
+
+# Fonction principale pour créer le package SCORM (écrit directement dans le ZIP)
+def create_scorm_package(video_path, subtitle_paths, zip_path, version, scorm_title="Mon Cours Vidéo SCORM", completion_rate=80):
+    video_filename = "video/video.mp4"
+    subtitle_filenames = [os.path.basename(path) for path in subtitle_paths]
+
+    # Génération des <track> pour les sous-titres
+    track_elements = "\n      ".join([
+        f'<track src="{fn}" kind="subtitles" srclang="{lang_code}" label="{language_name(lang_code)}" />'
+        for fn in subtitle_filenames
+        if (lang_code := os.path.splitext(fn)[0].split("_")[-1])
+    ])
+
+    # Génération du HTML
+    html_content = f'''<!DOCTYPE html>
+<html lang="fr">
+<head>
+  <meta charset="UTF-8" />
+  <script src="js/wrapper.js"></script>
+  <title>{scorm_title}</title>
+  <link rel="stylesheet" href="https://cdn.plyr.io/3.7.8/plyr.css" />
+  <style>
+    body {{
+      font-family: Arial, sans-serif;
+      background-color: #222;
+      color: #eee;
+      padding: 20px;
+      text-align: center;
+    }}
+    #completion-info {{
+      display: none;
+    }}
+    .player-container {{
+      width: 80%;
+      max-width: 800px;
+      margin: auto;
+    }}
+    video {{
+      width: 100%;
+    }}
+    #completion-message {{
+      margin-top: 20px;
+      font-weight: bold;
+      color: #4caf50;
+      display: none;
+    }}
+  </style>
+</head>
+<body>
+  <h1>{scorm_title}</h1>
+  <p id="completion-info">Taux de complétion requis atteint : <strong>{completion_rate}%</strong></p>
+  <p id="completion-message">Vous avez atteint le seuil de complétion requis 🎉</p>
+
+  <div class="player-container">
+    <video id="player" controls crossorigin>
+      <source src="{video_filename}" type="video/mp4" />
+      {track_elements}
+      Votre navigateur ne prend pas en charge la vidéo.
+    </video>
+  </div>
+  <script src="js/wrapper.js"></script>
+  <script src="https://cdn.plyr.io/3.7.8/plyr.polyfilled.js"></script>
+  <script>
+    const completionRate = {completion_rate};
+    const video = document.getElementById('player');
+    const completionMessage = document.getElementById('completion-message');
+    let maxPlayed = 0;
+    let completed = false;
+
+    function findAPI(win) {{
+      let attempts = 0;
+      while (win && !win.API && !win.API_1484_11 && win.parent && win !== win.parent && attempts++ < 10) {{
+        win = win.parent;
+      }}
+      return win.API_1484_11 || win.API || null;
+    }}
+
+    function setScormCompleted() {{
+      const api = findAPI(window);
+      if (!api) {{
+        console.warn("SCORM API non trouvée.");
+        return;
+      }}
+      try {{
+        if (api.SetValue) {{
+          api.SetValue("cmi.completion_status", "completed");
+          api.Commit("");
+        }} else if (api.LMSSetValue) {{
+          api.LMSSetValue("cmi.core.lesson_status", "completed");
+          api.LMSCommit("");
+        }}
+      }} catch (e) {{
+        console.error("Erreur SCORM:", e);
+      }}
+    }}
+
+    function selectSubtitleTrack(player) {{
+      const userLang = navigator.language || navigator.userLanguage;
+      const langCode = userLang ? userLang.slice(0, 2) : null;
+
+      const tracks = player.elements.video.textTracks;
+      let selectedTrackIndex = -1;
+
+      for (let i = 0; i < tracks.length; i++) {{
+        if (tracks[i].language === langCode) {{
+          selectedTrackIndex = i;
+          break;
+        }}
+      }}
+
+      if (selectedTrackIndex === -1) {{
+        for (let i = 0; i < tracks.length; i++) {{
+          if (tracks[i].language === 'en') {{
+            selectedTrackIndex = i;
+            break;
+          }}
+        }}
+      }}
+
+      for (let i = 0; i < tracks.length; i++) {{
+        tracks[i].mode = (i === selectedTrackIndex) ? 'showing' : 'disabled';
+      }}
+    }}
+
+    video.addEventListener('timeupdate', () => {{
+      if (!video.duration) return;
+
+      if (video.currentTime > maxPlayed + 0.75) {{
+        video.currentTime = maxPlayed;
+      }} else {{
+        maxPlayed = Math.max(maxPlayed, video.currentTime);
+      }}
+
+      const playedPercent = (video.currentTime / video.duration) * 100;
+      if (!completed && playedPercent >= completionRate) {{
+        completed = true;
+        document.getElementById('completion-info').style.display = 'block';
+        completionMessage.style.display = 'block';
+        setScormCompleted();
+      }}
+    }});
+
+    function initScorm() {{
+      try {{
+        const api = findAPI(window);
+        if (api && api.Initialize) {{
+          api.Initialize("");
+        }} else if (api && api.LMSInitialize) {{
+          api.LMSInitialize("");
+        }}
+      }} catch (e) {{
+        console.warn("Erreur lors de l'initialisation SCORM:", e);
+      }}
+    }}
+
+    function quitScorm() {{
+      try {{
+        const api = findAPI(window);
+        if (api && api.Terminate) {{
+          api.Terminate("");
+        }} else if (api && api.LMSFinish) {{
+          api.LMSFinish("");
+        }}
+      }} catch (e) {{
+        console.warn("Erreur lors de la fermeture SCORM:", e);
+      }}
+    }}
+
+    window.addEventListener('load', () => {{
+      initScorm();
+    }});
+    window.onbeforeunload = () => {{
+      quitScorm();
+    }};
+
+    const plyrPlayer = new Plyr('#player', {{
+      speed: {{
+        selected: 1,
+        options: [0.5, 1, 1.25, 1.5]
+      }},
+      captions: {{
+        active: true,
+        update: true,
+        language: 'auto'
+      }}
+    }});
+
+    plyrPlayer.on('ready', () => {{
+      selectSubtitleTrack(plyrPlayer);
+    }});
+  </script>
+</body>
+</html>
+'''
+
+    with PackageWriter(zip_path) as package:
+        # Wrapper dans le sous-dossier js, vidéo dans le sous-dossier vidéo
+        package.add_file('js/wrapper.js', os.path.join(REPO_DIR, 'wrapper.js'))
+        package.add_file(video_filename, video_path)
+        # Sous-titres à la racine du package
+        for path, filename in zip(subtitle_paths, subtitle_filenames):
+            package.add_file(filename, path)
+        package.add_text('index.html', html_content)
+        # Manifeste SCORM généré à partir des fichiers écrits
+        package.add_manifest(version, scorm_title, 'index.html')
+    return package.stats
@@ -0,0 +1,250 @@
+import json
+import os
+from pathlib import Path
+
+from scorm_core.builders.pdf_viewer import (
+    VIEWER_SCRIPT, _linearized_copy, _needed_cmaps, parse_duration,
+)
+from scorm_core.cmaps import cmap_exclusions
+from scorm_core.linearize import viewer_range_script
+from scorm_core.locales import LOCALE_INDEX, link_viewer_locales, locale_exclusions, locale_properties
+from scorm_core.manifest import MANIFEST_NAME
+from scorm_core.metrics import stage
+from scorm_core.packaging import PackageWriter, SCORM_BASE_DIR
+from scorm_core.pdf_probe import probe_pdf
+from scorm_core.profiles import DEFAULT_PROFILE, VIEWER_PATH, profile_exclusions, profile_summary
+from scorm_core.search_index import build_search_index, viewer_search_script
+from scorm_core.template_cache import template_archive
+
+# Package à plusieurs SCO partageant une seule copie du viewer pdf.js : chaque
+# SCO a sa page de lancement (web/<dossier>_NN.html, copie de viewer.html qui
+# désigne son PDF et ses réglages de complétude) et son PDF ; build/, le reste
+# de web/ et scorm.js ne sont livrés qu'une fois. Sert au découpage d'un PDF
+# en chapitres et aux modules de plusieurs documents : la taille du package
+# suit celle des contenus, pas leur nombre.
+
+# Logique de complétude partagée : required_time et required_pages sont
+# définis par la page de lancement de chaque SCO (0 : critère non retenu)
+COURSE_SCORM_JS = """
+// Placeholder SCORM logic
+function checkCompletion(timeSpent, pagesViewed) {
+  if (timeSpent < required_time) return false;
+  if (pagesViewed < required_pages) return false;
+  return true;
+}
+"""
+
+
+# Page de lancement d'un SCO : viewer.html du template, avec son PDF, ses
+# réglages de complétude et, s'il existe, son index de recherche
+def sco_page(viewer_html, pdf_url, min_seconds, num_pages, completion_criteria, index_url=None):
+    settings = f"""<script>
+  PDFViewerApplicationOptions.set("defaultUrl", {json.dumps(pdf_url)});
+  var required_time = {min_seconds if 'temps' in completion_criteria else 0};
+  var required_pages = {num_pages if 'pages' in completion_criteria else 0};
+  </script>"""
+    scripts = [VIEWER_SCRIPT, settings] + ([viewer_search_script(index_url)] if index_url else [])
+    return viewer_html.replace(VIEWER_SCRIPT, "\n  ".join(scripts))
+
+
+# `documents` : liste de {"title", "pdf" (chemin), "min_seconds", "criteria"},
+# un SCO chacun, dans l'ordre. `folder` : dossier des PDF sous web/ et préfixe
+# des pages de lancement. `log` reçoit les lignes de bilan.
+def create_course_package(documents, zip_path, module_title, scorm_version="1.2", package_profile=DEFAULT_PROFILE,
+                          viewer_locales=("fr",), keep_all_cmaps=False, linearize=False, search_index=False,
+                          folder="documents", log=None):
+    log = log or (lambda message: None)
+    if not documents:
+        raise ValueError("Aucun document à empaqueter")
+
+    with stage("viewer_html") as timer, open(os.path.join(SCORM_BASE_DIR, "web", "viewer.html"), "r",
+                                              encoding="utf-8") as f:
+        viewer_html = f.read()
+        viewer_html = viewer_html.replace("print", "")
+        viewer_html = viewer_html.replace("download", "")
+        viewer_html = link_viewer_locales(viewer_html)
+        if linearize:
+            viewer_html = viewer_html.replace(VIEWER_SCRIPT, f"{VIEWER_SCRIPT}\n  {viewer_range_script()}")
+        timer.add_bytes(len(viewer_html))
+
+    digits = max(2, len(str(len(documents))))
+    scos, needed_cmaps, temporary = [], set(), []
+    try:
+        for number, document in enumerate(documents, 1):
+            name = f"{number:0{digits}d}"
+            with stage("probe", os.path.getsize(document["pdf"])):
+                pdf_info = probe_pdf(document["pdf"], with_sizes=False, scan_fonts=not keep_all_cmaps)
+            if needed_cmaps is not None:
+                # None (analyse impossible) : toutes les CMaps sont livrées
+                used = None if keep_all_cmaps else _needed_cmaps(document["pdf"], pdf_info)
+                needed_cmaps = None if used is None else needed_cmaps | used
+            web_pdf = _linearized_copy(document["pdf"], pdf_info, zip_path, log) if linearize else None
+            if web_pdf:
+                temporary.append(web_pdf)
+            index = build_search_index(document["pdf"], pdf_info.page_count)[0] if search_index else None
+            page = sco_page(viewer_html, f"{folder}/{name}.pdf", document["min_seconds"], pdf_info.page_count,
+                            document["criteria"], f"{folder}/{name}.search.json.gz" if index else None)
+            scos.append({
+                "title": document["title"], "pdf": web_pdf or document["pdf"], "page": page, "index": index,
+                "pages": pdf_info.page_count, "launch": f"web/{folder}_{name}.html",
+                "pdf_name": f"web/{folder}/{name}.pdf", "index_name": f"web/{folder}/{name}.search.json.gz",
+            })
+
+        generated = {"scorm.js": COURSE_SCORM_JS, LOCALE_INDEX: locale_properties(viewer_locales)}
+        with stage("template"):
+            template = template_archive()
+            excluded = profile_exclusions(template, package_profile, viewer_html)
+            excluded_locales = locale_exclusions(template, viewer_locales)
+            excluded_cmaps = cmap_exclusions(template, needed_cmaps)
+        # viewer.html est remplacé par les pages de lancement des SCO
+        skip = ({MANIFEST_NAME, VIEWER_PATH} | set(generated) | set(excluded) | set(excluded_locales)
+                | set(excluded_cmaps))
+        items = []
+        with PackageWriter(zip_path) as package:
+            package.add_archive(template, skip=skip)
+            for arcname, content in generated.items():
+                package.add_text(arcname, content)
+            for sco in scos:
+                package.add_text(sco["launch"], sco["page"])
+                package.add_source(sco["pdf_name"], sco["pdf"])
+                files = [sco["launch"], sco["pdf_name"]]
+                if sco["index"]:
+                    package.add_bytes(sco["index_name"], sco["index"])
+                    files.append(sco["index_name"])
+                items.append((sco["title"], sco["launch"], files))
+            package.add_course_manifest(scorm_version, module_title, items)
+    finally:
+        for path in temporary:
+            os.remove(path)
+
+    for sco in scos:
+        log(f"SCO {sco['launch']} : {sco['title']} ({sco['pages']} pages)")
+    log(profile_summary(package_profile, excluded, template))
+    log(f"{len(excluded_locales)} traductions du viewer exclues")
+    log(f"{len(excluded_cmaps)} CMaps ignorées ({sum(excluded_cmaps.values()) / 1024:.0f} Ko)")
+    log(package.stats.summary())
+    return package.stats
+
+
+# Chapitres d'après les signets de premier niveau : liste de (titre, première
+# page, page de fin exclue), indices à partir de 0. Les pages avant le premier
+# signet rejoignent le premier chapitre ; plusieurs signets sur la même page
+# n'en forment qu'un. Liste vide sans signets exploitables.
+def outline_chapters(pdf_path):
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(pdf_path, strict=False)
+    if reader.is_encrypted:
+        reader.decrypt("")
+    starts = {}
+    for entry in reader.outline:
+        # Les sous-niveaux sont des listes imbriquées
+        if isinstance(entry, list):
+            continue
+        try:
+            page = reader.get_destination_page_number(entry)
+        except Exception:
+            continue
+        if page is not None and page >= 0 and page not in starts:
+            starts[page] = str(entry.title or "").strip() or f"Chapitre {len(starts) + 1}"
+    pages = sorted(starts)
+    if not pages:
+        return []
+    bounds = [0] + pages[1:] + [len(reader.pages)]
+    return [(starts[page], bounds[i], bounds[i + 1]) for i, page in enumerate(pages)]
+
+
+# Écrit un PDF par chapitre dans `out_dir`. Les liens internes (vers une page
+# qui peut être dans un autre chapitre) sont retirés : seuls les liens URI
+# sont conservés, pour ne pas recopier tout le document dans chaque chapitre.
+def split_chapters(pdf_path, chapters, out_dir):
+    from PyPDF2 import PdfReader, PdfWriter
+    from PyPDF2.generic import ArrayObject, NameObject
+
+    reader = PdfReader(pdf_path, strict=False)
+    if reader.is_encrypted:
+        reader.decrypt("")
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    with stage("split", os.path.getsize(pdf_path)) as timer:
+        for number, (_, start, stop) in enumerate(chapters, 1):
+            writer = PdfWriter()
+            for index in range(start, stop):
+                page = writer.add_page(reader.pages[index])
+                if "/Annots" in page:
+                    kept = [annot for annot in page["/Annots"] if _keep_annotation(annot.get_object())]
+                    page[NameObject("/Annots")] = ArrayObject(kept)
+            path = os.path.join(out_dir, f"chapitre_{number:03d}.pdf")
+            with open(path, "wb") as f:
+                writer.write(f)
+            timer.add_bytes(os.path.getsize(path))
+            paths.append(path)
+    return paths
+
+
+def _keep_annotation(annot):
+    if annot.get("/Subtype") != "/Link":
+        return True
+    action = annot.get("/A")
+    return action is not None and action.get_object().get("/S") == "/URI"
+
+
+# Mode chapitres du convertisseur PDF : un SCO par chapitre du plan (signets),
+# durée minimale répartie au prorata des pages. Sans signets exploitables, le
+# document forme un seul SCO.
+def create_chapter_package(pdf_path, zip_path, module_title, work_dir, scorm_version="1.2",
+                           min_duration_str="00:05:00", completion_criteria=("temps", "pages"),
+                           package_profile=DEFAULT_PROFILE, viewer_locales=("fr",), keep_all_cmaps=False,
+                           linearize=False, search_index=False, log=None):
+    log = log or (lambda message: None)
+    min_seconds = parse_duration(min_duration_str)
+    chapters = outline_chapters(pdf_path)
+    if chapters:
+        total = chapters[-1][2]
+        paths = split_chapters(pdf_path, chapters, os.path.join(work_dir, "chapitres"))
+        documents = [
+            {"title": title, "pdf": path, "min_seconds": round(min_seconds * (stop - start) / total),
+             "criteria": completion_criteria}
+            for (title, start, stop), path in zip(chapters, paths)
+        ]
+        log(f"{len(chapters)} chapitres d'après les signets")
+    else:
+        documents = [{"title": module_title, "pdf": pdf_path, "min_seconds": min_seconds,
+                      "criteria": completion_criteria}]
+        log("Aucun signet exploitable : un seul SCO")
+    return create_course_package(documents, zip_path, module_title, scorm_version, package_profile, viewer_locales,
+                                 keep_all_cmaps, linearize, search_index, folder="chapitres", log=log)
+
+
+# Module à plusieurs documents : un SCO par document, dans l'ordre, tous sur
+# le même viewer. `sources` : liste de {"input", "title", "min_duration",
+# "criteria"} ; les documents texte (docx, odt, txt...) sont convertis en PDF
+# dans `work_dir`, les tableurs et présentations ne sont pas acceptés.
+# `prepare` (facultatif) reçoit le PDF de chaque document et son numéro, et
+# renvoie le PDF à livrer (optimisation...).
+def create_documents_package(sources, zip_path, module_title, work_dir, scorm_version="1.2",
+                             package_profile=DEFAULT_PROFILE, viewer_locales=("fr",), keep_all_cmaps=False,
+                             linearize=False, search_index=False, prepare=None, log=None):
+    from scorm_core.builders.document import convert_to_pdf, detect_file_category
+
+    log = log or (lambda message: None)
+    documents = []
+    for number, source in enumerate(sources, 1):
+        path = os.fspath(source["input"])
+        extension = os.path.splitext(path)[1].lstrip(".").lower()
+        if extension != "pdf":
+            if detect_file_category(extension) != "Textes":
+                raise ValueError(f"Document non convertible en PDF : {os.path.basename(path)}")
+            # Un dossier par document : deux sources peuvent porter le même nom
+            out_dir = os.path.join(work_dir, "convertis", f"{number:03d}")
+            os.makedirs(out_dir, exist_ok=True)
+            path = os.fspath(convert_to_pdf(path, extension, out_dir, Path(path).stem))
+        if prepare is not None:
+            path = prepare(path, number)
+        documents.append({
+            "title": source.get("title") or Path(source["input"]).stem, "pdf": path,
+            "min_seconds": parse_duration(source["min_duration"]), "criteria": source["criteria"],
+        })
+    log(f"{len(documents)} documents, un SCO chacun")
+    return create_course_package(documents, zip_path, module_title, scorm_version, package_profile, viewer_locales,
+                                 keep_all_cmaps, linearize, search_index, folder="documents", log=log)
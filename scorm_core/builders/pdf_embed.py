@@ -0,0 +1,302 @@
+import re
+
+from scorm_core.packaging import PackageWriter
+
+VALIDATION_CRITERIA = ["Lecture de toutes les pages", "Temps écoulé", "Les deux"]
+
+
+def parse_hms(hms_str):
+    match = re.match(r"^(\d{1,2}):(\d{2}):(\d{2})$", hms_str)
+    if not match:
+        return None
+    h, m, s = map(int, match.groups())
+    return h * 3600 + m * 60 + s
+
+
+# Package SCORM affichant le PDF via pdf.js (CDN) ou <embed>, selon le critère de validation.
+# `pdf_source` : chemin du PDF ou objet fichier (upload) nommé `pdf_filename`.
+def create_scorm_package(pdf_source, pdf_filename, zip_path, scorm_title, scorm_version,
+                         validation_criteria="Lecture de toutes les pages", time_str="00:00:00",
+                         printable=True, downloadable=True):
+    seconds_required = parse_hms(time_str) or 0
+
+    # Génération du fichier viewer.js avec gestion des boutons imprimer/télécharger
+    viewer_js_content = f"""
+// viewer.js - contrôle des boutons impression et téléchargement
+document.addEventListener("DOMContentLoaded", function() {{
+    const printBtn = document.getElementById('print');
+    const downloadBtn = document.getElementById('download');
+
+    if (printBtn) {{
+        {'printBtn.disabled = true;' if not printable else ''}
+        {'printBtn.style.display = "none";' if not printable else ''}
+    }}
+
+    if (downloadBtn) {{
+        {'downloadBtn.disabled = true;' if not downloadable else ''}
+        {'downloadBtn.style.display = "none";' if not downloadable else ''}
+    }}
+}});
+"""
+
+    # Génération du fichier index.html selon critère de validation
+    if validation_criteria == "Lecture de toutes les pages":
+        # Validation par lecture complète des pages uniquement
+        html_content = f"""<!DOCTYPE html>
+<html lang="fr">
+<head>
+  <meta charset="UTF-8" />
+  <title>{scorm_title}</title>
+  <style>
+    body {{ font-family: sans-serif; background: #f8f9fa; padding: 20px; }}
+    h1 {{ color: #333; }}
+    #validation-status {{ font-weight: bold; margin-bottom: 10px; color: green; }}
+    #pdf-container canvas {{ border: 1px solid #ccc; }}
+    button {{ margin: 5px; }}
+  </style>
+</head>
+<body>
+  <h1>{scorm_title}</h1>
+  <div id="validation-status">Pages lues: 0 / 0</div>
+
+  <div id="pdf-container"></div>
+  <button id="prev-page">Précédent</button>
+  <button id="next-page">Suivant</button>
+
+  <script src="https://cdnjs.cloudflare.com/ajax/libs/pdf.js/2.15.349/pdf.min.js"></script>
+  <script>
+    let pdfDoc = null;
+    let pagesRead = new Set();
+    let totalPages = 0;
+    let currentPage = 1;
+
+    const url = '{pdf_filename}';
+
+    const loadingTask = pdfjsLib.getDocument(url);
+    loadingTask.promise.then(function(pdf) {{
+      pdfDoc = pdf;
+      totalPages = pdf.numPages;
+      renderPage(1);
+      updateCompletion();
+    }});
+
+    function renderPage(num) {{
+      pdfDoc.getPage(num).then(function(page) {{
+        let viewport = page.getViewport({{scale:1.5}});
+        let canvas = document.getElementById('pdf-render');
+        if (!canvas) {{
+          canvas = document.createElement('canvas');
+          canvas.id = 'pdf-render';
+          document.getElementById('pdf-container').appendChild(canvas);
+        }}
+        let context = canvas.getContext('2d');
+        canvas.height = viewport.height;
+        canvas.width = viewport.width;
+
+        let renderContext = {{
+          canvasContext: context,
+          viewport: viewport
+        }};
+        page.render(renderContext).promise.then(() => {{
+          pagesRead.add(num);
+          updateCompletion();
+        }});
+      }});
+    }}
+
+    function updateCompletion() {{
+      const statusDiv = document.getElementById('validation-status');
+      if (pagesRead.size === totalPages) {{
+        statusDiv.textContent = "✅ Toutes les pages ont été lues.";
+        // Appel possible à l'API SCORM pour notifier la complétion
+      }} else {{
+        statusDiv.textContent = "Pages lues: " + pagesRead.size + " / " + totalPages;
+      }}
+    }}
+
+    document.getElementById('next-page').onclick = function() {{
+      if (currentPage < totalPages) {{
+        currentPage++;
+        renderPage(currentPage);
+      }}
+    }};
+
+    document.getElementById('prev-page').onclick = function() {{
+      if (currentPage > 1) {{
+        currentPage--;
+        renderPage(currentPage);
+      }}
+    }};
+  </script>
+</body>
+</html>
+"""
+    elif validation_criteria == "Temps écoulé":
+        # Validation par timer uniquement
+        download_attr = "download" if downloadable else ""
+        print_attr = ""  # Note: impossible de bloquer impression depuis embed HTML nativement
+        html_content = f"""<!DOCTYPE html>
+<html lang="fr">
+<head>
+  <meta charset="UTF-8" />
+  <title>{scorm_title}</title>
+  <style>
+    body {{ font-family: sans-serif; background: #f8f9fa; padding: 20px; }}
+    h1 {{ color: #333; }}
+    #timer {{ font-size: 3rem;
+    font-weight: 700;
+    color: #0078d4;
+    background: #e1f0ff;
+    padding: 20px 40px;
+    border-radius: 12px;
+    box-shadow: 0 4px 12px rgba(0,120,212,0.3);
+    user-select: none;
+    margin-bottom: 30px;
+    width: fit-content; }}
+    embed {{ width: 100%; height: 600px; border: 1px solid #ccc; }}
+  </style>
+</head>
+<body>
+  <h1>{scorm_title}</h1>
+  <div id="timer">Temps restant : {time_str}</div>
+  <embed src="{pdf_filename}" type="application/pdf" {download_attr} {print_attr}>
+
+  <script>
+    let remaining = {seconds_required};
+    const timerDiv = document.getElementById('timer');
+    const interval = setInterval(() => {{
+      if (remaining <= 0) {{
+        clearInterval(interval);
+        timerDiv.textContent = "✅ Temps écoulé. Module validé.";
+        // Appel à l'API SCORM pour marquer la complétion
+      }} else {{
+        remaining--;
+        let h = Math.floor(remaining / 3600);
+        let m = Math.floor((remaining % 3600) / 60);
+        let s = remaining % 60;
+        timerDiv.textContent = `Temps restant : ${{h.toString().padStart(2,'0')}}:${{m.toString().padStart(2,'0')}}:${{s.toString().padStart(2,'0')}}`;
+      }}
+    }}, 1000);
+  </script>
+</body>
+</html>
+"""
+    else:
+        # Les deux critères : lecture des pages + temps
+        html_content = f"""<!DOCTYPE html>
+<html lang="fr">
+<head>
+  <meta charset="UTF-8" />
+  <title>{scorm_title}</title>
+  <style>
+    body {{ font-family: sans-serif; background: #f8f9fa; padding: 20px; }}
+    h1 {{ color: #333; }}
+    #timer {{ font-size: 20px; font-weight: bold; margin-bottom: 10px; color: darkblue; }}
+    #validation-status {{ font-weight: bold; margin-bottom: 10px; color: green; }}
+    #pdf-container canvas {{ border: 1px solid #ccc; }}
+    button {{ margin: 5px; }}
+  </style>
+</head>
+<body>
+  <h1>{scorm_title}</h1>
+  <div id="timer">Temps restant : {time_str}</div>
+  <div id="validation-status">Pages lues: 0 / 0</div>
+
+  <div id="pdf-container"></div>
+  <button id="prev-page">Précédent</button>
+  <button id="next-page">Suivant</button>
+
+  <script src="https://cdnjs.cloudflare.com/ajax/libs/pdf.js/2.15.349/pdf.min.js"></script>
+  <script>
+    let pdfDoc = null;
+    let pagesRead = new Set();
+    let totalPages = 0;
+    let currentPage = 1;
+    let timerRemaining = {seconds_required};
+
+    const url = '{pdf_filename}';
+
+    const loadingTask = pdfjsLib.getDocument(url);
+    loadingTask.promise.then(function(pdf) {{
+      pdfDoc = pdf;
+      totalPages = pdf.numPages;
+      renderPage(1);
+      updateCompletion();
+    }});
+
+    function renderPage(num) {{
+      pdfDoc.getPage(num).then(function(page) {{
+        let viewport = page.getViewport({{scale:1.5}});
+        let canvas = document.getElementById('pdf-render');
+        if (!canvas) {{
+          canvas = document.createElement('canvas');
+          canvas.id = 'pdf-render';
+          document.getElementById('pdf-container').appendChild(canvas);
+        }}
+        let context = canvas.getContext('2d');
+        canvas.height = viewport.height;
+        canvas.width = viewport.width;
+
+        let renderContext = {{
+          canvasContext: context,
+          viewport: viewport
+        }};
+        page.render(renderContext).promise.then(() => {{
+          pagesRead.add(num);
+          updateCompletion();
+        }});
+      }});
+    }}
+
+    function updateCompletion() {{
+      const statusDiv = document.getElementById('validation-status');
+      if (pagesRead.size === totalPages && timerRemaining <= 0) {{
+        statusDiv.textContent = "✅ Toutes les pages ont été lues ET le temps est écoulé.";
+        // Appel API SCORM pour validation
+      }} else {{
+        statusDiv.textContent = "Pages lues: " + pagesRead.size + " / " + totalPages;
+      }}
+    }}
+
+    document.getElementById('next-page').onclick = function() {{
+      if (currentPage < totalPages) {{
+        currentPage++;
+        renderPage(currentPage);
+      }}
+    }};
+
+    document.getElementById('prev-page').onclick = function() {{
+      if (currentPage > 1) {{
+        currentPage--;
+        renderPage(currentPage);
+      }}
+    }};
+
+    // Timer
+    const timerDiv = document.getElementById('timer');
+    const interval = setInterval(() => {{
+      if (timerRemaining <= 0) {{
+        clearInterval(interval);
+        timerDiv.textContent = "✅ Temps écoulé.";
+        updateCompletion();
+      }} else {{
+        timerRemaining--;
+        let h = Math.floor(timerRemaining / 3600);
+        let m = Math.floor((timerRemaining % 3600) / 60);
+        let s = timerRemaining % 60;
+        timerDiv.textContent = `Temps restant : ${{h.toString().padStart(2,'0')}}:${{m.toString().padStart(2,'0')}}:${{s.toString().padStart(2,'0')}}`;
+      }}
+    }}, 1000);
+  </script>
+</body>
+</html>
+"""
+
+    # Création du fichier ZIP : le PDF est copié directement depuis sa source
+    with PackageWriter(zip_path) as package:
+        package.add_source(pdf_filename, pdf_source)
+        package.add_text("viewer.js", viewer_js_content)
+        package.add_text("index.html", html_content)
+        # imsmanifest.xml adapté à la version SCORM, listant les fichiers écrits
+        package.add_manifest(scorm_version, scorm_title, "index.html")
+    return package.stats
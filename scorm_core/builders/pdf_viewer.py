@@ -0,0 +1,171 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+
+from scorm_core.cmaps import cmap_exclusions, used_cmaps
+from scorm_core.linearize import first_page_end, linearize_available, linearize_pdf, viewer_range_script
+from scorm_core.locales import LOCALE_INDEX, link_viewer_locales, locale_exclusions, locale_properties
+from scorm_core.manifest import MANIFEST_NAME
+from scorm_core.metrics import stage
+from scorm_core.packaging import PackageWriter, SCORM_BASE_DIR
+from scorm_core.pdf_probe import probe_pdf
+from scorm_core.profiles import DEFAULT_PROFILE, profile_exclusions, profile_summary
+from scorm_core.search_index import INDEX_NAME, build_search_index, viewer_search_script
+from scorm_core.template_cache import template_archive
+
+
+def parse_duration(min_duration_str):
+    h, m, s = map(int, min_duration_str.split(":"))
+    return int(timedelta(hours=h, minutes=m, seconds=s).total_seconds())
+
+
+# Balise après laquelle les scripts de configuration du viewer sont insérés
+VIEWER_SCRIPT = '<script src="viewer.js"></script>'
+
+
+# Document ouvert au lancement : viewer.html ne le désigne pas, seule l'option
+# defaultUrl de viewer.js le fait (par défaut, le PDF de démonstration de pdf.js)
+def default_url_script(pdf_url):
+    return f"""<script>
+  PDFViewerApplicationOptions.set("defaultUrl", {json.dumps(pdf_url)});
+  </script>"""
+
+
+def _source_size(pdf_source):
+    return os.path.getsize(pdf_source) if isinstance(pdf_source, (str, os.PathLike)) else 0
+
+
+# CMaps des polices CID du PDF. Sans police Type0 possible, aucune CMap n'est
+# nécessaire et le PDF n'est pas analysé en entier.
+def _needed_cmaps(pdf_source, pdf_info):
+    if not pdf_info.may_have_cid_fonts:
+        return set()
+    from PyPDF2 import PdfReader
+
+    if hasattr(pdf_source, "seek"):
+        pdf_source.seek(0)
+    with stage("pdf_reader", _source_size(pdf_source)):
+        pdf_reader = PdfReader(pdf_source, strict=False)
+        if pdf_reader.is_encrypted:
+            pdf_reader.decrypt("")
+        return used_cmaps(pdf_reader)
+
+
+# Copie linéarisée du PDF, écrite à côté du package ; None si l'étape est
+# sautée (PDF déjà linéarisé, chiffré, ou ni pikepdf ni qpdf installé)
+def _linearized_copy(pdf_source, pdf_info, zip_path, log):
+    if pdf_info.linearized:
+        log("PDF déjà linéarisé : livré tel quel")
+        return None
+    if pdf_info.encrypted:
+        log("PDF chiffré : non linéarisé")
+        return None
+    if not linearize_available():
+        log("Linéarisation indisponible (pikepdf ou qpdf absent) : PDF livré tel quel")
+        return None
+
+    work_dir = os.path.dirname(os.path.abspath(zip_path))
+    fd, web_pdf = tempfile.mkstemp(suffix=".pdf", dir=work_dir)
+    os.close(fd)
+    source_path = pdf_source
+    try:
+        if not isinstance(pdf_source, (str, os.PathLike)):
+            fd, source_path = tempfile.mkstemp(suffix=".pdf", dir=work_dir)
+            with os.fdopen(fd, "wb") as f:
+                pdf_source.seek(0)
+                shutil.copyfileobj(pdf_source, f)
+        started = time.perf_counter()
+        linearize_pdf(source_path, web_pdf)
+    except Exception:
+        os.remove(web_pdf)
+        raise
+    finally:
+        if source_path is not pdf_source:
+            os.remove(source_path)
+    log(f"PDF linéarisé en {time.perf_counter() - started:.1f} s : page 1 affichable après "
+        f"{(first_page_end(web_pdf) or 0) / 1024:.0f} Ko sur {os.path.getsize(web_pdf) / 1024 / 1024:.1f} Mo")
+    return web_pdf
+
+
+# Package SCORM "viewer pdf.js" : le template scorm_base/ + le PDF.
+# `linearize` : affichage web rapide, PDF linéarisé et viewer configuré pour
+# le charger par plages.
+# `search_index` : texte des pages extrait ici (scorm_core/search_index.py),
+# la recherche du viewer n'analyse plus que les pages candidates.
+# `pdf_source` est un chemin ou un objet fichier ; `log` reçoit les lignes de bilan.
+def create_scorm_package(pdf_source, zip_path, module_title, scorm_version="1.2", min_duration_str="00:05:00",
+                         completion_criteria=("temps", "pages"), package_profile=DEFAULT_PROFILE,
+                         viewer_locales=("fr",), keep_all_cmaps=False, linearize=False, search_index=False,
+                         log=None):
+    log = log or (lambda message: None)
+    min_seconds = parse_duration(min_duration_str)
+
+    # Sonde légère : nombre de pages sans analyser tout le document
+    with stage("probe", _source_size(pdf_source)):
+        pdf_info = probe_pdf(pdf_source, with_sizes=False, scan_fonts=not keep_all_cmaps)
+    num_pages = pdf_info.page_count
+
+    with stage("viewer_html") as timer, open(os.path.join(SCORM_BASE_DIR, "web", "viewer.html"), "r",
+                                              encoding="utf-8") as f:
+        viewer_html = f.read()
+        viewer_html = viewer_html.replace("print", "")
+        viewer_html = viewer_html.replace("download", "")
+        viewer_html = link_viewer_locales(viewer_html)
+        viewer_html = viewer_html.replace(VIEWER_SCRIPT, f"{VIEWER_SCRIPT}\n  {default_url_script('document.pdf')}")
+        if linearize:
+            viewer_html = viewer_html.replace(VIEWER_SCRIPT, f"{VIEWER_SCRIPT}\n  {viewer_range_script()}")
+        if search_index:
+            viewer_html = viewer_html.replace(VIEWER_SCRIPT, f"{VIEWER_SCRIPT}\n  {viewer_search_script()}")
+        timer.add_bytes(len(viewer_html))
+
+    scorm_js = f"""
+// Placeholder SCORM logic
+var required_time = {min_seconds};
+var required_pages = {num_pages if 'pages' in completion_criteria else 0};
+function checkCompletion(timeSpent, pagesViewed) {{
+  if ({'true' if 'temps' in completion_criteria else 'false'} && timeSpent < required_time) return false;
+  if ({'true' if 'pages' in completion_criteria else 'false'} && pagesViewed < required_pages) return false;
+  return true;
+}}
+                """
+
+    # Écriture directe dans le ZIP : les membres du template sont recopiés
+    # déjà compressés, seuls le PDF et les fichiers générés sont compressés ici
+    generated = {
+        "web/viewer.html": viewer_html,
+        "scorm.js": scorm_js,
+        LOCALE_INDEX: locale_properties(viewer_locales),
+    }
+    needed_cmaps = None if keep_all_cmaps else _needed_cmaps(pdf_source, pdf_info)
+    with stage("template"):
+        template = template_archive()
+        excluded = profile_exclusions(template, package_profile, viewer_html)
+        excluded_locales = locale_exclusions(template, viewer_locales)
+        excluded_cmaps = cmap_exclusions(template, needed_cmaps)
+    skip = {MANIFEST_NAME} | set(generated) | set(excluded) | set(excluded_locales) | set(excluded_cmaps)
+    index = build_search_index(pdf_source, num_pages) if search_index else None
+    web_pdf = _linearized_copy(pdf_source, pdf_info, zip_path, log) if linearize else None
+    try:
+        with PackageWriter(zip_path) as package:
+            package.add_archive(template, skip=skip)
+            package.add_source("web/document.pdf", web_pdf or pdf_source)
+            for arcname, content in generated.items():
+                package.add_text(arcname, content)
+            if index:
+                package.add_bytes(INDEX_NAME, index[0])
+            # Manifeste exact : liste des fichiers réellement livrés après élagage
+            package.add_manifest(scorm_version, module_title, "web/viewer.html")
+    finally:
+        if web_pdf:
+            os.remove(web_pdf)
+
+    if index:
+        log(f"Index de recherche : {index[1]}/{num_pages} pages avec texte ({len(index[0]) / 1024:.0f} Ko)")
+    log(profile_summary(package_profile, excluded, template))
+    log(f"{len(excluded_locales)} traductions du viewer exclues")
+    log(f"{len(excluded_cmaps)} CMaps ignorées ({sum(excluded_cmaps.values()) / 1024:.0f} Ko)")
+    log(package.stats.summary())
+    return package.stats
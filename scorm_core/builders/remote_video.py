@@ -0,0 +1,142 @@
+import os
+import re
+
+from scorm_core.packaging import PackageWriter, REPO_DIR
+
+
+def extract_video_info(url):
+    url = url.strip()
+    if "youtube.com/watch" in url or "youtu.be/" in url:
+        m = re.search(r'(?:v=|youtu\.be/)([A-Za-z0-9_-]{11})', url)
+        video_id = m.group(1) if m else None
+        return video_id, "youtube"
+    elif "dailymotion.com/video" in url:
+        m = re.search(r'dailymotion\.com/video/([A-Za-z0-9]+)', url)
+        video_id = m.group(1) if m else None
+        return video_id, "dailymotion"
+    else:
+        return None, None
+
+def create_scorm_package(video_url, zip_path, version, scorm_title="Mon Cours Vidéo SCORM", completion_rate=80):
+    video_id, provider = extract_video_info(video_url)
+    if not video_id or not provider:
+        raise ValueError("URL vidéo non supportée. Fournissez une URL YouTube ou Dailymotion valide.")
+
+    html_content = f"""<!DOCTYPE html>
+<html lang="fr">
+<head>
+  <meta charset="UTF-8" />
+  <script src="js/wrapper.js"></script>
+  <title>{scorm_title}</title>
+  <link rel="stylesheet" href="https://cdn.plyr.io/3.7.8/plyr.css" />
+  <style>
+    body {{
+      font-family: Arial, sans-serif;
+      background-color: #222;
+      color: #eee;
+      padding: 20px;
+      text-align: center;
+    }}
+    .player-container {{
+      width: 80%;
+      max-width: 800px;
+      margin: auto;
+    }}
+    #player {{
+      aspect-ratio: 16 / 9;
+      width: 100%;
+      max-width: 800px;
+      margin: auto;
+    }}
+    #completion-message {{
+      margin-top: 20px;
+      font-weight: bold;
+      color: #4caf50;
+      display: none;
+    }}
+  </style>
+</head>
+<body>
+  <h1>{scorm_title}</h1>
+  <p id="completion-message">🎉 Vous avez terminé la vidéo</p>
+  <div class="player-container">
+    <div class="plyr__video-embed" id="player">
+      <iframe
+        src="https://www.youtube.com/embed/{video_id}?origin=localhost&iv_load_policy=3&modestbranding=1"
+        allowfullscreen
+        allowtransparency
+        allow="autoplay"
+      ></iframe>
+    </div>
+  </div>
+  <script src="https://cdn.plyr.io/3.7.8/plyr.polyfilled.js"></script>
+  <script>
+    console.log('Initialisation du player Plyr');
+
+    const completionRate = {completion_rate};
+    const message = document.getElementById('completion-message');
+    let completed = false;
+
+    // Déclaration globale des variables pour contrôle du seeking
+    let maxTimeReached = 0;
+    let seekingBlocked = false;
+
+    const player = new Plyr('#player', {{
+      type: '{provider}',
+      sources: [{{
+        src: '{video_id}',
+        provider: '{provider}'
+      }}],
+      controls: ['play', 'progress', 'current-time', 'mute', 'volume', 'fullscreen'],
+    }});
+
+    player.on('ready', () => console.log('Player prêt'));
+    player.on('error', event => console.error('Erreur du player', event));
+
+    player.on('timeupdate', event => {{
+      const currentTime = player.currentTime;
+      const duration = player.duration || 0;
+
+      if (currentTime > maxTimeReached) {{
+        maxTimeReached = currentTime;
+      }}
+
+      if (!completed && duration > 0 && (currentTime / duration) * 100 >= completionRate) {{
+        completed = true;
+        message.style.display = 'block';
+        console.log('🎉 Vidéo complétée');
+
+        if (typeof setCompleted === "function") {{
+          setCompleted(); // Appelle wrapper.js pour notifier le LMS
+        }}
+      }}
+    }});
+
+    player.on('seeking', event => {{
+      if (seekingBlocked) {{
+        seekingBlocked = false;
+        return;
+      }}
+      const seekTime = player.currentTime;
+      if (seekTime > maxTimeReached) {{
+        seekingBlocked = true;
+        player.currentTime = maxTimeReached;
+        console.log(`Avance bloquée à ${{maxTimeReached.toFixed(2)}}s`);
+      }}
+    }});
+  </script>
+</body>
+</html>"""
+
+    # Le vrai wrapper.js est copié dans le package
+    src_wrapper_path = os.path.join(REPO_DIR, 'wrapper.js')
+
+    if not os.path.isfile(src_wrapper_path):
+        raise FileNotFoundError(f"Le fichier wrapper.js est introuvable au chemin : {src_wrapper_path}")
+
+    with PackageWriter(zip_path) as package:
+        package.add_file('js/wrapper.js', src_wrapper_path)
+        package.add_text('index.html', html_content)
+        # Créer le fichier imsmanifest.xml
+        package.add_manifest(version, scorm_title, 'index.html')
+    return package.stats
@@ -0,0 +1,315 @@
+import argparse
+import csv
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from scorm_core import metrics, packaging, search_index
+from scorm_core.builders.dispatch import DEFAULT_OPTIONS, build
+from scorm_core.pdf_optimize import format_report
+from scorm_core.profiles import PROFILES
+from scorm_core.workspace import default_workspace
+
+# Conversion par lot, sans interface :
+#
+#   python -m scorm_core.cli documents/ -o packages/ --version 2004 --workers 4
+#   python -m scorm_core.cli jobs.csv -o packages/
+#   python -m scorm_core.cli documents/ -o packages/ --course --title "Formation sécurité"
+#
+# Le CSV contient une colonne `input` (chemin ou URL de vidéo distante) et,
+# facultativement, `title`, `kind`, `output` et toute option de la ligne de
+# commande (`version`, `completion_rate`, `min_duration`...) pour la surcharger.
+#
+# Avec --course, les PDF et documents texte forment un seul package, un SCO par
+# document sur un viewer partagé ; `title`, `min_duration` et `criteria` d'une
+# ligne de CSV s'appliquent à son SCO.
+
+MEDIA_KINDS = {".pdf": "pdf", ".mp3": "mp3", ".mp4": "mp4"}
+SUBTITLE_EXTENSIONS = {".srt", ".vtt"}
+
+# Options surchargeables par ligne de CSV, avec leur conversion
+OPTION_TYPES = {
+    "version": str,
+    "completion_rate": int,
+    "min_duration": str,
+    "criteria": lambda value: [c for c in value.split(",") if c],
+    "profile": str,
+    "locales": lambda value: [c for c in value.split(",") if c],
+    "keep_all_cmaps": lambda value: value.strip().lower() in ("1", "true", "oui", "yes"),
+    "linearize": lambda value: value.strip().lower() in ("1", "true", "oui", "yes"),
+    "search_index": lambda value: value.strip().lower() in ("1", "true", "oui", "yes"),
+    "chapters": lambda value: value.strip().lower() in ("1", "true", "oui", "yes"),
+    "optimize": lambda value: value.strip().lower() in ("1", "true", "oui", "yes"),
+    "optimize_dpi": int,
+    "optimize_quality": int,
+    "optimize_target_mb": float,
+    "validation": str,
+    "printable": lambda value: value.strip().lower() in ("1", "true", "oui", "yes"),
+    "downloadable": lambda value: value.strip().lower() in ("1", "true", "oui", "yes"),
+}
+
+
+def detect_kind(input_ref, pdf_builder="pdf"):
+    if re.match(r"^https?://", input_ref):
+        return "remote_video"
+    extension = Path(input_ref).suffix.lower()
+    if extension == ".pdf":
+        return pdf_builder
+    if extension in MEDIA_KINDS:
+        return MEDIA_KINDS[extension]
+    from scorm_core.builders.document import allowed_extensions
+    if extension.lstrip(".") in allowed_extensions:
+        return "document"
+    return None
+
+
+def _safe_name(name):
+    return re.sub(r"[^\w\-]", "_", name)
+
+
+# Sous-titres "<nom>_<langue>.srt|vtt" posés à côté d'un média
+def _sidecar_subtitles(media_path):
+    media_path = Path(media_path)
+    return sorted(
+        str(path) for path in media_path.parent.glob(f"{media_path.stem}_*")
+        if path.suffix.lower() in SUBTITLE_EXTENSIONS
+    )
+
+
+# Package nommé d'après le fichier, extension comprise (cours.pdf et
+# cours.docx ne se confondent pas), dans la même arborescence sous
+# `output_dir` que sous `base_dir` (a/intro.pdf et b/intro.pdf non plus)
+def _job(input_ref, options, output_dir, title=None, kind=None, output=None, base_dir=None):
+    kind = kind or detect_kind(input_ref, "pdf_embed" if options["pdf_builder"] == "embed" else "pdf")
+    if title is None:
+        title = "Vidéo distante" if kind == "remote_video" else Path(input_ref).stem
+    if output is None:
+        subdir = ""
+        if kind != "remote_video" and base_dir is not None:
+            subdir = os.path.relpath(os.path.dirname(os.path.abspath(input_ref)), base_dir)
+            if subdir.split(os.sep)[0] == os.pardir:
+                subdir = ""
+        name = _safe_name(title if kind == "remote_video" else Path(input_ref).name)
+        output = os.path.normpath(os.path.join(
+            output_dir, subdir, f"{name}_SCORM_{options['version'].replace('.', '_')}.zip"))
+    job = {"input": input_ref, "kind": kind, "title": title, "output": output, "options": dict(options)}
+    if kind in ("mp3", "mp4"):
+        job["subtitles"] = _sidecar_subtitles(input_ref)
+    return job
+
+
+# Deux tâches écrivant le même package se remplaceraient (et partageraient
+# leur fichier .part) : refusé avant de lancer quoi que ce soit
+def _check_outputs(jobs):
+    seen = {}
+    for job in jobs:
+        output = os.path.normcase(os.path.abspath(job["output"]))
+        if output in seen:
+            raise ValueError(f"Même package de sortie {job['output']} pour {seen[output]} et {job['input']}")
+        seen[output] = job["input"]
+    return jobs
+
+
+def discover_jobs(input_path, options, output_dir):
+    if os.path.isdir(input_path):
+        jobs = []
+        base_dir = os.path.abspath(input_path)
+        for path in sorted(Path(input_path).rglob("*")):
+            if path.is_file() and path.suffix.lower() not in SUBTITLE_EXTENSIONS and detect_kind(str(path)):
+                jobs.append(_job(str(path), options, output_dir, base_dir=base_dir))
+        return _check_outputs(jobs)
+
+    jobs = []
+    base_dir = os.path.dirname(os.path.abspath(input_path))
+    with open(input_path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            input_ref = (row.get("input") or "").strip()
+            if not input_ref:
+                continue
+            if not re.match(r"^https?://", input_ref) and not os.path.isabs(input_ref):
+                input_ref = os.path.join(base_dir, input_ref)
+            row_options = dict(options)
+            for name, convert in OPTION_TYPES.items():
+                if row.get(name):
+                    row_options[name] = convert(row[name])
+            jobs.append(_job(
+                input_ref, row_options, output_dir,
+                title=row.get("title") or None, kind=row.get("kind") or None, output=row.get("output") or None,
+                base_dir=base_dir,
+            ))
+    return _check_outputs(jobs)
+
+
+# Tous les documents trouvés dans un seul package (voir builders/pdf_course.py) ;
+# les médias et vidéos distantes en sont écartés
+def course_job(jobs, options, output_dir, input_path, title=None):
+    documents = [job for job in jobs if job["kind"] in ("pdf", "pdf_embed", "document")]
+    for job in jobs:
+        if job not in documents:
+            print(f"Hors module ({job['kind']}) : {job['input']}", file=sys.stderr)
+    if not documents:
+        return None
+    title = title or Path(os.path.abspath(input_path)).stem
+    output = os.path.join(output_dir, f"{_safe_name(title)}_SCORM_{options['version'].replace('.', '_')}.zip")
+    return {
+        "input": [job["input"] for job in documents], "kind": "course", "title": title, "output": output,
+        "options": dict(options), "label": input_path,
+        "documents": [{"title": job["title"], "min_duration": job["options"]["min_duration"],
+                       "criteria": job["options"]["criteria"]} for job in documents],
+    }
+
+
+# Exécuté dans un processus du pool : construit dans un fichier .part puis
+# renomme, pour qu'un package présent soit toujours complet (reprise sûre)
+def run_job(job, force=False):
+    # Un module de plusieurs documents est désigné par son dossier ou son CSV
+    result = {"input": job.get("label", job["input"]), "output": job["output"], "kind": job["kind"]}
+    if not force and os.path.exists(job["output"]):
+        return {**result, "status": "ignoré", "seconds": 0.0, "size": os.path.getsize(job["output"])}
+    started = time.perf_counter()
+    part_path = f"{job['output']}.part"
+    # Étapes mesurées dans ce processus, renvoyées avec le résultat ; le
+    # journal du convertisseur et les statistiques d'optimisation des PDF aussi
+    lines = []
+    optimization = []
+    with metrics.conversion(job["kind"]) as collector:
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(job["output"])), exist_ok=True)
+            with default_workspace().job("batch_") as work_dir:
+                build({**job, "output": part_path}, work_dir, log=lines.append, on_optimized=optimization.append)
+            os.replace(part_path, job["output"])
+            return {**result, "status": "ok", "seconds": time.perf_counter() - started,
+                    "size": os.path.getsize(job["output"]), "stages": collector.stages, "log": lines,
+                    "optimization": optimization}
+        except Exception as e:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            return {**result, "status": "échec", "seconds": time.perf_counter() - started, "size": 0,
+                    "error": f"{type(e).__name__}: {e}", "stages": collector.stages, "log": lines,
+                    "optimization": optimization}
+
+
+# Chaque processus compresse sur un seul thread : le parallélisme vient du
+# pool ; l'extraction de texte se partage les processeurs restants
+def _init_worker(processes=1):
+    packaging.ZIP_WORKERS = 1
+    search_index.INDEX_WORKERS = max(1, (os.cpu_count() or 1) // processes)
+
+
+def print_summary(results, out=sys.stdout):
+    for result in results:
+        line = (f"{result['status']:<7} {result['seconds']:7.1f} s {result['size'] / 1024 / 1024:8.1f} Mo  "
+                f"{result['input']}")
+        if result.get("error"):
+            line += f"  -> {result['error']}"
+        print(line, file=out)
+        for stats in result.get("optimization", []):
+            print(f"{'':<18}{format_report(stats)}", file=out)
+    counts = {status: sum(1 for r in results if r["status"] == status) for status in ("ok", "ignoré", "échec")}
+    print(f"{len(results)} tâches : {counts['ok']} construites, {counts['ignoré']} déjà présentes, "
+          f"{counts['échec']} en échec", file=out)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m scorm_core.cli", description="Conversion SCORM par lot")
+    parser.add_argument("input", help="Dossier de fichiers à convertir ou CSV de tâches")
+    parser.add_argument("-o", "--output-dir", default="scorm_packages")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Nombre de processus")
+    parser.add_argument("--force", action="store_true", help="Reconstruire les packages déjà présents")
+    parser.add_argument("--version", default=DEFAULT_OPTIONS["version"], choices=["1.2", "2004"])
+    parser.add_argument("--completion-rate", type=int, default=DEFAULT_OPTIONS["completion_rate"],
+                        help="Audio/vidéo : taux de complétion (%%)")
+    parser.add_argument("--min-duration", default=DEFAULT_OPTIONS["min_duration"],
+                        help="PDF/documents : durée minimale HH:MM:SS")
+    parser.add_argument("--criteria", default=DEFAULT_OPTIONS["criteria"], type=OPTION_TYPES["criteria"],
+                        help="PDF : critères de complétude (temps,pages)")
+    parser.add_argument("--profile", default=DEFAULT_OPTIONS["profile"], choices=PROFILES)
+    parser.add_argument("--locales", default=DEFAULT_OPTIONS["locales"], type=OPTION_TYPES["locales"],
+                        help="Langues du viewer PDF")
+    parser.add_argument("--keep-all-cmaps", action="store_true")
+    parser.add_argument("--linearize", action="store_true",
+                        help="PDF viewer : linéariser le PDF et le charger par plages (affichage web rapide)")
+    parser.add_argument("--no-search-index", dest="search_index", action="store_false",
+                        help="PDF viewer : ne pas construire l'index de recherche des pages")
+    parser.add_argument("--chapters", action="store_true",
+                        help="PDF viewer : un SCO par chapitre d'après les signets, viewer partagé")
+    parser.add_argument("--course", action="store_true",
+                        help="PDF et documents texte réunis dans un seul package, un SCO par document")
+    parser.add_argument("--title", help="--course : titre du module (défaut : nom du dossier ou du CSV)")
+    parser.add_argument("--optimize", action="store_true",
+                        help="PDF : réduire les images au-delà de --optimize-dpi et recompresser les flux")
+    parser.add_argument("--optimize-dpi", type=int, default=DEFAULT_OPTIONS["optimize_dpi"])
+    parser.add_argument("--optimize-quality", type=int, default=DEFAULT_OPTIONS["optimize_quality"],
+                        help="Qualité JPEG des images réencodées (1-95)")
+    parser.add_argument("--optimize-target-mb", type=float, default=DEFAULT_OPTIONS["optimize_target_mb"],
+                        help="Taille visée par PDF (Mo), 0 : aucune")
+    parser.add_argument("--pdf-builder", default="viewer", choices=["viewer", "embed"],
+                        help="viewer : pdf.js embarqué (app.py) ; embed : page simple (equivalent_python.py)")
+    parser.add_argument("--validation", default=DEFAULT_OPTIONS["validation"],
+                        help="PDF embed : critère de validation")
+    parser.add_argument("--no-print", dest="printable", action="store_false")
+    parser.add_argument("--no-download", dest="downloadable", action="store_false")
+    parser.add_argument("--json-logs", action="store_true",
+                        help="Journal JSON des conversions et de leurs étapes sur la sortie d'erreur")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    options = {
+        "version": args.version,
+        "completion_rate": args.completion_rate,
+        "min_duration": args.min_duration,
+        "criteria": args.criteria,
+        "profile": args.profile,
+        "locales": args.locales,
+        "keep_all_cmaps": args.keep_all_cmaps,
+        "linearize": args.linearize,
+        "search_index": args.search_index,
+        "chapters": args.chapters,
+        "optimize": args.optimize,
+        "optimize_dpi": args.optimize_dpi,
+        "optimize_quality": args.optimize_quality,
+        "optimize_target_mb": args.optimize_target_mb,
+        "pdf_builder": args.pdf_builder,
+        "validation": args.validation,
+        "printable": args.printable,
+        "downloadable": args.downloadable,
+    }
+    try:
+        jobs = discover_jobs(args.input, options, args.output_dir)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if args.course:
+        course = course_job(jobs, options, args.output_dir, args.input, args.title)
+        jobs = [course] if course else []
+    if not jobs:
+        print("Aucun fichier à convertir.", file=sys.stderr)
+        return 1
+
+    if args.json_logs:
+        metrics.configure_logging()
+    results = []
+    workers = max(1, args.workers)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(workers,)) as pool:
+        futures = {pool.submit(run_job, job, args.force): job for job in jobs}
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if result["status"] != "ignoré":
+                metrics.record_conversion(result["kind"], "done" if result["status"] == "ok" else "failed",
+                                          result["seconds"], result["stages"], input=result["input"])
+            print(f"[{len(results)}/{len(jobs)}] {result['status']} {result['input']}", file=sys.stderr)
+
+    order = {job.get("label", job["input"]): index for index, job in enumerate(jobs)}
+    results.sort(key=lambda r: order[r["input"]])
+    print_summary(results)
+    return 0 if all(r["status"] != "échec" for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+import posixpath
+import zipfile
+
+# Dossier des CMaps binaires de pdf.js dans le template
+CMAP_DIR = "web/cmaps"
+
+# Encodages gérés par pdf.js sans fichier .bcmap
+BUILTIN_CMAPS = {"Identity-H", "Identity-V"}
+
+# Collections Adobe pour lesquelles pdf.js charge la CMap <Registry>-<Ordering>-UCS2
+# afin de reconstruire le texte (recherche, copier-coller)
+UCS2_ORDERINGS = {"GB1", "CNS1", "Japan1", "Korea1"}
+
+
+def _resolve(obj):
+    return obj.get_object() if hasattr(obj, "get_object") else obj
+
+
+def _name(obj):
+    return str(obj).lstrip("/")
+
+
+def _font_cmaps(font, needed):
+    font = _resolve(font)
+    if font.get("/Subtype") != "/Type0":
+        return
+    encoding = _resolve(font.get("/Encoding"))
+    if hasattr(encoding, "get_data"):
+        # CMap embarquée : seule sa CMap parente éventuelle est à livrer
+        if "/UseCMap" in encoding:
+            needed.add(_name(_resolve(encoding["/UseCMap"])))
+    elif encoding is not None:
+        needed.add(_name(encoding))
+    for descendant in _resolve(font.get("/DescendantFonts", [])):
+        info = _resolve(_resolve(descendant).get("/CIDSystemInfo", {}))
+        registry, ordering = str(info.get("/Registry", "")), str(info.get("/Ordering", ""))
+        if registry == "Adobe" and ordering in UCS2_ORDERINGS:
+            needed.add(f"Adobe-{ordering}-UCS2")
+
+
+def _resources_cmaps(resources, needed, seen):
+    resources = _resolve(resources)
+    if not resources or id(resources) in seen:
+        return
+    seen.add(id(resources))
+    for font in _resolve(resources.get("/Font", {})).values():
+        _font_cmaps(font, needed)
+    # Les formulaires (XObject /Form) ont leurs propres ressources
+    for xobject in _resolve(resources.get("/XObject", {})).values():
+        xobject = _resolve(xobject)
+        if xobject.get("/Subtype") == "/Form" and "/Resources" in xobject:
+            _resources_cmaps(xobject["/Resources"], needed, seen)
+
+
+# Noms des CMaps utilisées par les polices CID du PDF (PdfReader PyPDF2).
+# Retourne None si l'analyse échoue : dans le doute, toutes les CMaps sont livrées.
+def used_cmaps(pdf_reader):
+    needed = set()
+    seen = set()
+    try:
+        for page in pdf_reader.pages:
+            _resources_cmaps(page.get("/Resources"), needed, seen)
+            for annot in _resolve(page.get("/Annots", [])):
+                appearance = _resolve(_resolve(annot).get("/AP", {}))
+                normal = _resolve(appearance.get("/N")) if appearance else None
+                if normal is not None and hasattr(normal, "get") and "/Resources" in normal:
+                    _resources_cmaps(normal["/Resources"], needed, seen)
+    except Exception:
+        return None
+    return needed - BUILTIN_CMAPS
+
+
+# Ajoute les CMaps parentes (usecmap) : leur nom figure en clair dans le .bcmap,
+# précédé de sa longueur
+def _with_dependencies(archive, available, needed):
+    result = set()
+    todo = [name for name in needed if name in available]
+    while todo:
+        name = todo.pop()
+        if name in result:
+            continue
+        result.add(name)
+        data = archive.read(posixpath.join(CMAP_DIR, f"{name}.bcmap"))
+        todo.extend(
+            other for other in available
+            if other not in result and bytes([len(other)]) + other.encode("ascii") in data
+        )
+    return result
+
+
+# Fichiers .bcmap à exclure (avec leur taille). `needed` à None : on garde tout.
+def cmap_exclusions(archive_path, needed):
+    if needed is None:
+        return {}
+    with zipfile.ZipFile(archive_path) as archive:
+        infos = {
+            posixpath.basename(info.filename)[:-len(".bcmap")]: info
+            for info in archive.infolist()
+            if posixpath.dirname(info.filename) == CMAP_DIR and info.filename.endswith(".bcmap")
+        }
+        keep = _with_dependencies(archive, set(infos), needed)
+    return {info.filename: info.file_size for name, info in infos.items() if name not in keep}
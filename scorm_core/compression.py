@@ -0,0 +1,97 @@
+import math
+import os
+import zipfile
+from collections import Counter
+
+# Taille de l'échantillon lu en tête de fichier pour estimer l'entropie
+SAMPLE_SIZE = 256 * 1024
+
+# Formats déjà compressés : les dégonfler ne fait que consommer du CPU
+STORED_EXTENSIONS = {
+    ".mp4", ".m4v", ".mov", ".webm", ".mkv",
+    ".mp3", ".m4a", ".aac", ".ogg", ".opus",
+    ".png", ".jpg", ".jpeg", ".gif", ".webp",
+    ".zip", ".gz", ".bz2", ".xz", ".7z",
+    ".woff", ".woff2",
+    ".docx", ".xlsx", ".pptx", ".odt", ".ods", ".odp",
+}
+
+# Formats texte : toujours compressibles, inutile d'échantillonner
+TEXT_EXTENSIONS = {
+    ".html", ".htm", ".js", ".css", ".xml", ".xsd", ".json", ".map",
+    ".properties", ".txt", ".csv", ".svg", ".vtt", ".srt",
+}
+
+DEFAULT_LEVEL = 6
+FAST_LEVEL = 1
+
+# Au-delà de ce seuil (bits par octet) le contenu est considéré comme
+# incompressible ; entre les deux seuils on dégonfle au niveau le plus rapide
+STORED_ENTROPY = 7.5
+FAST_ENTROPY = 6.0
+
+
+# Entropie de Shannon de l'échantillon, en bits par octet (0 à 8)
+def sample_entropy(sample):
+    if not sample:
+        return 0.0
+    total = len(sample)
+    return -sum(c / total * math.log2(c / total) for c in Counter(sample).values())
+
+
+# Choisit (méthode, niveau) pour un membre à partir de son extension et,
+# pour les formats ambigus (PDF, .bcmap, inconnus...), d'un échantillon de tête
+def choose_compression(arcname, sample=None):
+    extension = os.path.splitext(str(arcname))[1].lower()
+    if extension in STORED_EXTENSIONS:
+        return zipfile.ZIP_STORED, None
+    if extension in TEXT_EXTENSIONS or sample is None or len(sample) < 1024:
+        return zipfile.ZIP_DEFLATED, DEFAULT_LEVEL
+    entropy = sample_entropy(sample)
+    if entropy >= STORED_ENTROPY:
+        return zipfile.ZIP_STORED, None
+    if entropy >= FAST_ENTROPY:
+        return zipfile.ZIP_DEFLATED, FAST_LEVEL
+    return zipfile.ZIP_DEFLATED, DEFAULT_LEVEL
+
+
+# Variante pour les archives construites une seule fois (cache du template) :
+# mêmes choix, mais compression maximale quand on dégonfle
+def archival_compression(arcname, sample=None):
+    compress_type, level = choose_compression(arcname, sample)
+    if compress_type == zipfile.ZIP_DEFLATED:
+        level = 9
+    return compress_type, level
+
+
+# Bilan de compression d'un package : octets économisés et temps CPU dépensé
+class CompressionStats:
+    def __init__(self):
+        self.members = 0
+        self.stored = 0
+        self.spliced = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    def record(self, info, cpu_seconds=0.0, spliced=False):
+        self.members += 1
+        self.bytes_in += info.file_size
+        self.bytes_out += info.compress_size
+        self.cpu_seconds += cpu_seconds
+        if info.compress_type == zipfile.ZIP_STORED:
+            self.stored += 1
+        if spliced:
+            self.spliced += 1
+
+    @property
+    def bytes_saved(self):
+        return self.bytes_in - self.bytes_out
+
+    def summary(self):
+        return (
+            f"{self.members} fichiers ({self.stored} stockés sans compression, "
+            f"{self.spliced} recopiés pré-compressés) : "
+            f"{self.bytes_saved / 1024 / 1024:.1f} Mo économisés, "
+            f"{self.cpu_seconds:.2f} s CPU de compression"
+        )
@@ -0,0 +1,115 @@
+import os
+import threading
+import time
+import uuid
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, urlsplit
+
+from scorm_core.packaging import CHUNK_SIZE
+
+# Au-delà de cette taille, le package n'est plus passé à st.download_button
+# (qui le garde entièrement en mémoire) mais servi depuis le disque, par blocs,
+# par un petit serveur HTTP du processus. Le serveur statique de Streamlit ne
+# convient pas : il refuse les fichiers de plus de 200 Mo.
+INLINE_MAX_BYTES = int(os.environ.get("SCORM_INLINE_DOWNLOAD_MB", "32")) * 1024 * 1024
+# Durée de validité d'un lien de téléchargement
+PUBLISHED_TTL = int(os.environ.get("SCORM_DOWNLOAD_TTL_MINUTES", "60")) * 60
+# Port du serveur de téléchargement ; s'il est pris (plusieurs pages lancées
+# sur la même machine), un port libre est choisi
+DOWNLOAD_PORT = int(os.environ.get("SCORM_DOWNLOAD_PORT", "8600"))
+DOWNLOAD_HOST = os.environ.get("SCORM_DOWNLOAD_HOST", "0.0.0.0")
+# URL publique du serveur, à définir derrière un proxy HTTPS : le serveur
+# intégré ne parle que HTTP, et le navigateur bloque un lien http:// depuis une
+# page https://. Par défaut : http://, même hôte que la page, port du serveur
+DOWNLOAD_URL = os.environ.get("SCORM_DOWNLOAD_URL")
+SESSION_KEY = "scorm_downloads"
+
+# Fichiers publiés : jeton -> (chemin, nom proposé, type MIME, expiration)
+_published = {}
+_lock = threading.Lock()
+_server = None
+
+
+class _DownloadHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        token = self.path.lstrip("/").split("/")[0]
+        with _lock:
+            path, file_name, mime, expires = _published.get(token, (None, None, None, 0))
+        if expires < time.time():
+            self.send_error(404, "Lien de téléchargement expiré")
+            return
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            self.send_error(404, "Package plus disponible")
+            return
+        with f:
+            self.send_response(200)
+            self.send_header("Content-Type", mime)
+            self.send_header("Content-Length", str(os.fstat(f.fileno()).st_size))
+            self.send_header("Content-Disposition", f"attachment; filename*=UTF-8''{quote(file_name)}")
+            self.end_headers()
+            try:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    self.wfile.write(chunk)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Démarre (une fois par processus) le serveur de téléchargement
+def ensure_server():
+    global _server
+    with _lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((DOWNLOAD_HOST, DOWNLOAD_PORT), _DownloadHandler)
+            except OSError:
+                _server = ThreadingHTTPServer((DOWNLOAD_HOST, 0), _DownloadHandler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="scorm-downloads", daemon=True).start()
+    return _server
+
+
+# Publie un fichier (sans copie : le serveur le lit à son emplacement) ;
+# retourne son URL, sur l'hôte de `page_url`, et son expiration (PUBLISHED_TTL)
+def publish(path, file_name, page_url="http://localhost/", mime="application/zip"):
+    server = ensure_server()
+    token = uuid.uuid4().hex
+    now = time.time()
+    with _lock:
+        for expired in [key for key, entry in _published.items() if entry[3] < now]:
+            del _published[expired]
+        _published[token] = (os.path.abspath(path), os.path.basename(file_name), mime, now + PUBLISHED_TTL)
+    if DOWNLOAD_URL:
+        base = DOWNLOAD_URL.rstrip("/")
+    else:
+        page = urlsplit(page_url)
+        host = page.hostname or "localhost"
+        host = f"[{host}]" if ":" in host else host
+        base = f"http://{host}:{server.server_port}"
+    return f"{base}/{token}/{quote(os.path.basename(file_name))}", now + PUBLISHED_TTL
+
+
+# Bouton de téléchargement à mémoire bornée : les petits packages passent par
+# st.download_button, les gros par un lien vers le serveur de téléchargement.
+# Le lien est publié une fois par fichier et par session, pas à chaque rerun.
+def download_package(st, path, file_name, label, mime="application/zip"):
+    if os.path.getsize(path) <= INLINE_MAX_BYTES:
+        with open(path, "rb") as f:
+            return st.download_button(label, f, file_name=file_name, mime=mime)
+    page_url = st.context.url or "http://localhost/"
+    if urlsplit(page_url).scheme == "https" and not DOWNLOAD_URL:
+        st.warning("Page servie en HTTPS : le navigateur peut bloquer ce lien HTTP. Publiez le serveur de "
+                   "téléchargement derrière le proxy HTTPS et indiquez son adresse dans SCORM_DOWNLOAD_URL.")
+    links = st.session_state.setdefault(SESSION_KEY, {})
+    url, expires = links.get(path, (None, 0))
+    if expires < time.time():
+        url, expires = links[path] = publish(path, file_name, page_url, mime)
+    st.markdown(
+        f'<a href="{url}" download="{escape(os.path.basename(file_name))}">{escape(label)}</a>',
+        unsafe_allow_html=True,
+    )
@@ -0,0 +1,63 @@
+import os
+
+from scorm_core.downloads import download_package
+from scorm_core.jobs import DONE, FAILED, POLL_SECONDS, STATUS_LABELS, QueueFull, default_queue, ensure_worker
+from scorm_core.result_cache import default_cache
+
+# Suivi d'un job depuis une page Streamlit. L'identifiant est aussi mis dans
+# l'URL (?job=...) : après une déconnexion, rouvrir le lien retrouve le job.
+QUERY_PARAM = "job"
+SESSION_KEY = "scorm_job"
+
+
+# File pleine : message "serveur occupé" et aucun job créé (renvoie None)
+def submit_job(st, spec, inputs, output_name, cache_key=None):
+    ensure_worker()
+    try:
+        job_id = default_queue().submit(spec, inputs, output_name, cache_key)
+    except QueueFull:
+        st.warning("⏳ Serveur occupé : trop de conversions en attente. Réessayez dans quelques minutes.")
+        return None
+    st.session_state[SESSION_KEY] = job_id
+    st.query_params[QUERY_PARAM] = job_id
+    return job_id
+
+
+def current_job(st):
+    return st.session_state.get(SESSION_KEY) or st.query_params.get(QUERY_PARAM)
+
+
+def _show_result(st, job, label):
+    if job["status"] == FAILED:
+        st.error(f"Échec de la conversion : {job['error']}")
+        return
+    for line in (job["message"] or "").splitlines():
+        st.caption(line)
+    st.caption(default_cache().summary())
+    if job["output"] and os.path.exists(job["output"]):
+        download_package(st, job["output"], job["output_name"], label)
+    else:
+        st.warning("Le package n'est plus disponible, relancez la génération.")
+
+
+# Progression rafraîchie toutes les POLL_SECONDS secondes (fragment : seule
+# cette partie de la page est réexécutée), puis résultat et téléchargement
+def show_job(st, job_id, label):
+    ensure_worker()
+    queue = default_queue()
+    job = queue.get(job_id)
+    if job is None:
+        st.warning("Ce job n'existe plus (purgé après expiration).")
+        return
+    if job["status"] in (DONE, FAILED):
+        _show_result(st, job, label)
+        return
+
+    @st.fragment(run_every=POLL_SECONDS)
+    def progress():
+        current = queue.get(job_id)
+        if current is None or current["status"] in (DONE, FAILED):
+            st.rerun()
+        st.progress(current["progress"], text=f"{STATUS_LABELS[current['status']]} : {current['stage']}")
+
+    progress()
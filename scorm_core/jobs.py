@@ -0,0 +1,550 @@
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import closing, contextmanager
+
+from scorm_core import metrics, packaging, search_index
+from scorm_core.builders.dispatch import build
+from scorm_core.workspace import default_workspace
+
+# File de jobs persistante (SQLite) : les pages Streamlit soumettent une
+# conversion puis suivent sa progression ; un worker (thread du serveur
+# Streamlit ou processus `python -m scorm_core.jobs worker`) l'exécute.
+# Les entrées sont copiées dans queue/<id>/ de l'espace de travail : un job
+# survit à la déconnexion du navigateur et au redémarrage du serveur.
+
+# Base des jobs, par défaut à la racine de l'espace de travail
+JOBS_DB = os.environ.get("SCORM_JOBS_DB")
+POLL_SECONDS = 1.0
+HEARTBEAT_SECONDS = 15
+# Un job "en cours" sans signe de vie depuis ce délai est remis en file
+STALE_RUNNING_SECONDS = int(os.environ.get("SCORM_JOB_STALE_MINUTES", "10")) * 60
+MAX_ATTEMPTS = 3
+# Conversions simultanées, chacune dans un processus (0 : un thread du worker)
+JOB_PROCESSES = int(os.environ.get("SCORM_JOB_PROCESSES", os.cpu_count() or 1))
+# Au-delà de ce nombre de jobs en attente, les soumissions sont refusées
+MAX_QUEUED = int(os.environ.get("SCORM_MAX_QUEUED_JOBS", "20"))
+# Les jobs terminés (et leurs fichiers) sont purgés au-delà de ce délai
+JOB_TTL = int(os.environ.get("SCORM_JOB_TTL_HOURS", "24")) * 3600
+MAINTENANCE_SECONDS = 60
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+STATUS_LABELS = {QUEUED: "En attente", RUNNING: "En cours", DONE: "Terminé", FAILED: "Échec"}
+# Étapes mesurées des convertisseurs (metrics.stage), affichées pendant le suivi
+STAGE_LABELS = {
+    "copy": "copie du document",
+    "docx2pdf": "conversion Word en PDF",
+    "text2pdf": "conversion du texte en PDF",
+    "optimize": "optimisation du PDF",
+    "probe": "analyse du PDF",
+    "pdf_reader": "analyse des polices",
+    "viewer_html": "préparation du viewer",
+    "template": "préparation du template",
+    "search_index": "index de recherche",
+    "linearize": "linéarisation",
+    "split": "découpage en chapitres",
+    "subtitles": "sous-titres",
+    "zip": "écriture du package",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    spec TEXT NOT NULL,
+    output_name TEXT NOT NULL,
+    cache_key TEXT,
+    status TEXT NOT NULL,
+    stage TEXT,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    output TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS job_stages (
+    job_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    progress REAL NOT NULL,
+    at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS job_stages_job ON job_stages (job_id, at);
+"""
+
+
+# Soumission refusée : trop de jobs en attente, le serveur est occupé
+class QueueFull(Exception):
+    pass
+
+
+def _report(db_path, job_id, stage, progress, message=None):
+    now = time.time()
+    with closing(sqlite3.connect(db_path, timeout=30, isolation_level=None)) as db:
+        db.execute(
+            "UPDATE jobs SET stage = ?, progress = ?, message = COALESCE(?, message), heartbeat_at = ? "
+            "WHERE id = ?",
+            (stage, progress, message, now, job_id),
+        )
+        db.execute("INSERT INTO job_stages VALUES (?, ?, ?, ?)", (job_id, stage, progress, now))
+
+
+# Progression d'un job, appelée dans le processus de conversion au début de
+# chaque étape. Le nombre d'étapes n'est pas connu d'avance : chacune avance
+# d'un quart du chemin restant avant la mise en cache (0.9).
+class StageReporter:
+    def __init__(self, db_path, job_id, progress=0.1):
+        self.db_path = db_path
+        self.job_id = job_id
+        self.progress = progress
+        self.last = None
+
+    def __call__(self, stage):
+        # Étapes répétées d'affilée (un module de plusieurs documents) : une ligne
+        if stage == self.last:
+            return
+        self.last = stage
+        self.progress += (0.9 - self.progress) / 4
+        try:
+            _report(self.db_path, self.job_id, STAGE_LABELS.get(stage, stage), round(self.progress, 3))
+        except sqlite3.Error:
+            # Progression indicative : une base occupée ne doit pas faire échouer la conversion
+            pass
+
+
+# Lien physique quand c'est possible (même disque), copie sinon
+def _link(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+# Jeton de démarrage d'un processus : identifiant de démarrage du noyau et
+# instant de lancement du processus. Un PID réattribué après un redémarrage
+# (conteneur, machine) n'a pas le même jeton que le worker d'origine.
+def _process_token(pid):
+    try:
+        with open("/proc/sys/kernel/random/boot_id") as f:
+            boot_id = f.read().strip()
+        with open(f"/proc/{pid}/stat") as f:
+            # Champ 22 (starttime), compté après le nom du processus entre parenthèses
+            started = f.read().rsplit(")", 1)[1].split()[19]
+    except (OSError, IndexError):
+        return None
+    return f"{boot_id}-{started}"
+
+
+# Sans /proc : jeton aléatoire propre à cette exécution
+_RUN_TOKEN = _process_token(os.getpid()) or uuid.uuid4().hex
+
+
+def _worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{_RUN_TOKEN}:{threading.get_ident()}"
+
+
+# Un worker est mort si son processus n'existe plus, ou si le PID est désormais
+# porté par un autre processus (jeton différent), y compris le processus courant
+def _worker_dead(worker):
+    parts = (worker or "::").split(":")
+    host, pid = parts[:2]
+    # Identifiants sans jeton (hôte:pid:thread) : écrits avant l'ajout du jeton
+    token = parts[2] if len(parts) > 3 else None
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    if int(pid) == os.getpid():
+        return token != _RUN_TOKEN
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass
+    current = _process_token(int(pid))
+    return token is not None and current is not None and current != token
+
+
+class JobQueue:
+    def __init__(self, db_path=None, workspace=None, cache=None, processes=None, max_queued=None):
+        self.workspace = workspace or default_workspace()
+        self.db_path = db_path or JOBS_DB or os.path.join(self.workspace.root, "jobs.sqlite3")
+        self._cache = cache
+        self.processes = JOB_PROCESSES if processes is None else processes
+        self.max_queued = MAX_QUEUED if max_queued is None else max_queued
+        with self._db() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+
+    @contextmanager
+    def _db(self):
+        with closing(sqlite3.connect(self.db_path, timeout=30, isolation_level=None)) as db:
+            db.row_factory = sqlite3.Row
+            yield db
+
+    @property
+    def cache(self):
+        if self._cache is None:
+            from scorm_core.result_cache import default_cache
+            self._cache = default_cache()
+        return self._cache
+
+    def job_dir(self, job_id):
+        return os.path.join(self.workspace.area("queue"), job_id)
+
+    # --- Côté pages : soumission et suivi -----------------------------------
+
+    # `spec` décrit la conversion (voir builders/dispatch.py) ; `inputs` associe
+    # ses champs de fichiers ("input", "subtitles") aux chemins à conserver
+    def submit(self, spec, inputs, output_name, cache_key=None):
+        job_id = uuid.uuid4().hex
+        # Package identique déjà en cache : le job est terminé d'emblée, sans
+        # passer par le contrôle d'admission
+        cached = self.cache.get(cache_key) if cache_key else None
+        inputs_dir = os.path.join(self.job_dir(job_id), "inputs")
+        os.makedirs(inputs_dir)
+        spec = dict(spec)
+        for field, value in ({} if cached else inputs).items():
+            paths = value if isinstance(value, (list, tuple)) else [value]
+            kept = []
+            for index, path in enumerate(paths):
+                target_dir = os.path.join(inputs_dir, f"{field}-{index}")
+                os.makedirs(target_dir)
+                kept.append(os.path.join(target_dir, os.path.basename(path)))
+                _link(path, kept[-1])
+            spec[field] = kept if isinstance(value, (list, tuple)) else kept[0]
+
+        now = time.time()
+        with self._db() as db:
+            db.execute("BEGIN IMMEDIATE")
+            if not cached:
+                queued = db.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)).fetchone()[0]
+                if queued >= self.max_queued:
+                    db.execute("ROLLBACK")
+                    shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+                    raise QueueFull(f"{queued} jobs en attente (maximum {self.max_queued})")
+            db.execute(
+                "INSERT INTO jobs (id, kind, spec, output_name, cache_key, status, stage, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, spec["kind"], json.dumps(spec, ensure_ascii=False), output_name, cache_key,
+                 QUEUED, "file d'attente", now),
+            )
+            db.execute("INSERT INTO job_stages VALUES (?, ?, ?, ?)", (job_id, "file d'attente", 0, now))
+            db.execute("COMMIT")
+
+        if cached:
+            self.finish(job_id, cached, "Package identique déjà généré : servi depuis le cache.")
+        return job_id
+
+    def get(self, job_id):
+        with self._db() as db:
+            row = db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["spec"] = json.loads(job["spec"])
+        return job
+
+    # Historique des étapes : [(étape, progression, horodatage)]
+    def stages(self, job_id):
+        with self._db() as db:
+            return [tuple(row) for row in db.execute(
+                "SELECT stage, progress, at FROM job_stages WHERE job_id = ? ORDER BY at", (job_id,))]
+
+    def counts(self):
+        with self._db() as db:
+            return dict(db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    # --- Côté worker ---------------------------------------------------------
+
+    # Prend le plus ancien job en attente ; BEGIN IMMEDIATE sérialise les
+    # workers concurrents (threads ou processus)
+    def claim(self, worker):
+        now = time.time()
+        with self._db() as db:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                db.execute("COMMIT")
+                return None
+            db.execute(
+                "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, started_at = ?, "
+                "heartbeat_at = ? WHERE id = ?",
+                (RUNNING, worker, now, now, row["id"]),
+            )
+            db.execute("COMMIT")
+        job = dict(row)
+        job["spec"] = json.loads(job["spec"])
+        job["started_at"] = now
+        return job
+
+    def report(self, job_id, stage, progress, message=None):
+        _report(self.db_path, job_id, stage, progress, message)
+
+    def heartbeat(self, job_id):
+        with self._db() as db:
+            db.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ?", (time.time(), job_id))
+
+    def finish(self, job_id, output, message=None):
+        self.report(job_id, "terminé", 1.0, message)
+        with self._db() as db:
+            db.execute(
+                "UPDATE jobs SET status = ?, output = ?, error = NULL, finished_at = ? WHERE id = ?",
+                (DONE, output, time.time(), job_id),
+            )
+
+    def fail(self, job_id, error):
+        self.report(job_id, "échec", 1.0)
+        with self._db() as db:
+            db.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                (FAILED, error, time.time(), job_id),
+            )
+
+    # Jobs "en cours" dont le worker est mort (redémarrage, crash) ou muet :
+    # remis en file pour reprise, ou abandonnés après MAX_ATTEMPTS essais
+    def requeue_orphans(self):
+        limit = time.time() - STALE_RUNNING_SECONDS
+        with self._db() as db:
+            running = db.execute(
+                "SELECT id, worker, attempts, heartbeat_at FROM jobs WHERE status = ?", (RUNNING,)
+            ).fetchall()
+        requeued = 0
+        for row in running:
+            if not (_worker_dead(row["worker"]) or (row["heartbeat_at"] or 0) < limit):
+                continue
+            if row["attempts"] >= MAX_ATTEMPTS:
+                self.fail(row["id"], f"Abandonné après {row['attempts']} tentatives interrompues")
+                continue
+            with self._db() as db:
+                db.execute(
+                    "UPDATE jobs SET status = ?, stage = ?, worker = NULL WHERE id = ? AND status = ?",
+                    (QUEUED, "reprise", row["id"], RUNNING),
+                )
+            requeued += 1
+        return requeued
+
+    def purge(self, max_age=None):
+        limit = time.time() - (JOB_TTL if max_age is None else max_age)
+        with self._db() as db:
+            ids = [row[0] for row in db.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) AND finished_at < ?", (DONE, FAILED, limit))]
+            for job_id in ids:
+                db.execute("DELETE FROM job_stages WHERE job_id = ?", (job_id,))
+                db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        for job_id in ids:
+            shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+        return len(ids)
+
+    # Avant la conversion : reprise d'un package déjà écrit ou succès du cache
+    # terminent le job ; sinon renvoie le chemin du package à construire
+    def _prepare(self, job):
+        job_id = job["id"]
+        output = os.path.join(self.job_dir(job_id), job["output_name"])
+        # Reprise : le package a été terminé juste avant l'interruption
+        if os.path.exists(output):
+            self.finish(job_id, output, job["message"] or "Package repris après interruption.")
+            return None
+        self.report(job_id, "préparation", 0.05)
+        # Échec déjà compté à la soumission : un job identique a pu finir depuis
+        cached = self.cache.get(job["cache_key"], count=False) if job["cache_key"] else None
+        if cached:
+            self.finish(job_id, cached, "Package identique déjà généré : servi depuis le cache.")
+            metrics.record_conversion(job["kind"], "cache", time.time() - job["started_at"],
+                                      queue_wait=job["started_at"] - job["created_at"], job=job_id)
+            return None
+        self.report(job_id, "conversion", 0.1)
+        return output
+
+    def _complete(self, job, output, result):
+        part_path = f"{output}.part"
+        self.report(job["id"], "mise en cache", 0.9)
+        started = time.perf_counter()
+        size = os.path.getsize(part_path)
+        stored = self.cache.put(job["cache_key"], part_path) if job["cache_key"] else part_path
+        # Package en cache servi depuis results/ (un seul exemplaire, soumis à
+        # l'éviction LRU) ; sinon gardé dans queue/<id>/
+        if stored == part_path:
+            os.replace(part_path, output)
+            self.workspace.enforce_quota(keep=output)
+        else:
+            output = stored
+        cache_stage = {"stage": "cache", "seconds": round(time.perf_counter() - started, 6), "bytes": size}
+        self.finish(job["id"], output, "\n".join(result["lines"]))
+        metrics.record_conversion(job["kind"], DONE, result["seconds"], result["stages"] + [cache_stage],
+                                  queue_wait=job["started_at"] - job["created_at"], job=job["id"], bytes=size)
+
+    def _abort(self, job, output, error):
+        if os.path.exists(f"{output}.part"):
+            os.remove(f"{output}.part")
+        self.fail(job["id"], f"{type(error).__name__}: {error}")
+        metrics.record_conversion(job["kind"], FAILED, time.time() - job["started_at"],
+                                  queue_wait=job["started_at"] - job["created_at"], job=job["id"],
+                                  error=f"{type(error).__name__}: {error}")
+
+    # Pool d'exécution des conversions : des processus, pour que la conversion
+    # (reportlab, compression, analyse PDF) ne prenne pas le GIL du serveur
+    # Streamlit ; un simple thread si SCORM_JOB_PROCESSES=0
+    def _new_pool(self):
+        if not self.processes:
+            return ThreadPoolExecutor(1)
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        return ProcessPoolExecutor(self.processes, mp_context=context, initializer=_init_process,
+                                   initargs=(self.processes,))
+
+    # Boucle du worker : au plus `processes` conversions simultanées, les
+    # autres jobs restent en file
+    def run_worker(self, stop=None, once=False):
+        stop = stop or threading.Event()
+        worker = _worker_id()
+        slots = max(1, self.processes)
+        running = {}
+        pool = None
+        last_maintenance = last_heartbeat = 0
+        try:
+            while not stop.is_set():
+                if time.time() - last_maintenance > MAINTENANCE_SECONDS:
+                    self.requeue_orphans()
+                    self.purge()
+                    last_maintenance = time.time()
+                while len(running) < slots:
+                    job = self.claim(worker)
+                    if job is None:
+                        break
+                    output = self._prepare(job)
+                    if output is None:
+                        continue
+                    pool = pool or self._new_pool()
+                    work_dir = self.workspace.new_dir("jobs", "queue_")
+                    future = pool.submit(run_build, job["spec"], f"{output}.part", work_dir,
+                                         StageReporter(self.db_path, job["id"]))
+                    running[future] = (job, output, work_dir)
+                if not running:
+                    if once:
+                        return
+                    stop.wait(POLL_SECONDS)
+                    continue
+
+                done, _ = wait(running, timeout=POLL_SECONDS, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job, output, work_dir = running.pop(future)
+                    shutil.rmtree(work_dir, ignore_errors=True)
+                    try:
+                        self._complete(job, output, future.result())
+                    except Exception as e:
+                        self._abort(job, output, e)
+                        # Processus du pool tué (mémoire...) : pool recréé
+                        if isinstance(e, BrokenProcessPool) and pool is not None:
+                            pool.shutdown(wait=False)
+                            pool = None
+                if running and time.time() - last_heartbeat > HEARTBEAT_SECONDS:
+                    for job, _, _ in running.values():
+                        self.heartbeat(job["id"])
+                    last_heartbeat = time.time()
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Chaque processus compresse sur un seul thread : le parallélisme vient du
+# pool ; l'extraction de texte se partage les processeurs restants
+def _init_process(processes=1):
+    packaging.ZIP_WORKERS = 1
+    search_index.INDEX_WORKERS = max(1, (os.cpu_count() or 1) // processes)
+
+
+# Conversion proprement dite, exécutée dans un processus du pool : renvoie
+# les lignes de bilan et les mesures de ses étapes ; `on_stage` (StageReporter)
+# est appelé au début de chaque étape
+def run_build(spec, output, work_dir, on_stage=None):
+    lines = []
+    with metrics.conversion(spec["kind"], on_stage) as collector:
+        stats = build({**spec, "output": output}, work_dir, log=lines.append)
+    if stats is not None and not lines:
+        lines.append(stats.summary())
+    return {"lines": lines, "stages": collector.stages, "seconds": collector.seconds}
+
+
+_default_queue = None
+_worker_lock = threading.Lock()
+_worker_thread = None
+_metrics_server = None
+
+
+def default_queue():
+    global _default_queue
+    if _default_queue is None:
+        _default_queue = JobQueue()
+    return _default_queue
+
+
+# Jauges ajoutées à l'exposition Prometheus : jobs par état
+def job_gauges(queue):
+    counts = queue.counts()
+    return [("scorm_jobs", "Jobs par état", {(("status", status),): counts.get(status, 0) for status in STATUS_LABELS})]
+
+
+def _start_metrics(port):
+    global _metrics_server
+    metrics.configure_logging()
+    if port and _metrics_server is None:
+        _metrics_server = metrics.serve_metrics(port, lambda: job_gauges(default_queue()))
+
+
+# Démarre (une fois par processus) le worker intégré au serveur Streamlit,
+# sauf si des workers externes sont déployés (SCORM_EXTERNAL_WORKER=1)
+def ensure_worker():
+    global _worker_thread
+    if os.environ.get("SCORM_EXTERNAL_WORKER") == "1":
+        return
+    with _worker_lock:
+        if _worker_thread is None or not _worker_thread.is_alive():
+            _start_metrics(metrics.METRICS_PORT)
+            _worker_thread = threading.Thread(
+                target=default_queue().run_worker, name="scorm-jobs", daemon=True
+            )
+            _worker_thread.start()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m scorm_core.jobs", description="File de jobs SCORM")
+    commands = parser.add_subparsers(dest="command", required=True)
+    worker = commands.add_parser("worker", help="Exécuter les jobs en file")
+    worker.add_argument("--once", action="store_true", help="S'arrêter quand la file est vide")
+    worker.add_argument("--metrics-port", type=int, default=metrics.METRICS_PORT,
+                        help="Port du serveur /metrics (Prometheus)")
+    commands.add_parser("status", help="Nombre de jobs par état")
+    args = parser.parse_args(argv)
+
+    queue = default_queue()
+    if args.command == "worker":
+        _start_metrics(args.metrics_port)
+        try:
+            queue.run_worker(once=args.once)
+        except KeyboardInterrupt:
+            pass
+    else:
+        counts = queue.counts()
+        for status, label in STATUS_LABELS.items():
+            print(f"{label:<12} {counts.get(status, 0)}")
+        print(f"Capacité : {max(1, queue.processes)} conversions simultanées, {queue.max_queued} en attente")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import json
+import os
+from functools import lru_cache
+
+# Table ISO 639-1 (code, nom anglais) précalculée depuis pycountry, triée par nom.
+# Charger ce petit JSON évite d'importer pycountry et de parcourir ses ~8000
+# langues. Pour la régénérer après une mise à jour de pycountry :
+#
+#   python -m scorm_core.languages
+LANGUAGES_TABLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "languages.json")
+
+
+def _from_pycountry():
+    import pycountry
+    languages = [(lang.alpha_2, lang.name) for lang in pycountry.languages if hasattr(lang, "alpha_2")]
+    return sorted(languages, key=lambda x: x[1])
+
+
+# Construit une fois par processus et partagé par toutes les sessions
+@lru_cache(maxsize=None)
+def language_index():
+    try:
+        with open(LANGUAGES_TABLE, "r", encoding="utf-8") as f:
+            return tuple((code, name) for code, name in json.load(f))
+    except FileNotFoundError:
+        return tuple(_from_pycountry())
+
+
+# Libellés du sélecteur de sous-titres et correspondance libellé -> code
+@lru_cache(maxsize=None)
+def language_picker():
+    options = tuple(f"{name} ({code})" for code, name in language_index())
+    code_map = {f"{name} ({code})": code for code, name in language_index()}
+    return options, code_map
+
+
+@lru_cache(maxsize=None)
+def _names():
+    return dict(language_index())
+
+
+# Nom affiché d'une piste <track> ; le code lui-même si la langue est inconnue
+def language_name(code):
+    return _names().get(code, code)
+
+
+if __name__ == "__main__":
+    with open(LANGUAGES_TABLE, "w", encoding="utf-8") as f:
+        rows = [json.dumps(list(entry), ensure_ascii=False) for entry in _from_pycountry()]
+        f.write("[\n" + ",\n".join(rows) + "\n]\n")
+    print(f"{LANGUAGES_TABLE} régénéré")
@@ -0,0 +1,73 @@
+import importlib.util
+import os
+import re
+import shutil
+import subprocess
+
+from scorm_core.metrics import stage
+
+# Linéarisation ("fast web view") : les objets de la page 1 sont placés en
+# tête du fichier, avec une table de références dédiée. Servi par requêtes de
+# plages (Range), pdf.js affiche la première page dès les premiers Ko au lieu
+# d'attendre le fichier entier.
+#
+# pikepdf (qpdf) si installé, sinon l'exécutable qpdf ; sans l'un ni l'autre
+# l'étape est sautée et le PDF est livré tel quel.
+
+# Taille des blocs demandés par pdf.js (rangeChunkSize). Les blocs manquants
+# contigus partent en une seule requête : des blocs plus gros ne font que
+# télécharger davantage avant la page 1 (voir benchmarks/bench_first_page.py)
+RANGE_CHUNK_SIZE = int(os.environ.get("SCORM_PDF_RANGE_CHUNK_KB", "64")) * 1024
+
+_LINEARIZATION_END = re.compile(rb"/Linearized\b.*?/E\s+(\d+)", re.S)
+
+
+class LinearizeUnavailable(Exception):
+    pass
+
+
+def linearize_available():
+    return importlib.util.find_spec("pikepdf") is not None or shutil.which("qpdf") is not None
+
+
+def linearize_pdf(src_path, dst_path):
+    with stage("linearize", os.path.getsize(src_path)):
+        try:
+            import pikepdf
+        except ImportError:
+            qpdf = shutil.which("qpdf")
+            if qpdf is None:
+                raise LinearizeUnavailable("pikepdf ou qpdf requis pour linéariser le PDF")
+            subprocess.run([qpdf, "--linearize", src_path, dst_path], check=True, capture_output=True)
+            return dst_path
+        with pikepdf.open(src_path) as pdf:
+            pdf.save(dst_path, linearize=True)
+    return dst_path
+
+
+# Fin des données de la page 1 (/E du dictionnaire de linéarisation) : octets
+# à recevoir avant le premier affichage. None si le PDF n'est pas linéarisé.
+def first_page_end(path):
+    with open(path, "rb") as f:
+        head = f.read(4096)
+    match = _LINEARIZATION_END.search(head)
+    return int(match.group(1)) if match else None
+
+
+# Script inséré dans viewer.html après viewer.js (avant le chargement du
+# document) : chargement par plages et en flux, sans préchargement du reste du
+# fichier, blocs de RANGE_CHUNK_SIZE octets
+def viewer_range_script(chunk_size=RANGE_CHUNK_SIZE):
+    return f"""<script>
+  (function () {{
+    var options = window.PDFViewerApplicationOptions;
+    options.set("disableRange", false);
+    options.set("disableStream", false);
+    options.set("disableAutoFetch", true);
+    var app = window.PDFViewerApplication;
+    var open = app.open;
+    app.open = function (file, args) {{
+      return open.call(this, file, Object.assign({{ rangeChunkSize: {chunk_size} }}, args));
+    }};
+  }})();
+  </script>"""
@@ -0,0 +1,60 @@
+import os
+import zipfile
+
+# Dossier des traductions du viewer pdf.js dans le template
+LOCALE_DIR = "locale"
+LOCALE_INDEX = f"{LOCALE_DIR}/locale.properties"
+
+# Lien de viewer.html vers l'index des traductions : relatif à web/, où le
+# viewer ne trouve rien, les traductions étant à la racine du package
+VIEWER_LOCALE_LINK = f'href="{LOCALE_INDEX}"'
+
+# Toujours livrée : langue de repli quand celle du navigateur n'est pas disponible
+FALLBACK_LOCALE = "en-US"
+
+
+def _locale_of(name):
+    parts = name.split("/")
+    if len(parts) == 3 and parts[0] == LOCALE_DIR and parts[2] == "viewer.properties":
+        return parts[1]
+    return None
+
+
+# Codes des langues présentes dans l'archive du template, ou directement dans
+# le dossier du template (sans construire l'archive, utile au premier rendu)
+def available_locales(archive_path):
+    if os.path.isdir(archive_path):
+        locale_dir = os.path.join(archive_path, LOCALE_DIR)
+        return sorted(
+            code for code in os.listdir(locale_dir)
+            if os.path.isfile(os.path.join(locale_dir, code, "viewer.properties"))
+        )
+    with zipfile.ZipFile(archive_path) as archive:
+        return sorted(code for code in map(_locale_of, archive.namelist()) if code)
+
+
+# Ensemble effectivement livré : langues demandées + langue de repli
+def resolve_locales(locales):
+    return sorted(set(locales) | {FALLBACK_LOCALE})
+
+
+# Fichiers de traduction à exclure (avec leur taille) pour ne garder que `locales`
+def locale_exclusions(archive_path, locales):
+    keep = set(resolve_locales(locales))
+    excluded = {}
+    with zipfile.ZipFile(archive_path) as archive:
+        for info in archive.infolist():
+            code = _locale_of(info.filename)
+            if code and code not in keep:
+                excluded[info.filename] = info.file_size
+    return excluded
+
+
+# locale.properties réécrit pour ne déclarer que les langues livrées
+def locale_properties(locales):
+    return "".join(f"[{code}]\n@import url({code}/viewer.properties)\n\n" for code in resolve_locales(locales))
+
+
+# viewer.html (sous web/) pointant vers l'index des traductions livré
+def link_viewer_locales(viewer_html):
+    return viewer_html.replace(VIEWER_LOCALE_LINK, f'href="../{LOCALE_INDEX}"')
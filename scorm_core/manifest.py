@@ -0,0 +1,117 @@
+import re
+import uuid
+from urllib.parse import quote
+from xml.sax.saxutils import escape, quoteattr
+
+MANIFEST_NAME = "imsmanifest.xml"
+
+_HEADERS = {
+    "1.2": '''<manifest identifier={identifier} version="1.2"
+  xmlns="http://www.imsproject.org/xsd/imscp_rootv1p1p2"
+  xmlns:adlcp="http://www.adlnet.org/xsd/adlcp_rootv1p2"
+  xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+  xsi:schemaLocation="http://www.imsproject.org/xsd/imscp_rootv1p1p2
+                      imscp_rootv1p1p2.xsd
+                      http://www.adlnet.org/xsd/adlcp_rootv1p2
+                      adlcp_rootv1p2.xsd">
+  <metadata>
+    <schema>ADL SCORM</schema>
+    <schemaversion>1.2</schemaversion>
+  </metadata>''',
+    "2004": '''<manifest identifier={identifier} version="1.0"
+  xmlns="http://www.imsglobal.org/xsd/imscp_v1p1"
+  xmlns:adlcp="http://www.adlnet.org/xsd/adlcp_v1p3"
+  xmlns:imsss="http://www.imsglobal.org/xsd/imsss"
+  xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+  xsi:schemaLocation="http://www.imsglobal.org/xsd/imscp_v1p1
+                      imscp_v1p1.xsd
+                      http://www.adlnet.org/xsd/adlcp_v1p3
+                      adlcp_v1p3.xsd
+                      http://www.imsglobal.org/xsd/imsss
+                      imsss_v1p0.xsd">
+  <metadata>
+    <schema>ADL SCORM</schema>
+    <schemaversion>2004 3rd Edition</schemaversion>
+  </metadata>''',
+}
+
+# Nom de l'attribut de type de ressource selon la version
+_SCORM_TYPE = {"1.2": "adlcp:scormtype", "2004": "adlcp:scormType"}
+
+
+# Accepte "1.2", "2004", "SCORM 1.2", "SCORM 2004"...
+def normalize_version(version):
+    return "2004" if "2004" in str(version) else "1.2"
+
+
+def make_identifier(title):
+    slug = re.sub(r"[^\w\-.]", "_", title).strip("_") or "scorm"
+    return f"com.example.{slug}.{uuid.uuid4().hex[:8]}"
+
+
+# Génère les lignes du manifeste : la liste des fichiers est consommée en un
+# seul passage, au fur et à mesure
+def iter_manifest(version, title, files, launch, identifier=None):
+    version = normalize_version(version)
+    yield '<?xml version="1.0" encoding="UTF-8"?>'
+    yield _HEADERS[version].format(identifier=quoteattr(identifier or make_identifier(title)))
+    visible = ' isvisible="true"' if version == "2004" else ""
+    yield '  <organizations default="ORG1">'
+    yield '    <organization identifier="ORG1">'
+    yield f"      <title>{escape(title)}</title>"
+    yield f'      <item identifier="ITEM1" identifierref="RES1"{visible}>'
+    yield f"        <title>{escape(title)}</title>"
+    yield "      </item>"
+    yield "    </organization>"
+    yield "  </organizations>"
+    yield "  <resources>"
+    yield (f'    <resource identifier="RES1" type="webcontent" {_SCORM_TYPE[version]}="sco" '
+           f'href={quoteattr(quote(launch, safe="/"))}>')
+    for name in files:
+        if name != MANIFEST_NAME:
+            yield f"      <file href={quoteattr(quote(name, safe='/'))}/>"
+    yield "    </resource>"
+    yield "  </resources>"
+    yield "</manifest>"
+
+
+def build_manifest(version, title, files, launch, identifier=None):
+    return "\n".join(iter_manifest(version, title, files, launch, identifier)) + "\n"
+
+
+# Manifeste à plusieurs SCO : `items` liste des (titre, page de lancement,
+# fichiers propres au SCO) ; les fichiers partagés (viewer, pdf.js...) forment
+# une ressource "asset" unique dont chaque SCO dépend
+def iter_course_manifest(version, title, items, shared_files, identifier=None):
+    version = normalize_version(version)
+    yield '<?xml version="1.0" encoding="UTF-8"?>'
+    yield _HEADERS[version].format(identifier=quoteattr(identifier or make_identifier(title)))
+    visible = ' isvisible="true"' if version == "2004" else ""
+    yield '  <organizations default="ORG1">'
+    yield '    <organization identifier="ORG1">'
+    yield f"      <title>{escape(title)}</title>"
+    for number, (item_title, _, _) in enumerate(items, 1):
+        yield f'      <item identifier="ITEM{number}" identifierref="RES{number}"{visible}>'
+        yield f"        <title>{escape(item_title)}</title>"
+        yield "      </item>"
+    yield "    </organization>"
+    yield "  </organizations>"
+    yield "  <resources>"
+    for number, (_, launch, files) in enumerate(items, 1):
+        yield (f'    <resource identifier="RES{number}" type="webcontent" {_SCORM_TYPE[version]}="sco" '
+               f'href={quoteattr(quote(launch, safe="/"))}>')
+        for name in files:
+            yield f"      <file href={quoteattr(quote(name, safe='/'))}/>"
+        yield '      <dependency identifierref="SHARED"/>'
+        yield "    </resource>"
+    yield f'    <resource identifier="SHARED" type="webcontent" {_SCORM_TYPE[version]}="asset">'
+    for name in shared_files:
+        if name != MANIFEST_NAME:
+            yield f"      <file href={quoteattr(quote(name, safe='/'))}/>"
+    yield "    </resource>"
+    yield "  </resources>"
+    yield "</manifest>"
+
+
+def build_course_manifest(version, title, items, shared_files, identifier=None):
+    return "\n".join(iter_course_manifest(version, title, items, shared_files, identifier)) + "\n"
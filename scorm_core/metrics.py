@@ -0,0 +1,209 @@
+import bisect
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Mesures des conversions : durée et octets de chaque étape (upload, sonde PDF,
+# PdfReader, template, viewer.html, sous-titres, docx2pdf, zip...), durée
+# totale par convertisseur et attente en file. Exposées en journal JSON (une
+# ligne par conversion, logger "scorm_core.metrics") et au format texte
+# Prometheus (GET /metrics de l'API, ou SCORM_METRICS_PORT pour le worker).
+#
+# Une conversion s'exécute souvent dans un processus du pool : ses étapes sont
+# collectées dans ce processus (conversion()), renvoyées avec le résultat, puis
+# enregistrées par le worker (record_conversion()). `on_stage` reçoit le nom
+# de chaque étape au moment où elle commence (progression d'un job de la file).
+
+# Port du serveur /metrics du worker intégré ou externe (vide : désactivé)
+METRICS_PORT = os.environ.get("SCORM_METRICS_PORT")
+# Bornes des histogrammes de durée, en secondes
+BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+NO_CONVERSION = "hors_conversion"
+
+logger = logging.getLogger("scorm_core.metrics")
+_collector = contextvars.ContextVar("scorm_metrics_collector", default=None)
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.conversions = {}
+        self.queue_wait = {}
+        self.stages = {}
+        self.stage_bytes = {}
+
+    def observe_stage(self, kind, stage, seconds, nbytes=0):
+        with self._lock:
+            self.stages.setdefault((kind, stage), Histogram()).observe(seconds)
+            self.stage_bytes[(kind, stage)] = self.stage_bytes.get((kind, stage), 0) + nbytes
+
+    def observe_conversion(self, kind, status, seconds, queue_wait=None):
+        with self._lock:
+            self.conversions.setdefault((kind, status), Histogram()).observe(seconds)
+            if queue_wait is not None:
+                self.queue_wait.setdefault((kind,), Histogram()).observe(queue_wait)
+
+    # Texte au format d'exposition Prometheus ; `gauges` : [(nom, aide, {labels: valeur})]
+    def render(self, gauges=()):
+        lines = []
+        with self._lock:
+            _render_histograms(lines, "scorm_conversion_seconds", "Durée des conversions par convertisseur",
+                               ("kind", "status"), self.conversions)
+            _render_histograms(lines, "scorm_queue_wait_seconds", "Attente en file avant conversion",
+                               ("kind",), self.queue_wait)
+            _render_histograms(lines, "scorm_stage_seconds", "Durée des étapes de conversion",
+                               ("kind", "stage"), self.stages)
+            lines.append("# HELP scorm_stage_bytes_total Octets traités par étape")
+            lines.append("# TYPE scorm_stage_bytes_total counter")
+            for labels, value in sorted(self.stage_bytes.items()):
+                lines.append(f"scorm_stage_bytes_total{_labels(('kind', 'stage'), labels)} {value}")
+        for name, help_text, values in gauges:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in sorted(values.items()):
+                lines.append(f"{name}{_labels(tuple(k for k, _ in labels), tuple(v for _, v in labels))} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _render_histograms(lines, name, help_text, label_names, histograms):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for labels, histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ("+Inf",), histogram.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(label_names, labels, [('le', bound)])} {cumulative}")
+        lines.append(f"{name}_sum{_labels(label_names, labels)} {histogram.sum:.6f}")
+        lines.append(f"{name}_count{_labels(label_names, labels)} {histogram.count}")
+
+
+REGISTRY = Registry()
+
+
+# Étapes d'une conversion en cours dans ce processus (ou ce thread)
+class Collector:
+    def __init__(self, kind, on_stage=None):
+        self.kind = kind
+        self.on_stage = on_stage
+        self.stages = []
+        self.started = time.perf_counter()
+
+    @property
+    def seconds(self):
+        return time.perf_counter() - self.started
+
+
+@contextmanager
+def conversion(kind, on_stage=None):
+    collector = Collector(kind, on_stage)
+    token = _collector.set(collector)
+    try:
+        yield collector
+    finally:
+        _collector.reset(token)
+
+
+# Étape chronométrée ; `add_bytes` compte les octets lus ou écrits
+class StageTimer:
+    def __init__(self, name):
+        self.name = name
+        self.nbytes = 0
+        self.started = time.perf_counter()
+        collector = _collector.get()
+        if collector is not None and collector.on_stage is not None:
+            collector.on_stage(name)
+
+    def add_bytes(self, nbytes):
+        self.nbytes += nbytes
+
+    def stop(self):
+        seconds = time.perf_counter() - self.started
+        collector = _collector.get()
+        if collector is not None:
+            collector.stages.append({"stage": self.name, "seconds": round(seconds, 6), "bytes": self.nbytes})
+        else:
+            # Hors conversion (upload côté page ou API) : enregistrée directement
+            REGISTRY.observe_stage(NO_CONVERSION, self.name, seconds, self.nbytes)
+            _log({"event": "stage", "stage": self.name, "seconds": round(seconds, 6), "bytes": self.nbytes})
+        return seconds
+
+
+@contextmanager
+def stage(name, nbytes=0):
+    timer = StageTimer(name)
+    timer.add_bytes(nbytes)
+    try:
+        yield timer
+    finally:
+        timer.stop()
+
+
+# Côté worker : enregistre une conversion terminée et ses étapes
+def record_conversion(kind, status, seconds, stages=(), queue_wait=None, **fields):
+    REGISTRY.observe_conversion(kind, status, seconds, queue_wait)
+    for entry in stages:
+        REGISTRY.observe_stage(kind, entry["stage"], entry["seconds"], entry["bytes"])
+    _log({"event": "conversion", "kind": kind, "status": status, "seconds": round(seconds, 6),
+          "queue_wait": None if queue_wait is None else round(queue_wait, 6), **fields, "stages": list(stages)})
+
+
+def _log(event):
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({"ts": round(time.time(), 3), **event}, ensure_ascii=False))
+
+
+# Journal JSON sur la sortie d'erreur, une ligne par événement
+def configure_logging():
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+
+# Serveur /metrics minimal (bibliothèque standard) pour les processus sans
+# serveur HTTP : worker externe, serveur Streamlit. `gauges` : fonction
+# renvoyant les jauges à ajouter (ex. jobs par état).
+def serve_metrics(port, gauges=lambda: (), host="0.0.0.0"):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = REGISTRY.render(gauges()).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, int(port)), Handler)
+    threading.Thread(target=server.serve_forever, name="scorm-metrics", daemon=True).start()
+    return server
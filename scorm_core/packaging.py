@@ -0,0 +1,256 @@
+import os
+import shutil
+import struct
+import time
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from scorm_core.compression import SAMPLE_SIZE, CompressionStats, choose_compression
+from scorm_core.manifest import MANIFEST_NAME, build_course_manifest, build_manifest
+from scorm_core.metrics import StageTimer
+
+# Taille des blocs copiés depuis les sources vers l'archive
+CHUNK_SIZE = 1024 * 1024
+
+# Nombre de threads de compression (1 = chemin séquentiel)
+ZIP_WORKERS = int(os.environ.get("SCORM_ZIP_WORKERS", os.cpu_count() or 1))
+
+# Au-delà de cette taille un fichier est écrit en flux plutôt que compressé
+# en mémoire par un thread
+PARALLEL_MAX_SIZE = 32 * 1024 * 1024
+
+# Racine du dépôt : scripts JS partagés (wrapper.js, scorm_functions.js) et template
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dossier de base commun aux convertisseurs PDF (pdf.js + runtime SCORM)
+SCORM_BASE_DIR = os.path.join(REPO_DIR, "scorm_base")
+
+
+# Écrit un package SCORM directement dans le ZIP, sans dossier de staging :
+# chaque membre est lu depuis sa source (fichier du template, upload, texte généré)
+# et compressé au fil de l'eau dans l'archive.
+# `policy` choisit la méthode de compression de chaque membre (None : méthode fixe).
+# `workers` threads compressent en parallèle les fichiers ajoutés par lot.
+class PackageWriter:
+    def __init__(self, target, compression=zipfile.ZIP_DEFLATED, compresslevel=None, policy=choose_compression, workers=None):
+        self.target = target
+        self.compression = compression
+        self.compresslevel = compresslevel
+        self.policy = policy
+        self.workers = workers or ZIP_WORKERS
+        self.members = []
+        self.stats = CompressionStats()
+        # Étape "zip" des mesures : de l'ouverture à la fermeture de l'archive
+        self._timer = StageTimer("zip")
+        self._zip = zipfile.ZipFile(target, "w", compression, compresslevel=compresslevel)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+            self._timer.add_bytes(self.stats.bytes_out)
+            self._timer.stop()
+
+    def _new_info(self, arcname, mtime=None, sample=None):
+        info = zipfile.ZipInfo(_normalize(arcname), time.localtime(mtime)[:6])
+        info.external_attr = 0o644 << 16
+        if self.policy is None:
+            info.compress_type, level = self.compression, self.compresslevel
+        else:
+            info.compress_type, level = self.policy(info.filename, sample)
+        # Niveau par membre, lu par ZipFile.open()/writestr()
+        info._compresslevel = level
+        return info
+
+    def _record(self, info, cpu_seconds=0.0, spliced=False):
+        self.members.append(info.filename)
+        self.stats.record(info, cpu_seconds, spliced)
+
+    # Copie un fichier existant (template, média déjà sur disque)
+    def add_file(self, arcname, src_path):
+        with open(src_path, "rb") as src:
+            self._copy(arcname, src, os.path.getmtime(src_path))
+
+    # Copie un objet fichier (ex. UploadedFile Streamlit) sans passer par le disque
+    def add_fileobj(self, arcname, fileobj):
+        if hasattr(fileobj, "seek"):
+            fileobj.seek(0)
+        self._copy(arcname, fileobj)
+
+    # Source quelconque : chemin sur disque ou objet fichier
+    def add_source(self, arcname, source):
+        if isinstance(source, (str, os.PathLike)):
+            self.add_file(arcname, source)
+        else:
+            self.add_fileobj(arcname, source)
+
+    def _copy(self, arcname, src, mtime=None):
+        started = time.process_time()
+        # L'échantillon de tête sert au choix de compression puis est écrit en premier
+        sample = src.read(SAMPLE_SIZE)
+        info = self._new_info(arcname, mtime, sample)
+        with self._zip.open(info, "w", force_zip64=True) as dst:
+            dst.write(sample)
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+        self._record(info, time.process_time() - started)
+
+    def add_bytes(self, arcname, data):
+        started = time.process_time()
+        info = self._new_info(arcname, sample=data[:SAMPLE_SIZE])
+        self._zip.writestr(info, data)
+        self._record(info, time.process_time() - started)
+
+    def add_text(self, arcname, text, encoding="utf-8"):
+        self.add_bytes(arcname, text.encode(encoding))
+
+    # Manifeste construit à partir des membres effectivement écrits : il est
+    # ajouté en dernier, sans relire l'archive ni reparcourir de dossier
+    def add_manifest(self, version, title, launch, identifier=None):
+        self.add_text(MANIFEST_NAME, build_manifest(version, title, self.members, launch, identifier))
+
+    # Manifeste à plusieurs SCO : `items` liste des (titre, page de lancement,
+    # fichiers propres) ; tous les autres membres écrits sont partagés
+    def add_course_manifest(self, version, title, items, identifier=None):
+        own = {name for _, _, files in items for name in files}
+        shared = [name for name in self.members if name not in own]
+        self.add_text(MANIFEST_NAME, build_course_manifest(version, title, items, shared, identifier))
+
+    # Ajoute une liste de (chemin d'archive, fichier source). Les membres sont
+    # compressés en parallèle puis écrits dans l'ordre de la liste. Avec un seul
+    # thread, chaque membre suit le même chemin (compression en mémoire puis
+    # écriture brute, ou flux pour les gros fichiers) : l'archive produite est
+    # identique octet pour octet quel que soit le nombre de threads.
+    def add_files(self, entries):
+        entries = list(entries)
+        if self.policy is None and self.compression not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            for arcname, path in entries:
+                self.add_file(arcname, path)
+            return
+        if self.workers <= 1 or len(entries) < 2:
+            for arcname, path in entries:
+                if os.path.getsize(path) > PARALLEL_MAX_SIZE:
+                    self.add_file(arcname, path)
+                else:
+                    self._write_compressed(*self._compress_file(arcname, path))
+            return
+
+        with ThreadPoolExecutor(self.workers) as pool:
+            pending = deque()
+            for arcname, path in entries:
+                if os.path.getsize(path) > PARALLEL_MAX_SIZE:
+                    # Gros fichier : on vide la file pour garder l'ordre, puis écriture en flux
+                    while pending:
+                        self._write_compressed(*pending.popleft().result())
+                    self.add_file(arcname, path)
+                    continue
+                pending.append(pool.submit(self._compress_file, arcname, path))
+                # Fenêtre bornée : la mémoire ne dépend pas du nombre de fichiers
+                if len(pending) > self.workers * 4:
+                    self._write_compressed(*pending.popleft().result())
+            while pending:
+                self._write_compressed(*pending.popleft().result())
+
+    # Exécuté dans un thread (ou directement avec un seul thread) : zlib relâche
+    # le GIL pendant la compression
+    def _compress_file(self, arcname, path):
+        started = time.thread_time()
+        with open(path, "rb") as f:
+            data = f.read()
+        info = self._new_info(arcname, os.path.getmtime(path), data[:SAMPLE_SIZE])
+        info.file_size = len(data)
+        info.CRC = zlib.crc32(data)
+        if info.compress_type == zipfile.ZIP_DEFLATED:
+            level = info._compresslevel
+            compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION if level is None else level, zlib.DEFLATED, -15)
+            data = compressor.compress(data) + compressor.flush()
+        info.compress_size = len(data)
+        return info, data, time.thread_time() - started
+
+    def _write_compressed(self, info, data, cpu_seconds):
+        self._write_raw(info, (data,), cpu_seconds)
+
+    # Ajoute toute une arborescence ; `skip` contient les chemins d'archive
+    # remplacés par du contenu généré (viewer.html, scorm.js...)
+    def add_tree(self, src_dir, prefix="", skip=()):
+        skip = {_normalize(name) for name in skip}
+        entries = []
+        for root, dirs, files in os.walk(src_dir):
+            dirs.sort()
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                arcname = _normalize(os.path.join(prefix, os.path.relpath(path, src_dir)))
+                if arcname not in skip:
+                    entries.append((arcname, path))
+        self.add_files(entries)
+
+    # Recopie les membres d'une archive existante sans les décompresser :
+    # les octets déjà compressés sont épissés tels quels dans le nouveau ZIP
+    def add_archive(self, archive_path, prefix="", skip=()):
+        skip = {_normalize(name) for name in skip}
+        with zipfile.ZipFile(archive_path) as source, open(archive_path, "rb") as fp:
+            for info in source.infolist():
+                if info.is_dir():
+                    continue
+                arcname = _normalize(os.path.join(prefix, info.filename))
+                if arcname in skip:
+                    continue
+                self._write_raw(_copy_info(info, arcname), _iter_raw(fp, info), spliced=True)
+
+    # zipfile ne sait pas écrire un membre déjà compressé : on écrit l'en-tête
+    # local et les données nous-mêmes, puis on enregistre l'entrée pour que le
+    # répertoire central soit produit normalement à la fermeture
+    def _write_raw(self, info, chunks, cpu_seconds=0.0, spliced=False):
+        zf = self._zip
+        with zf._lock:
+            if zf._writing:
+                raise ValueError("Un membre est déjà en cours d'écriture dans l'archive")
+            zf._writecheck(info)
+            zf._didModify = True
+            info.header_offset = zf.fp.tell()
+            zf.fp.write(info.FileHeader())
+            for chunk in chunks:
+                zf.fp.write(chunk)
+            zf.filelist.append(info)
+            zf.NameToInfo[info.filename] = info
+            zf.start_dir = zf.fp.tell()
+        self._record(info, cpu_seconds, spliced)
+
+
+def _copy_info(info, arcname):
+    copy = zipfile.ZipInfo(arcname, info.date_time)
+    copy.compress_type = info.compress_type
+    copy.CRC = info.CRC
+    copy.compress_size = info.compress_size
+    copy.file_size = info.file_size
+    copy.external_attr = info.external_attr
+    copy.create_system = info.create_system
+    # Les tailles sont connues : pas de descripteur de données après le membre
+    copy.flag_bits = info.flag_bits & ~0x08
+    return copy
+
+
+# Lit les octets compressés d'un membre en sautant son en-tête local
+def _iter_raw(fp, info):
+    fp.seek(info.header_offset)
+    header = fp.read(zipfile.sizeFileHeader)
+    name_len, extra_len = struct.unpack("<HH", header[26:30])
+    fp.seek(name_len + extra_len, os.SEEK_CUR)
+    remaining = info.compress_size
+    while remaining > 0:
+        chunk = fp.read(min(CHUNK_SIZE, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile(f"Membre tronqué : {info.filename}")
+        remaining -= len(chunk)
+        yield chunk
+
+
+def _normalize(arcname):
+    return str(arcname).replace(os.sep, "/").lstrip("/")
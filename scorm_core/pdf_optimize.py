@@ -0,0 +1,231 @@
+import argparse
+import importlib.util
+import io
+import math
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from scorm_core.metrics import stage
+
+# Optimisation des PDF avant empaquetage : les images matricielles affichées
+# au-delà de la résolution cible sont rééchantillonnées et réencodées en JPEG,
+# les flux non compressés (ou en LZW, ASCIIHex...) sont recompressés et les
+# objets inutilisés ne sont pas réécrits. Nécessite pikepdf et Pillow.
+#
+# Par lot, sur un pool de processus :
+#
+#   python -m scorm_core.pdf_optimize manuels/ -o optimises/ --dpi 150 --quality 75 --workers 4
+
+# Résolution cible des images, à leur taille d'affichage
+DEFAULT_DPI = int(os.environ.get("SCORM_PDF_OPTIMIZE_DPI", "150"))
+# Qualité JPEG des images réencodées (1-95)
+DEFAULT_QUALITY = int(os.environ.get("SCORM_PDF_OPTIMIZE_QUALITY", "75"))
+# Bornes basses atteintes en visant une taille cible
+MIN_DPI = 72
+MIN_QUALITY = 40
+# Images à moins de 10 % au-dessus de la cible : laissées intactes
+DPI_TOLERANCE = 1.1
+# Imbrication maximale des formulaires (XObject /Form) parcourus
+MAX_FORM_DEPTH = 8
+
+
+class OptimizeUnavailable(Exception):
+    pass
+
+
+def optimize_available():
+    return importlib.util.find_spec("pikepdf") is not None and importlib.util.find_spec("PIL") is not None
+
+
+def _multiply(m, n):
+    a, b, c, d, e, f = m
+    A, B, C, D, E, F = n
+    return [a * A + b * C, a * B + b * D, c * A + d * C, c * B + d * D, e * A + f * C + E, e * B + f * D + F]
+
+
+# Taille d'affichage maximale (points) de chaque image, d'après les matrices
+# de transformation (cm) en vigueur aux opérateurs Do des pages et des formulaires
+def _displayed_sizes(pdf):
+    import pikepdf
+
+    sizes = {}
+
+    def scan(content, resources, ctm, depth):
+        xobjects = resources.get("/XObject", {}) if resources is not None else {}
+        stack = []
+        for operands, operator in pikepdf.parse_content_stream(content, "q Q cm Do"):
+            operator = str(operator)
+            if operator == "q":
+                stack.append(ctm)
+            elif operator == "Q":
+                ctm = stack.pop() if stack else ctm
+            elif operator == "cm":
+                ctm = _multiply([float(value) for value in operands], ctm)
+            elif operator == "Do":
+                xobject = xobjects.get(operands[0])
+                if not isinstance(xobject, pikepdf.Stream):
+                    continue
+                if xobject.get("/Subtype") == "/Image":
+                    width, height = math.hypot(ctm[0], ctm[1]), math.hypot(ctm[2], ctm[3])
+                    shown = sizes.get(xobject.objgen, (0, 0))
+                    sizes[xobject.objgen] = (max(shown[0], width), max(shown[1], height), xobject)
+                elif xobject.get("/Subtype") == "/Form" and depth < MAX_FORM_DEPTH:
+                    matrix = [float(value) for value in xobject.get("/Matrix", [1, 0, 0, 1, 0, 0])]
+                    scan(xobject, xobject.get("/Resources", resources), _multiply(matrix, ctm), depth + 1)
+
+    for page in pdf.pages:
+        scan(page, page.obj.get("/Resources"), [1, 0, 0, 1, 0, 0], 0)
+    return sizes
+
+
+# Rééchantillonne une image affichée au-delà de `dpi` et la réencode en JPEG ;
+# True si l'image a été remplacée. Les images avec masque, palette, /Decode
+# ou hors 8 bits gris/RVB sont laissées telles quelles.
+def _downsample(image, shown_width, shown_height, dpi, quality):
+    import pikepdf
+    from PIL import Image
+
+    if shown_width <= 0 or shown_height <= 0:
+        return False
+    if any(key in image for key in ("/ImageMask", "/SMask", "/Mask", "/Decode")):
+        return False
+    if int(image.get("/BitsPerComponent", 8)) != 8:
+        return False
+    width, height = int(image.Width), int(image.Height)
+    current_dpi = min(width / (shown_width / 72), height / (shown_height / 72))
+    if current_dpi <= dpi * DPI_TOLERANCE:
+        return False
+    try:
+        picture = pikepdf.PdfImage(image).as_pil_image()
+    except Exception:
+        return False
+    if picture.mode not in ("L", "RGB"):
+        return False
+
+    scale = dpi / current_dpi
+    picture = picture.resize((max(1, round(width * scale)), max(1, round(height * scale))), Image.LANCZOS)
+    buffer = io.BytesIO()
+    picture.save(buffer, "JPEG", quality=quality, optimize=True)
+    data = buffer.getvalue()
+    if len(data) >= len(image.read_raw_bytes()):
+        return False
+    image.write(data, filter=pikepdf.Name.DCTDecode)
+    image.Width, image.Height = picture.width, picture.height
+    if "/DecodeParms" in image:
+        del image["/DecodeParms"]
+    return True
+
+
+def _optimize_once(src_path, dst_path, dpi, quality):
+    import pikepdf
+
+    with pikepdf.open(src_path) as pdf:
+        if pdf.is_encrypted:
+            return None
+        images = sum(_downsample(image, width, height, dpi, quality)
+                     for width, height, image in _displayed_sizes(pdf).values())
+        pdf.remove_unreferenced_resources()
+        pdf.save(dst_path, compress_streams=True, stream_decode_level=pikepdf.StreamDecodeLevel.generalized,
+                 object_stream_mode=pikepdf.ObjectStreamMode.generate)
+    return images
+
+
+# Écrit la version optimisée de `src_path` dans `dst_path` (copie de l'original
+# si l'optimisation ne gagne rien). `target_mb` : taille visée, atteinte en
+# baissant qualité puis résolution jusqu'à MIN_QUALITY / MIN_DPI ; un réglage
+# de départ déjà sous son plancher n'est jamais relevé.
+# Renvoie {"original", "optimized", "images", "dpi", "quality"}, ou None pour
+# un PDF chiffré (non traité, rien n'est écrit).
+def optimize_pdf(src_path, dst_path, dpi=DEFAULT_DPI, quality=DEFAULT_QUALITY, target_mb=0):
+    if not optimize_available():
+        raise OptimizeUnavailable("pikepdf et Pillow requis pour optimiser le PDF")
+    original = os.path.getsize(src_path)
+    with stage("optimize", original) as timer:
+        while True:
+            images = _optimize_once(src_path, dst_path, dpi, quality)
+            if images is None:
+                return None
+            optimized = os.path.getsize(dst_path)
+            if not target_mb or optimized <= target_mb * 1024 * 1024 or (quality <= MIN_QUALITY and dpi <= MIN_DPI):
+                break
+            if quality > MIN_QUALITY:
+                quality = max(MIN_QUALITY, quality - 15)
+            else:
+                dpi = max(MIN_DPI, int(dpi * 0.75))
+        if optimized >= original:
+            shutil.copyfile(src_path, dst_path)
+            optimized, images = original, 0
+        timer.add_bytes(optimized)
+    return {"original": original, "optimized": optimized, "images": images, "dpi": dpi, "quality": quality}
+
+
+def format_report(stats):
+    original, optimized = stats["original"], stats["optimized"]
+    if optimized >= original:
+        return f"PDF optimisé : aucun gain ({original / 1024 / 1024:.1f} Mo), original conservé"
+    return (f"PDF optimisé : {original / 1024 / 1024:.1f} Mo → {optimized / 1024 / 1024:.1f} Mo "
+            f"({(optimized - original) / original:+.0%}), {stats['images']} images réencodées "
+            f"({stats['dpi']} dpi, qualité {stats['quality']})")
+
+
+def _optimize_file(src_path, dst_path, dpi, quality, target_mb):
+    os.makedirs(os.path.dirname(os.path.abspath(dst_path)), exist_ok=True)
+    try:
+        return src_path, optimize_pdf(src_path, dst_path, dpi, quality, target_mb), None
+    except Exception as e:
+        return src_path, None, f"{type(e).__name__}: {e}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m scorm_core.pdf_optimize",
+                                     description="Optimisation de PDF par lot")
+    parser.add_argument("inputs", nargs="+", help="PDF ou dossiers de PDF")
+    parser.add_argument("-o", "--output-dir", default="pdf_optimises")
+    parser.add_argument("--dpi", type=int, default=DEFAULT_DPI)
+    parser.add_argument("--quality", type=int, default=DEFAULT_QUALITY)
+    parser.add_argument("--target-mb", type=float, default=0, help="Taille visée par document (Mo)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Nombre de processus")
+    args = parser.parse_args(argv)
+
+    files = []
+    for input_path in args.inputs:
+        if os.path.isdir(input_path):
+            files += [(str(path), str(path.relative_to(input_path)))
+                      for path in sorted(Path(input_path).rglob("*.pdf"))]
+        else:
+            files.append((input_path, os.path.basename(input_path)))
+    if not files:
+        print("Aucun PDF à optimiser.", file=sys.stderr)
+        return 1
+
+    reports = {}
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = [pool.submit(_optimize_file, path, os.path.join(args.output_dir, name),
+                               args.dpi, args.quality, args.target_mb) for path, name in files]
+        for future in as_completed(futures):
+            path, stats, error = future.result()
+            reports[path] = (stats, error)
+            print(f"[{len(reports)}/{len(files)}] {path}", file=sys.stderr)
+
+    total_in = total_out = 0
+    for path, _ in files:
+        stats, error = reports[path]
+        if error or stats is None:
+            print(f"{'échec' if error else 'ignoré':<7} {path}  -> {error or 'PDF chiffré'}")
+            continue
+        total_in += stats["original"]
+        total_out += stats["optimized"]
+        print(f"{stats['original'] / 1024 / 1024:8.1f} Mo → {stats['optimized'] / 1024 / 1024:8.1f} Mo "
+              f"{(stats['optimized'] - stats['original']) / stats['original']:+5.0%} "
+              f"{stats['images']:5d} images  {path}")
+    if total_in:
+        print(f"Total : {total_in / 1024 / 1024:.1f} Mo → {total_out / 1024 / 1024:.1f} Mo "
+              f"({(total_out - total_in) / total_in:+.0%})")
+    return 0 if all(error is None for _, error in reports.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
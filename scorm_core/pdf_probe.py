@@ -0,0 +1,412 @@
+import mmap
+import re
+import zlib
+from collections import namedtuple
+
+# Sonde PDF légère : le fichier est projeté en mémoire (mmap) et seuls le
+# trailer, la table xref, le catalogue et l'arbre des pages sont lus. Le
+# contenu des pages, les polices et les images ne sont jamais décodés.
+# PyPDF2 (analyse complète, avec réparation) ne sert que si la sonde échoue.
+
+Ref = namedtuple("Ref", "num gen")
+
+TAIL_SIZE = 2048
+WHITESPACE = b" \t\r\n\f\x00"
+DELIMITERS = b"()<>[]{}/%"
+_NUMBER = re.compile(rb"[+-]?(?:\d+\.?\d*|\.\d+)")
+_REF_TAIL = re.compile(rb"\s+(\d+)\s+R(?=[\s/<>\[\]()%]|$)")
+_OBJ_HEADER = re.compile(rb"\s*(\d+)\s+(\d+)\s+obj\b")
+_XREF_SECTION = re.compile(rb"\s*(\d+)\s+(\d+)\s*[\r\n]")
+_XREF_ENTRY = re.compile(rb"(\d{10})\s(\d{5})\s([nf])")
+_VERSION = re.compile(rb"%PDF-(\d\.\d)")
+
+
+class ProbeError(Exception):
+    pass
+
+
+class PdfInfo:
+    def __init__(self, page_count, page_sizes=(), has_outline=False, encrypted=False, linearized=False,
+                 version=None, may_have_cid_fonts=True, parser="probe"):
+        self.page_count = page_count
+        # (largeur, hauteur) en points, rotation /Rotate appliquée
+        self.page_sizes = list(page_sizes)
+        self.has_outline = has_outline
+        self.encrypted = encrypted
+        self.linearized = linearized
+        self.version = version
+        # False seulement si aucune police CID (Type0) ne peut figurer dans le
+        # fichier ; calculé uniquement avec scan_fonts=True (lecture complète)
+        self.may_have_cid_fonts = may_have_cid_fonts
+        # "probe" ou "pypdf2" (fichier endommagé ou structure non gérée)
+        self.parser = parser
+
+    def __repr__(self):
+        return (f"PdfInfo(pages={self.page_count}, outline={self.has_outline}, encrypted={self.encrypted}, "
+                f"linearized={self.linearized}, version={self.version}, parser={self.parser})")
+
+
+class _Document:
+    def __init__(self, data):
+        self.data = data
+        self.xref = {}
+        self.trailer = {}
+        self.cache = {}
+        self.object_streams = {}
+
+    # --- Lecture des objets -------------------------------------------------
+
+    def skip_ws(self, pos):
+        data = self.data
+        while pos < len(data):
+            c = data[pos]
+            if c in WHITESPACE:
+                pos += 1
+            elif c == 0x25:  # % commentaire
+                while pos < len(data) and data[pos] not in b"\r\n":
+                    pos += 1
+            else:
+                break
+        return pos
+
+    def parse(self, pos):
+        data = self.data
+        pos = self.skip_ws(pos)
+        c = data[pos:pos + 1]
+        if c == b"/":
+            end = pos + 1
+            while end < len(data) and data[end] not in WHITESPACE and data[end] not in DELIMITERS:
+                end += 1
+            name = re.sub(rb"#([0-9A-Fa-f]{2})", lambda m: bytes([int(m.group(1), 16)]), data[pos:end])
+            return name.decode("latin-1"), end
+        if c == b"<":
+            if data[pos + 1:pos + 2] == b"<":
+                result = {}
+                pos += 2
+                while True:
+                    pos = self.skip_ws(pos)
+                    if data[pos:pos + 2] == b">>":
+                        return result, pos + 2
+                    key, pos = self.parse(pos)
+                    value, pos = self.parse(pos)
+                    result[key] = value
+            end = data.find(b">", pos)
+            if end < 0:
+                raise ProbeError("Chaîne hexadécimale non terminée")
+            return bytes.fromhex(re.sub(rb"\s", b"", data[pos + 1:end]).decode("ascii")), end + 1
+        if c == b"[":
+            result = []
+            pos += 1
+            while True:
+                pos = self.skip_ws(pos)
+                if data[pos:pos + 1] == b"]":
+                    return result, pos + 1
+                value, pos = self.parse(pos)
+                result.append(value)
+        if c == b"(":
+            # Chaîne littérale : parenthèses imbriquées et échappements
+            depth, end = 1, pos + 1
+            while depth:
+                ch = data[end]
+                if ch == 0x5C:
+                    end += 1
+                elif ch == 0x28:
+                    depth += 1
+                elif ch == 0x29:
+                    depth -= 1
+                end += 1
+            return data[pos + 1:end - 1], end
+        match = _NUMBER.match(data, pos)
+        if match:
+            token = match.group()
+            if b"." in token:
+                return float(token), match.end()
+            # "num gen R" : référence indirecte
+            ref = _REF_TAIL.match(data, match.end())
+            if ref:
+                return Ref(int(token), int(ref.group(1))), ref.end()
+            return int(token), match.end()
+        for keyword, value in ((b"true", True), (b"false", False), (b"null", None)):
+            if data[pos:pos + len(keyword)] == keyword:
+                return value, pos + len(keyword)
+        raise ProbeError(f"Jeton inattendu à l'offset {pos}")
+
+    # Objet indirect à `offset` : (valeur, données du flux ou None)
+    def parse_indirect(self, offset, expected=None):
+        match = _OBJ_HEADER.match(self.data, offset)
+        if not match or (expected is not None and int(match.group(1)) != expected):
+            raise ProbeError(f"Objet {expected} introuvable à l'offset {offset}")
+        value, pos = self.parse(match.end())
+        pos = self.skip_ws(pos)
+        if isinstance(value, dict) and self.data[pos:pos + 6] == b"stream":
+            pos += 6
+            if self.data[pos:pos + 2] == b"\r\n":
+                pos += 2
+            elif self.data[pos:pos + 1] in (b"\n", b"\r"):
+                pos += 1
+            length = self.resolve(value.get("/Length"))
+            if not isinstance(length, int):
+                raise ProbeError("Longueur de flux invalide")
+            return value, self.data[pos:pos + length]
+        return value, None
+
+    def resolve(self, value):
+        while isinstance(value, Ref):
+            value = self.load(value.num)
+        return value
+
+    def load(self, num):
+        if num in self.cache:
+            return self.cache[num]
+        entry = self.xref.get(num)
+        if entry is None:
+            value = None
+        elif entry[0] == "offset":
+            value = self.parse_indirect(entry[1], num)[0]
+        else:
+            value = self.load_compressed(entry[1], entry[2])
+        self.cache[num] = value
+        return value
+
+    # Objet rangé dans un flux d'objets (/ObjStm, PDF 1.5+)
+    def load_compressed(self, stream_num, index):
+        if stream_num not in self.object_streams:
+            if "/Encrypt" in self.trailer:
+                raise ProbeError("Flux d'objets chiffré")
+            entry = self.xref.get(stream_num)
+            if entry is None or entry[0] != "offset":
+                raise ProbeError(f"Flux d'objets {stream_num} introuvable")
+            header, raw = self.parse_indirect(entry[1], stream_num)
+            content = _decode(header, raw)
+            count, first = self.resolve(header["/N"]), self.resolve(header["/First"])
+            numbers = [int(n) for n in content[:first].split()]
+            self.object_streams[stream_num] = (content, first, numbers[1:2 * count:2])
+        content, first, offsets = self.object_streams[stream_num]
+        parser = _Document(content)
+        return parser.parse(first + offsets[index])[0]
+
+    # --- Tables de références -----------------------------------------------
+
+    def read_xref(self):
+        tail_start = max(0, len(self.data) - TAIL_SIZE)
+        marker = self.data.rfind(b"startxref", tail_start)
+        if marker < 0:
+            raise ProbeError("startxref absent")
+        offset = self.parse(marker + len(b"startxref"))[0]
+        seen = set()
+        while isinstance(offset, int) and offset not in seen:
+            seen.add(offset)
+            if self.data[self.skip_ws(offset):self.skip_ws(offset) + 4] == b"xref":
+                trailer = self.read_xref_table(self.skip_ws(offset) + 4)
+                # Fichier hybride : flux xref complémentaire
+                if isinstance(trailer.get("/XRefStm"), int):
+                    self.read_xref_stream(trailer["/XRefStm"])
+            else:
+                trailer = self.read_xref_stream(offset)
+            for key, value in trailer.items():
+                self.trailer.setdefault(key, value)
+            offset = trailer.get("/Prev")
+        if "/Root" not in self.trailer:
+            raise ProbeError("Trailer sans /Root")
+
+    def read_xref_table(self, pos):
+        data = self.data
+        while True:
+            pos = self.skip_ws(pos)
+            if data[pos:pos + 7] == b"trailer":
+                return self.parse(pos + 7)[0]
+            section = _XREF_SECTION.match(data, pos)
+            if not section:
+                raise ProbeError("Table xref illisible")
+            start, count = int(section.group(1)), int(section.group(2))
+            pos = section.end()
+            for num in range(start, start + count):
+                entry = _XREF_ENTRY.match(data, self.skip_ws(pos))
+                if not entry:
+                    raise ProbeError("Entrée xref illisible")
+                pos = entry.end()
+                # La section la plus récente (lue en premier) l'emporte
+                if entry.group(3) == b"n" and num not in self.xref:
+                    self.xref[num] = ("offset", int(entry.group(1)))
+
+    def read_xref_stream(self, offset):
+        header, raw = self.parse_indirect(offset)
+        if not isinstance(header, dict) or header.get("/Type") != "/XRef" or raw is None:
+            raise ProbeError("Flux xref attendu")
+        content = _decode(header, raw)
+        widths = header["/W"]
+        index = header.get("/Index", [0, header["/Size"]])
+        pos = 0
+        for start, count in zip(index[0::2], index[1::2]):
+            for num in range(start, start + count):
+                fields = []
+                for width in widths:
+                    fields.append(int.from_bytes(content[pos:pos + width], "big"))
+                    pos += width
+                kind = fields[0] if widths[0] else 1
+                if num in self.xref:
+                    continue
+                if kind == 1:
+                    self.xref[num] = ("offset", fields[1])
+                elif kind == 2:
+                    self.xref[num] = ("compressed", fields[1], fields[2])
+        if pos > len(content):
+            raise ProbeError("Flux xref tronqué")
+        return header
+
+
+def _decode(header, raw):
+    filters = header.get("/Filter")
+    filters = filters if isinstance(filters, list) else [filters] if filters else []
+    if any(name != "/FlateDecode" for name in filters):
+        raise ProbeError(f"Filtre non géré : {filters}")
+    data = zlib.decompress(bytes(raw)) if filters else bytes(raw)
+    params = header.get("/DecodeParms") or {}
+    if isinstance(params, list):
+        params = params[0] or {}
+    predictor = params.get("/Predictor", 1)
+    if predictor >= 10:
+        return _png_unpredict(data, params.get("/Columns", 1))
+    if predictor != 1:
+        raise ProbeError(f"Prédicteur non géré : {predictor}")
+    return data
+
+
+# Prédicteurs PNG (ligne par ligne) des flux xref compressés
+def _png_unpredict(data, columns):
+    rows = []
+    previous = bytearray(columns)
+    for pos in range(0, len(data), columns + 1):
+        kind, row = data[pos], bytearray(data[pos + 1:pos + 1 + columns])
+        for i in range(len(row)):
+            left = row[i - 1] if i else 0
+            up = previous[i]
+            if kind == 1:
+                row[i] = (row[i] + left) & 0xFF
+            elif kind == 2:
+                row[i] = (row[i] + up) & 0xFF
+            elif kind == 3:
+                row[i] = (row[i] + (left + up) // 2) & 0xFF
+            elif kind == 4:
+                upper_left = previous[i - 1] if i else 0
+                p = left + up - upper_left
+                pa, pb, pc = abs(p - left), abs(p - up), abs(p - upper_left)
+                row[i] = (row[i] + (left if pa <= pb and pa <= pc else up if pb <= pc else upper_left)) & 0xFF
+        rows.append(bytes(row))
+        previous = row
+    return b"".join(rows)
+
+
+def _box_size(box, rotate):
+    x0, y0, x1, y1 = (float(v) for v in box)
+    width, height = abs(x1 - x0), abs(y1 - y0)
+    return (height, width) if rotate % 180 else (width, height)
+
+
+def _page_sizes(doc, pages_root):
+    sizes = []
+    seen = set()
+    stack = [(pages_root, None, 0)]
+    while stack:
+        ref, box, rotate = stack.pop()
+        if isinstance(ref, Ref):
+            if ref.num in seen:
+                continue
+            seen.add(ref.num)
+        node = doc.resolve(ref)
+        if not isinstance(node, dict):
+            continue
+        box = doc.resolve(node.get("/MediaBox", box))
+        rotate = doc.resolve(node.get("/Rotate", rotate)) or 0
+        if "/Kids" in node:
+            for kid in reversed(doc.resolve(node["/Kids"])):
+                stack.append((kid, box, rotate))
+        else:
+            if box is None:
+                box = [0, 0, 612, 792]  # Lettre US, valeur par défaut de la norme
+            sizes.append(_box_size([doc.resolve(v) for v in box], rotate))
+    return sizes
+
+
+def _probe(data, with_sizes, scan_fonts):
+    doc = _Document(data)
+    doc.read_xref()
+    catalog = doc.resolve(doc.trailer["/Root"])
+    pages = doc.resolve(catalog["/Pages"])
+    page_count = doc.resolve(pages["/Count"])
+    if not isinstance(page_count, int):
+        raise ProbeError("/Count invalide")
+    outlines = doc.resolve(catalog.get("/Outlines"))
+    has_outline = isinstance(outlines, dict) and outlines.get("/First") is not None
+
+    # Un dictionnaire /Linearized est le premier objet d'un PDF linéarisé
+    linearized = False
+    first = _OBJ_HEADER.search(data, 0, 1024)
+    if first:
+        try:
+            head = doc.parse(first.end())[0]
+            linearized = isinstance(head, dict) and "/Linearized" in head
+        except (ProbeError, IndexError, ValueError):
+            pass
+
+    version = _VERSION.match(data[:16])
+    version = version.group(1).decode("ascii") if version else None
+    catalog_version = doc.resolve(catalog.get("/Version"))
+    if isinstance(catalog_version, str) and version and catalog_version.lstrip("/") > version:
+        version = catalog_version.lstrip("/")
+
+    compressed = any(entry[0] == "compressed" for entry in doc.xref.values())
+    return PdfInfo(
+        page_count,
+        _page_sizes(doc, catalog["/Pages"]) if with_sizes else (),
+        has_outline=has_outline,
+        encrypted="/Encrypt" in doc.trailer,
+        linearized=linearized,
+        version=version,
+        may_have_cid_fonts=not scan_fonts or compressed or data.find(b"/Type0") >= 0,
+    )
+
+
+def _probe_pypdf2(source, with_sizes):
+    from PyPDF2 import PdfReader
+
+    if hasattr(source, "seek"):
+        source.seek(0)
+    reader = PdfReader(source, strict=False)
+    encrypted = reader.is_encrypted
+    if encrypted:
+        reader.decrypt("")
+    sizes = []
+    if with_sizes:
+        for page in reader.pages:
+            box = page.mediabox
+            sizes.append(_box_size((box.left, box.bottom, box.right, box.top), page.get("/Rotate", 0) or 0))
+    try:
+        has_outline = bool(reader.outline)
+    except Exception:
+        has_outline = False
+    return PdfInfo(len(reader.pages), sizes, has_outline=has_outline, encrypted=encrypted,
+                   version=reader.pdf_header[5:] or None, parser="pypdf2")
+
+
+# Nombre de pages, tailles, signets, chiffrement... d'un PDF (chemin ou objet
+# fichier). `scan_fonts` parcourt en plus tout le fichier à la recherche de
+# polices Type0, ce qui évite d'analyser un PDF qui n'en contient aucune.
+def probe_pdf(source, with_sizes=True, scan_fonts=False):
+    try:
+        if isinstance(source, str) or hasattr(source, "__fspath__"):
+            with open(source, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return _probe(data, with_sizes, scan_fonts)
+        if hasattr(source, "fileno"):
+            try:
+                source.fileno()
+            except (OSError, ValueError):
+                pass
+            else:
+                with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    return _probe(data, with_sizes, scan_fonts)
+        # Objet fichier en mémoire (upload) : pas de mmap possible
+        source.seek(0)
+        return _probe(source.read(), with_sizes, scan_fonts)
+    except (ProbeError, KeyError, IndexError, ValueError, TypeError, AttributeError, zlib.error):
+        return _probe_pypdf2(source, with_sizes)
@@ -0,0 +1,60 @@
+import posixpath
+import re
+import zipfile
+
+# Profils de packaging du viewer pdf.js :
+# - "lean" : ce que l'apprenant charge réellement (sans source maps ni debugger)
+# - "full" : le template complet, pour le dépannage dans le LMS
+PROFILES = ["lean", "full"]
+DEFAULT_PROFILE = "lean"
+
+# Page HTML du viewer dans le template, relative à la racine du package
+VIEWER_PATH = "web/viewer.html"
+
+_REFERENCE_RE = re.compile(r"""(?:src|href)\s*=\s*["']([^"'#?]+)""", re.IGNORECASE)
+
+
+# Chemins d'archive des fichiers locaux référencés par viewer.html
+def referenced_assets(viewer_html, viewer_path=VIEWER_PATH):
+    base = posixpath.dirname(viewer_path)
+    assets = set()
+    for ref in _REFERENCE_RE.findall(viewer_html):
+        if ":" in ref or ref.startswith("//"):
+            continue
+        assets.add(posixpath.normpath(posixpath.join(base, ref)))
+    return assets
+
+
+# Membres du template à exclure pour un profil donné, avec leur taille.
+# En "lean", on retire les source maps et les scripts du dossier du viewer
+# que viewer.html ne charge pas (debugger.js, chargé seulement avec #pdfbug) ;
+# un fichier référencé par viewer.html n'est jamais exclu.
+def profile_exclusions(archive_path, profile, viewer_html, viewer_path=VIEWER_PATH):
+    if profile not in PROFILES:
+        raise ValueError(f"Profil inconnu : {profile} (attendu : {', '.join(PROFILES)})")
+    if profile == "full":
+        return {}
+
+    referenced = referenced_assets(viewer_html, viewer_path)
+    viewer_dir = posixpath.dirname(viewer_path)
+    excluded = {}
+    with zipfile.ZipFile(archive_path) as archive:
+        for info in archive.infolist():
+            name = info.filename
+            if name in referenced:
+                continue
+            unused_script = posixpath.dirname(name) == viewer_dir and name.endswith(".js")
+            if name.endswith(".map") or unused_script:
+                excluded[name] = info.file_size
+    return excluded
+
+
+def profile_summary(profile, excluded, archive_path):
+    with zipfile.ZipFile(archive_path) as archive:
+        total = sum(info.file_size for info in archive.infolist())
+    removed = sum(excluded.values())
+    percent = 100 * removed / total if total else 0
+    return (
+        f"Profil {profile} : {len(excluded)} fichiers exclus, "
+        f"{removed / 1024 / 1024:.1f} Mo de moins ({percent:.0f} % du template)"
+    )
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+
+from scorm_core.metrics import stage
+from scorm_core.packaging import CHUNK_SIZE
+from scorm_core.workspace import default_workspace
+
+# Packages déjà générés, indexés par empreinte des entrées + options, rangés
+# dans results/ de l'espace de travail. Borne propre au cache, en plus du
+# quota global de l'espace de travail.
+RESULT_CACHE_MAX_BYTES = int(os.environ.get("SCORM_RESULT_CACHE_MB", "2048")) * 1024 * 1024
+
+
+# Écrit un upload (objet fichier) sur disque et calcule son SHA-256 dans la
+# même passe : le fichier n'est lu qu'une fois
+def write_and_hash(source, dest_path):
+    digest = hashlib.sha256()
+    if hasattr(source, "seek"):
+        source.seek(0)
+    with stage("upload") as timer, open(dest_path, "wb") as out:
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+            out.write(chunk)
+            timer.add_bytes(len(chunk))
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return digest.hexdigest()
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Clé de cache : convertisseur, empreintes des fichiers d'entrée et toutes
+# les options de construction (version SCORM, critères, durée, sous-titres...)
+def cache_key(builder, input_hashes, options):
+    payload = json.dumps(
+        {"builder": builder, "inputs": list(input_hashes), "options": options},
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# Cache disque borné en taille, éviction LRU : la date de modification d'une
+# entrée est rafraîchie à chaque accès et les plus anciennes partent en premier.
+# Rattaché à un `workspace`, il en respecte aussi le quota global.
+class ResultCache:
+    def __init__(self, root=None, max_bytes=None, workspace=None):
+        self.workspace = workspace
+        self.root = root or workspace.area("results")
+        self.max_bytes = RESULT_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], f"{key}.zip")
+
+    # Chemin du package en cache, ou None. `count=False` : nouvelle recherche
+    # pour une demande déjà comptée (job de la file qui a manqué le cache à
+    # la soumission), sans fausser les compteurs
+    def get(self, key, count=True):
+        path = self._path(key)
+        try:
+            os.utime(path, None)
+        except FileNotFoundError:
+            if count:
+                with self._lock:
+                    self.misses += 1
+            return None
+        if count:
+            with self._lock:
+                self.hits += 1
+        return path
+
+    # Déplace le package construit dans le cache et retourne son chemin en
+    # cache. Un package plus gros que tout le cache reste où il est.
+    def put(self, key, built_path):
+        size = os.path.getsize(built_path)
+        if size > self.max_bytes:
+            return built_path
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            shutil.move(built_path, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.evict(keep=path)
+        if self.workspace is not None:
+            self.workspace.enforce_quota(keep=path)
+        return path
+
+    def _entries(self):
+        entries = []
+        for root, _, files in os.walk(self.root):
+            for name in files:
+                if not name.endswith(".zip"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self, keep=None):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stats(self):
+        entries = self._entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+        }
+
+    def summary(self):
+        stats = self.stats()
+        return (
+            f"Cache des packages : {stats['hits']} succès, {stats['misses']} échecs, "
+            f"{stats['entries']} packages ({stats['bytes'] / 1024 / 1024:.1f} Mo / "
+            f"{self.max_bytes / 1024 / 1024:.0f} Mo)"
+        )
+
+
+_default_cache = None
+
+
+# Instance partagée par les pages Streamlit du processus (les compteurs
+# survivent aux reruns)
+def default_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResultCache(workspace=default_workspace())
+    return _default_cache
@@ -0,0 +1,209 @@
+import gzip
+import json
+import os
+import re
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+
+from scorm_core.metrics import stage
+
+# Index de recherche construit à l'empaquetage : le texte de chaque page,
+# normalisé (minuscules, sans accents ni espaces), en JSON compressé gzip dans
+# web/search-index.json.gz. Dans le package, la recherche de pdf.js ne lit
+# plus le texte de toutes les pages : l'index désigne les pages candidates et
+# seules celles-ci sont analysées (et surlignées) par pdf.js.
+#
+# Pages sans texte extrait (scans, polices sans table Unicode) : null dans
+# l'index, toujours candidates.
+
+INDEX_NAME = "web/search-index.json.gz"
+# Processus d'extraction (1 = dans le processus courant)
+INDEX_WORKERS = int(os.environ.get("SCORM_INDEX_WORKERS", os.cpu_count() or 1))
+# Pages extraites par tâche du pool
+PAGES_PER_TASK = 100
+
+# Remplacements appliqués par pdf.js à la requête (normalize() de viewer.js)
+_PDFJS_CHARACTERS = str.maketrans({
+    "‘": "'", "’": "'", "‚": "'", "‛": "'",
+    "“": '"', "”": '"', "„": '"', "‟": '"',
+    "\xBC": "1/4", "\xBD": "1/2", "\xBE": "3/4",
+})
+_DIACRITICS = re.compile("[\u0300-\u036f]")
+_SPACES = re.compile(r"\s+")
+
+
+# Même normalisation que viewer_search_script() côté navigateur
+def normalize_text(text):
+    text = unicodedata.normalize("NFKC", text.translate(_PDFJS_CHARACTERS)).lower()
+    return _SPACES.sub("", _DIACRITICS.sub("", unicodedata.normalize("NFD", text)))
+
+
+def _page_text(page):
+    try:
+        return normalize_text(page.extract_text() or "") or None
+    except Exception:
+        return None
+
+
+# Exécuté dans un processus du pool : chaque processus ouvre le PDF
+def _extract_range(path, start, stop):
+    from PyPDF2 import PdfReader
+    reader = PdfReader(path)
+    return [_page_text(reader.pages[index]) for index in range(start, stop)]
+
+
+# Texte normalisé de chaque page ; au-delà de deux tâches, les plages de
+# PAGES_PER_TASK pages sont réparties sur `workers` processus
+def extract_pages(pdf_source, page_count, workers=None):
+    workers = workers or INDEX_WORKERS
+    ranges = [(start, min(start + PAGES_PER_TASK, page_count)) for start in range(0, page_count, PAGES_PER_TASK)]
+    if workers <= 1 or len(ranges) < 2 or not isinstance(pdf_source, (str, os.PathLike)):
+        from PyPDF2 import PdfReader
+        if not isinstance(pdf_source, (str, os.PathLike)):
+            pdf_source.seek(0)
+        reader = PdfReader(pdf_source)
+        return [_page_text(page) for page in reader.pages]
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+        futures = [pool.submit(_extract_range, os.fspath(pdf_source), start, stop) for start, stop in ranges]
+        return [text for future in futures for text in future.result()]
+
+
+# Contenu de web/search-index.json.gz
+def build_search_index(pdf_source, page_count, workers=None):
+    with stage("search_index") as timer:
+        pages = extract_pages(pdf_source, page_count, workers)
+        data = json.dumps({"version": 1, "pages": pages}, ensure_ascii=False, separators=(",", ":")).encode()
+        index = gzip.compress(data, mtime=0)
+        timer.add_bytes(len(index))
+    return index, sum(text is not None for text in pages)
+
+
+# Script inséré dans viewer.html après viewer.js : la recherche de pdf.js
+# (PDFFindController) n'extrait plus le texte de toutes les pages. Une page
+# absente de l'index des candidates compte zéro résultat sans être chargée ;
+# le texte des autres est demandé à pdf.js au moment du calcul, pour que le
+# surlignage corresponde exactement à la couche texte. Sans index (fichier
+# absent, navigateur sans DecompressionStream), la recherche d'origine reste.
+def viewer_search_script(index_url="search-index.json.gz"):
+    return """<script>
+  (function () {
+    var NORMALIZE = { "\\u2018": "'", "\\u2019": "'", "\\u201A": "'", "\\u201B": "'", "\\u201C": '"', "\\u201D": '"',
+      "\\u201E": '"', "\\u201F": '"', "\\u00BC": "1/4", "\\u00BD": "1/2", "\\u00BE": "3/4" };
+    function normalizeQuery(text) {
+      text = text.normalize("NFKC").toLowerCase().normalize("NFD");
+      return text.replace(/[\\u0300-\\u036f]/g, "").replace(/\\s+/g, "");
+    }
+    function normalizeContent(text) {
+      var diffs = null;
+      var normalized = text.replace(/[\\u2018\\u2019\\u201A\\u201B\\u201C\\u201D\\u201E\\u201F\\u00BC\\u00BD\\u00BE]/g,
+        function (ch, index) {
+          var diff = NORMALIZE[ch].length - ch.length;
+          if (diff !== 0) {
+            (diffs || (diffs = [])).push([index, diff]);
+          }
+          return NORMALIZE[ch];
+        });
+      return [normalized, diffs];
+    }
+    function loadIndex() {
+      return fetch("%(url)s").then(function (response) {
+        if (!response.ok) {
+          throw new Error(response.status);
+        }
+        return response.arrayBuffer();
+      }).then(function (buffer) {
+        var bytes = new Uint8Array(buffer);
+        // Serveur ayant déjà décompressé (Content-Encoding: gzip) : JSON direct
+        if (bytes[0] !== 0x1f || bytes[1] !== 0x8b) {
+          return JSON.parse(new TextDecoder().decode(bytes));
+        }
+        var stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("gzip"));
+        return new Response(stream).json();
+      });
+    }
+    if (typeof DecompressionStream === "undefined" || !String.prototype.normalize) {
+      return;
+    }
+    var indexPromise = loadIndex().catch(function (reason) {
+      console.warn("Index de recherche indisponible", reason);
+      return null;
+    });
+
+    window.PDFViewerApplication.initializedPromise.then(function () {
+      var finder = window.PDFViewerApplication.findController;
+      var calculateMatch = finder._calculateMatch;
+      var nextMatch = finder._nextMatch;
+      var extractText = finder._extractText;
+      var cycle = 0;
+      var pending = {};
+
+      // Nouvelle recherche : les calculs de pages encore en attente sont périmés
+      finder._nextMatch = function () {
+        if (this._dirtyMatch) {
+          cycle++;
+        }
+        return nextMatch.apply(this, arguments);
+      };
+
+      finder._extractText = function () {
+        var self = this;
+        if (this._extractTextPromises.length > 0) {
+          return;
+        }
+        var pagesCount = this._linkService.pagesCount;
+        var ready = indexPromise.then(function (index) {
+          self._searchIndex = index && index.pages.length === pagesCount ? index.pages : null;
+          if (!self._searchIndex) {
+            self._extractTextPromises = [];
+            extractText.call(self);
+          }
+        });
+        for (var i = 0; i < pagesCount; i++) {
+          this._extractTextPromises[i] = ready.then(function (pageIndex) {
+            return self._searchIndex ? pageIndex : self._extractTextPromises[pageIndex];
+          }.bind(null, i));
+        }
+      };
+
+      finder._calculateMatch = function (pageIndex) {
+        var self = this;
+        var index = this._searchIndex;
+        if (!index || this._pageContents[pageIndex] !== undefined) {
+          return calculateMatch.call(this, pageIndex);
+        }
+        var text = index[pageIndex];
+        var query = normalizeQuery(this._query);
+        var terms = this._state.phraseSearch ? [query] : this._query.split(/\\s+/).map(normalizeQuery);
+        var candidate = text === null || terms.some(function (term) {
+          return term && text.indexOf(term) !== -1;
+        });
+        if (!candidate) {
+          this._pageContents[pageIndex] = "";
+          calculateMatch.call(this, pageIndex);
+          this._pageContents[pageIndex] = undefined;
+          return;
+        }
+        var current = cycle;
+        if (!pending[pageIndex]) {
+          pending[pageIndex] = this._pdfDocument.getPage(pageIndex + 1).then(function (page) {
+            return page.getTextContent({ normalizeWhitespace: true });
+          }).then(function (content) {
+            var normalized = normalizeContent(content.items.map(function (item) {
+              return item.str;
+            }).join(""));
+            self._pageContents[pageIndex] = normalized[0];
+            self._pageDiffs[pageIndex] = normalized[1];
+          }, function () {
+            self._pageContents[pageIndex] = "";
+            self._pageDiffs[pageIndex] = null;
+          });
+        }
+        pending[pageIndex].then(function () {
+          if (current === cycle) {
+            calculateMatch.call(self, pageIndex);
+          }
+        });
+      };
+    });
+  })();
+  </script>""" % {"url": index_url}
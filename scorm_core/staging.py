@@ -0,0 +1,83 @@
+import os
+import shutil
+import uuid
+import weakref
+
+from scorm_core.result_cache import write_and_hash
+from scorm_core.workspace import default_workspace
+
+
+def upload_id(uploaded_file):
+    # `file_id` (Streamlit récent) ou `id` (anciennes versions) change à chaque nouvel upload
+    for attribute in ("file_id", "id"):
+        value = getattr(uploaded_file, attribute, None)
+        if value is not None:
+            return str(value)
+    return f"{uploaded_file.name}:{getattr(uploaded_file, 'size', '')}"
+
+
+# Uploads d'une session : chaque fichier n'est écrit qu'une fois, puis réutilisé
+# à chaque rerun tant que l'upload du widget ne change pas. Le dossier de la
+# session (sessions/ de l'espace de travail) est supprimé quand l'objet est
+# libéré (fin de session Streamlit), ou au prochain démarrage après un crash.
+class UploadStaging:
+    def __init__(self, workspace=None):
+        workspace = workspace or default_workspace()
+        self.dir = workspace.new_dir("sessions", "session_")
+        self._slots = {}
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.dir, True)
+
+    # Retourne (chemin, sha256) de l'upload pour l'emplacement `slot` (clé du
+    # widget) ; `name` est le nom de fichier voulu sur disque
+    def stage(self, slot, uploaded_file, name=None):
+        name = os.path.basename(name or uploaded_file.name)
+        key = (upload_id(uploaded_file), name)
+        entry = self._slots.get(slot)
+        if entry and entry[0] == key and os.path.exists(entry[1]):
+            # Session active : son dossier ne doit pas être pris pour un orphelin
+            os.utime(self.dir, None)
+            return entry[1], entry[2]
+
+        # Écriture et empreinte en une passe, puis rangement par contenu :
+        # le même fichier ré-uploadé n'occupe qu'une place
+        tmp_path = os.path.join(self.dir, f"{uuid.uuid4().hex}.part")
+        content_hash = write_and_hash(uploaded_file, tmp_path)
+        path = os.path.join(self.dir, content_hash[:16], name)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+
+        self._slots[slot] = (key, path, content_hash)
+        if entry:
+            self._discard(entry[1])
+        return path, content_hash
+
+    # Supprime le dossier d'un upload (et ses fichiers dérivés, ex. .vtt
+    # converti) s'il ne sert plus à aucun emplacement
+    def _discard(self, path):
+        folder = os.path.dirname(path)
+        if all(os.path.dirname(entry[1]) != folder for entry in self._slots.values()):
+            shutil.rmtree(folder, ignore_errors=True)
+
+    # Oublie l'upload d'un emplacement (fichier retiré du widget)
+    def release(self, slot):
+        entry = self._slots.pop(slot, None)
+        if entry is not None:
+            self._discard(entry[1])
+
+    # Libère les emplacements qui ne sont plus affichés
+    def keep_only(self, slots):
+        for slot in list(self._slots):
+            if slot not in slots:
+                self.release(slot)
+
+    def cleanup(self):
+        self._finalizer()
+
+
+def session_staging(session_state):
+    if "upload_staging" not in session_state:
+        session_state["upload_staging"] = UploadStaging()
+    return session_state["upload_staging"]
@@ -0,0 +1,56 @@
+import glob
+import hashlib
+import os
+import uuid
+
+from scorm_core.compression import archival_compression
+from scorm_core.packaging import PackageWriter, REPO_DIR, SCORM_BASE_DIR
+
+# Dossier des archives pré-compressées (surchargé par SCORM_CACHE_DIR)
+CACHE_DIR = os.environ.get("SCORM_CACHE_DIR", os.path.join(REPO_DIR, ".cache"))
+
+
+# Empreinte du template : chemin, taille et date de chaque fichier.
+# Toute modification sous scorm_base/ produit une nouvelle empreinte.
+def template_fingerprint(base_dir=SCORM_BASE_DIR):
+    digest = hashlib.sha1()
+    for root, dirs, files in os.walk(base_dir):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            rel = os.path.relpath(path, base_dir).replace(os.sep, "/")
+            digest.update(f"{rel}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+# Retourne le chemin de l'archive pré-compressée du template, en la
+# (re)construisant si scorm_base/ a changé depuis la dernière construction
+def template_archive(base_dir=SCORM_BASE_DIR, cache_dir=None):
+    cache_dir = cache_dir or CACHE_DIR
+    name = os.path.basename(os.path.normpath(base_dir))
+    fingerprint = template_fingerprint(base_dir)
+    archive_path = os.path.join(cache_dir, f"{name}-{fingerprint}.zip")
+    if os.path.exists(archive_path):
+        return archive_path
+
+    os.makedirs(cache_dir, exist_ok=True)
+    # Construction dans un fichier temporaire puis renommage atomique :
+    # deux builds concurrents ne voient jamais une archive partielle
+    tmp_path = f"{archive_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with PackageWriter(tmp_path, policy=archival_compression) as package:
+            package.add_tree(base_dir)
+        os.replace(tmp_path, archive_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    # Les anciennes versions du template ne servent plus
+    for old in glob.glob(os.path.join(cache_dir, f"{name}-*.zip")):
+        if old != archive_path:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+    return archive_path
@@ -0,0 +1,196 @@
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+from scorm_core.template_cache import CACHE_DIR
+
+# Espace de travail disque commun à tous les convertisseurs. La racine peut
+# pointer vers un tmpfs (SCORM_WORKSPACE_DIR=/dev/shm/scorm) :
+#
+#   jobs/      un dossier par conversion, supprimé à la fin de la conversion
+#   sessions/  uploads des sessions Streamlit (scorm_core/staging.py)
+#   results/   packages terminés (scorm_core/result_cache.py), évincés en LRU
+#   queue/     entrées et package de chaque job de la file (scorm_core/jobs.py),
+#              conservés jusqu'à la purge des jobs terminés ; un package terminé
+#              hors cache (queue/<id>/*.zip) est évincé en LRU comme results/
+WORKSPACE_DIR = os.environ.get("SCORM_WORKSPACE_DIR", os.path.join(CACHE_DIR, "workspace"))
+# Taille totale maximale de l'espace de travail
+WORKSPACE_QUOTA_BYTES = int(os.environ.get("SCORM_WORKSPACE_QUOTA_MB", "4096")) * 1024 * 1024
+# Un dossier de job ou de session inactif depuis ce délai est considéré abandonné
+STALE_SECONDS = int(os.environ.get("SCORM_WORKSPACE_STALE_HOURS", "24")) * 3600
+
+LIVE_AREAS = ("jobs", "sessions")
+ARTIFACT_AREAS = ("results",)
+DURABLE_AREAS = ("queue",)
+OWNER_FILE = ".owner"
+# Délai de grâce pour un dossier tout juste créé, pas encore marqué
+UNOWNED_GRACE_SECONDS = 300
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# Place occupée sur le disque : un fichier lié plusieurs fois (liens
+# physiques) n'est compté qu'une fois
+def _tree_size(path):
+    total = 0
+    seen = set()
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                stat = os.lstat(os.path.join(root, name))
+            except FileNotFoundError:
+                continue
+            if (stat.st_dev, stat.st_ino) not in seen:
+                seen.add((stat.st_dev, stat.st_ino))
+                total += stat.st_size
+    return total
+
+
+class Workspace:
+    def __init__(self, root=None, quota_bytes=None, stale_seconds=None):
+        self.root = root or WORKSPACE_DIR
+        self.quota_bytes = WORKSPACE_QUOTA_BYTES if quota_bytes is None else quota_bytes
+        self.stale_seconds = STALE_SECONDS if stale_seconds is None else stale_seconds
+        for area in LIVE_AREAS + ARTIFACT_AREAS + DURABLE_AREAS:
+            os.makedirs(self.area(area), exist_ok=True)
+        self.sweep_stale()
+
+    def area(self, name):
+        return os.path.join(self.root, name)
+
+    # Nouveau dossier marqué au nom du processus courant : si le processus
+    # meurt, le prochain démarrage le supprime
+    def new_dir(self, area="jobs", prefix="job_"):
+        path = tempfile.mkdtemp(prefix=prefix, dir=self.area(area))
+        with open(os.path.join(path, OWNER_FILE), "w") as f:
+            f.write(str(os.getpid()))
+        return path
+
+    # Dossier de travail d'une conversion, supprimé à la sortie, erreur comprise
+    @contextmanager
+    def job(self, prefix="job_"):
+        path = self.new_dir("jobs", prefix)
+        try:
+            yield path
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+
+    # Supprime les dossiers de jobs/sessions laissés par un processus mort ou
+    # inactifs depuis trop longtemps, et les fichiers temporaires des artefacts
+    def sweep_stale(self):
+        now = time.time()
+        for area in LIVE_AREAS:
+            for name in os.listdir(self.area(area)):
+                path = os.path.join(self.area(area), name)
+                try:
+                    age = now - os.path.getmtime(path)
+                except FileNotFoundError:
+                    continue
+                try:
+                    with open(os.path.join(path, OWNER_FILE)) as f:
+                        owner = int(f.read() or 0)
+                except (FileNotFoundError, NotADirectoryError, ValueError):
+                    owner = None
+                except OSError:
+                    continue
+                if owner is None:
+                    stale = age > UNOWNED_GRACE_SECONDS
+                else:
+                    stale = age > self.stale_seconds or (owner != os.getpid() and not _pid_alive(owner))
+                if stale:
+                    if os.path.isdir(path):
+                        shutil.rmtree(path, ignore_errors=True)
+                    else:
+                        os.remove(path)
+        for mtime, _, path in self._artifacts(suffixes=(".tmp", ".part")):
+            if now - mtime > UNOWNED_GRACE_SECONDS:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def _artifacts(self, suffixes=(".zip",)):
+        entries = []
+        for area in ARTIFACT_AREAS:
+            for root, _, files in os.walk(self.area(area)):
+                for name in files:
+                    if not name.endswith(suffixes):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    # Packages terminés des jobs de la file (queue/<id>/*.zip) ; ni les
+    # entrées ni les .part des conversions en cours
+    def _job_outputs(self):
+        entries = []
+        root = self.area("queue")
+        for job_id in os.listdir(root):
+            try:
+                names = os.listdir(os.path.join(root, job_id))
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            for name in names:
+                if not name.endswith(".zip"):
+                    continue
+                path = os.path.join(root, job_id, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def usage(self):
+        return _tree_size(self.root)
+
+    # Évince les packages terminés (cache et jobs de la file) les moins
+    # récemment utilisés jusqu'à repasser sous le quota. Les jobs et sessions
+    # en cours ne sont jamais touchés ; un fichier encore lié ailleurs ne
+    # libère rien tant que son dernier lien n'est pas supprimé.
+    def enforce_quota(self, keep=None):
+        total = self.usage()
+        for _, size, path in sorted(self._artifacts() + self._job_outputs()):
+            if total <= self.quota_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                links = os.stat(path).st_nlink
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            if links == 1:
+                total -= size
+        return total
+
+    def summary(self):
+        return (
+            f"Espace de travail {self.root} : {self.usage() / 1024 / 1024:.1f} Mo / "
+            f"{self.quota_bytes / 1024 / 1024:.0f} Mo"
+        )
+
+
+_default_workspace = None
+
+
+# Instance du processus, créée (et nettoyée) au premier usage
+def default_workspace():
+    global _default_workspace
+    if _default_workspace is None:
+        _default_workspace = Workspace()
+    return _default_workspace